@@ -0,0 +1,46 @@
+"""Add hint_bank table for pregenerated chapter hints
+
+Revision ID: 003_hint_bank
+Revises: 002_parent_system
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "003_hint_bank"
+down_revision: Union[str, None] = "002_parent_system"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── Hint bank: N variants per (chapter, learning difficulty, hint level) ──
+    op.create_table(
+        "hint_bank",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("chapter_id", sa.Uuid(), sa.ForeignKey("chapters.id", ondelete="CASCADE"), nullable=False),
+        sa.Column(
+            "learning_difficulty",
+            postgresql.ENUM("dyslexia", "dysgraphia", "dyscalculia", name="learningdifficulty", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("hint_level", sa.Integer(), nullable=False),
+        sa.Column("variant", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("hint", sa.Text(), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.create_index(
+        "ix_hint_bank_bucket",
+        "hint_bank",
+        ["chapter_id", "learning_difficulty", "hint_level", "variant"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_hint_bank_bucket", table_name="hint_bank")
+    op.drop_table("hint_bank")
@@ -0,0 +1,56 @@
+"""Add practice_problems table (shared practice-problem bank)
+
+Revision ID: 004_practice_problems
+Revises: 003_hint_bank
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "004_practice_problems"
+down_revision: Union[str, None] = "003_hint_bank"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── Practice problems, shared across students ──
+    op.create_table(
+        "practice_problems",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column(
+            "learning_difficulty",
+            postgresql.ENUM("dyslexia", "dysgraphia", "dyscalculia", name="learningdifficulty", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("skill", sa.String(100), nullable=False),
+        sa.Column("age_band", sa.String(10), nullable=False),
+        sa.Column("difficulty", sa.String(20), nullable=False, server_default="easy"),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("question_key", sa.String(64), nullable=False),
+        sa.Column("correct_answer", sa.Text(), nullable=False, server_default=""),
+        sa.Column("options", sa.JSON(), nullable=False),
+        sa.Column("hint", sa.Text(), nullable=False, server_default=""),
+        sa.Column("skill_focus", sa.String(255), nullable=False, server_default=""),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.create_index(
+        "ix_practice_problems_bucket",
+        "practice_problems",
+        ["learning_difficulty", "skill", "age_band", "difficulty"],
+    )
+    op.create_index(
+        "ix_practice_problems_question",
+        "practice_problems",
+        ["learning_difficulty", "skill", "age_band", "question_key"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_practice_problems_question", table_name="practice_problems")
+    op.drop_index("ix_practice_problems_bucket", table_name="practice_problems")
+    op.drop_table("practice_problems")
@@ -16,21 +16,27 @@ from app.application.services.progress_service import ProgressService
 from app.application.services.student_service import StudentService
 from app.domain.entities.user import User
 from app.infrastructure.ai.ai_service import AIService
-from app.infrastructure.ai.tts_service import YuBuVoice
+from app.infrastructure.ai.llm_gateway import LLMGateway, llm_gateway
+from app.infrastructure.ai.token_budget import TokenBudget, token_budget
+from app.infrastructure.ai.scenario_audio import ScenarioAudioLibrary, scenario_audio
+from app.infrastructure.ai.tts_service import YuBuVoice, yubu_voice
 from app.infrastructure.cache.redis_cache import redis_cache
-from app.infrastructure.database.ai_conversation_repository_impl import (
-    SQLAlchemyAIConversationRepository,
-)
 from app.infrastructure.database.badge_repository_impl import (
     SQLAlchemyBadgeRepository,
 )
+from app.infrastructure.database.conversation_writer import (
+    buffered_conversation_repository,
+)
 from app.infrastructure.database.chapter_repository_impl import (
     SQLAlchemyChapterRepository,
 )
+from app.infrastructure.database.hint_bank_repository_impl import (
+    SQLAlchemyHintBankRepository,
+)
 from app.infrastructure.database.progress_repository_impl import (
     SQLAlchemyProgressRepository,
 )
-from app.infrastructure.database.session import get_db
+from app.infrastructure.database.session import get_db, get_stream_db
 from app.infrastructure.database.student_profile_repository_impl import (
     SQLAlchemyStudentProfileRepository,
 )
@@ -71,8 +77,13 @@ def get_progress_repo(session: AsyncSession = Depends(get_db)):
 
 
 def get_ai_conversation_repo(session: AsyncSession = Depends(get_db)):
-    """Inject AIConversationRepository."""
-    return SQLAlchemyAIConversationRepository(session)
+    """Inject AIConversationRepository (writes are batched in the background)."""
+    return buffered_conversation_repository(session)
+
+
+def get_hint_bank_repo(session: AsyncSession = Depends(get_db)):
+    """Inject HintBankRepository."""
+    return SQLAlchemyHintBankRepository(session)
 
 
 def get_badge_repo(session: AsyncSession = Depends(get_db)):
@@ -90,6 +101,18 @@ def get_teacher_repo(session: AsyncSession = Depends(get_db)):
     return SQLAlchemyTeacherRepository(session)
 
 
+# ─── Infrastructure Dependencies ────────────────────────────
+
+def get_llm_gateway() -> LLMGateway:
+    """Inject the shared, lifespan-managed LLM gateway."""
+    return llm_gateway
+
+
+def get_token_budget() -> TokenBudget:
+    """Inject the shared per-user/per-school token budget."""
+    return token_budget
+
+
 # ─── Service Dependencies ───────────────────────────────────
 
 def get_auth_service(
@@ -138,14 +161,37 @@ def get_ai_service(
     conversation_repo=Depends(get_ai_conversation_repo),
     profile_repo=Depends(get_student_profile_repo),
     progress_repo=Depends(get_progress_repo),
+    hint_bank_repo=Depends(get_hint_bank_repo),
+    llm: LLMGateway = Depends(get_llm_gateway),
 ) -> AIService:
     """Inject AIService."""
-    return AIService(conversation_repo, profile_repo, progress_repo, redis_cache)
+    return AIService(
+        conversation_repo, profile_repo, progress_repo, redis_cache, llm, hint_bank_repo
+    )
+
+
+def get_ai_stream_service(
+    session: AsyncSession = Depends(get_stream_db),
+    llm: LLMGateway = Depends(get_llm_gateway),
+) -> AIService:
+    """Inject AIService bound to a session owned by the streaming response."""
+    return AIService(
+        buffered_conversation_repository(session),
+        SQLAlchemyStudentProfileRepository(session),
+        SQLAlchemyProgressRepository(session),
+        redis_cache,
+        llm,
+    )
 
 
 def get_tts_service() -> YuBuVoice:
-    """Inject YuBuVoice TTS service."""
-    return YuBuVoice()
+    """Inject the shared YuBuVoice TTS service (pooled ElevenLabs client)."""
+    return yubu_voice
+
+
+def get_scenario_audio() -> ScenarioAudioLibrary:
+    """Inject the prerendered scenario clip library."""
+    return scenario_audio
 
 
 # ─── Auth Dependencies ──────────────────────────────────────
@@ -3,6 +3,7 @@ Aktivite-içi AI API endpoint'leri.
 
 KATMAN 1:
   POST /api/ai/activity/hint         — Aktivite sırasında anlık ipucu
+  POST /api/ai/activity/hint/stream  — İpucu (SSE akışı)
   POST /api/ai/activity/evaluate      — Öğrenci çalışmasını değerlendir
   POST /api/ai/activity/difficulty    — Uyarlanabilir zorluk önerisi
 
@@ -18,8 +19,10 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import get_current_active_user
+from app.api.dependencies import get_current_active_user, get_llm_gateway
+from app.api.sse import sse_event, sse_response, stream_in_session
 from app.application.dtos.ai_activity_dtos import (
     ActivityHintRequest,
     ActivityHintResponse,
@@ -37,14 +40,20 @@ from app.application.dtos.ai_activity_dtos import (
 )
 from app.domain.entities.user import User
 from app.infrastructure.ai.activity_ai_service import ActivityAIService
+from app.infrastructure.ai.hint_prefetch import hint_prefetcher
+from app.infrastructure.ai.json_stream import FieldDelta
+from app.infrastructure.ai.llm_gateway import LLMGateway
 from app.infrastructure.cache.redis_cache import redis_cache
-from app.infrastructure.database.ai_conversation_repository_impl import (
-    SQLAlchemyAIConversationRepository,
+from app.infrastructure.database.conversation_writer import (
+    buffered_conversation_repository,
+)
+from app.infrastructure.database.practice_problem_repository_impl import (
+    SQLAlchemyPracticeProblemRepository,
 )
 from app.infrastructure.database.progress_repository_impl import (
     SQLAlchemyProgressRepository,
 )
-from app.infrastructure.database.session import get_db
+from app.infrastructure.database.session import get_db, get_stream_db
 from app.infrastructure.database.student_profile_repository_impl import (
     SQLAlchemyStudentProfileRepository,
 )
@@ -54,16 +63,34 @@ router = APIRouter(prefix="/api/ai/activity", tags=["AI Activity Support"])
 
 # ─── Dependency ─────────────────────────────────────────────
 
-def get_activity_ai_service(session=Depends(get_db)) -> ActivityAIService:
-    """ActivityAIService bağımlılık enjeksiyonu."""
+def _build_activity_ai_service(session: AsyncSession, llm: LLMGateway) -> ActivityAIService:
     return ActivityAIService(
-        conversation_repo=SQLAlchemyAIConversationRepository(session),
+        conversation_repo=buffered_conversation_repository(session),
         profile_repo=SQLAlchemyStudentProfileRepository(session),
         progress_repo=SQLAlchemyProgressRepository(session),
         cache=redis_cache,
+        llm=llm,
+        hint_prefetcher=hint_prefetcher,
+        practice_repo=SQLAlchemyPracticeProblemRepository(session),
     )
 
 
+def get_activity_ai_service(
+    session=Depends(get_db),
+    llm: LLMGateway = Depends(get_llm_gateway),
+) -> ActivityAIService:
+    """ActivityAIService bağımlılık enjeksiyonu."""
+    return _build_activity_ai_service(session, llm)
+
+
+def get_activity_ai_stream_service(
+    session: AsyncSession = Depends(get_stream_db),
+    llm: LLMGateway = Depends(get_llm_gateway),
+) -> ActivityAIService:
+    """Oturumu akış yanıtına ait ActivityAIService."""
+    return _build_activity_ai_service(session, llm)
+
+
 # ═════════════════════════════════════════════════════════════
 # KATMAN 1: AKTİVİTE İÇİ GERÇEK ZAMANLI DESTEK
 # ═════════════════════════════════════════════════════════════
@@ -98,6 +125,42 @@ async def get_activity_hint(
         )
 
 
+@router.post(
+    "/hint/stream",
+    summary="Aktivite İpucu (Akış)",
+    description=(
+        "Aktivite ipucunun Server-Sent Events sürümü. `hint` ve `encouragement` "
+        "metinleri üretildikçe `field` olaylarıyla gelir; doğrulanmış tam yanıt "
+        "`done` olayındadır ve her zaman esas alınmalıdır."
+    ),
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_activity_hint(
+    request: ActivityHintRequest,
+    current_user: User = Depends(get_current_active_user),
+    ai_service: ActivityAIService = Depends(get_activity_ai_stream_service),
+    session: AsyncSession = Depends(get_stream_db),
+):
+    """Aktivite ipucunu alan alan akıt."""
+
+    async def events():
+        async for item in ai_service.provide_activity_hint_stream(
+            student_id=current_user.id,
+            chapter_id=request.chapter_id,
+            activity_type=request.activity_type,
+            problem=request.problem,
+            student_attempt=request.student_attempt,
+            context=request.context,
+        ):
+            if isinstance(item, FieldDelta):
+                yield sse_event("field", {"field": item.field, "text": item.text})
+            else:
+                done = ActivityHintResponse(**item)
+                yield sse_event("done", done.model_dump(mode="json"))
+
+    return sse_response(stream_in_session(session, events()))
+
+
 @router.post(
     "/evaluate",
     response_model=EvaluateWorkResponse,
@@ -142,6 +205,7 @@ async def suggest_difficulty(
         result = await ai_service.adaptive_difficulty_suggestion(
             student_id=current_user.id,
             recent_performance=request.recent_performance,
+            explain=request.explain,
         )
         return AdaptiveDifficultyResponse(**result)
     except Exception as e:
@@ -237,6 +301,7 @@ async def generate_practice(
         for i, p in enumerate(problems):
             items.append(PracticeItem(
                 id=p.get("id", i + 1),
+                problem_id=p.get("problem_id"),
                 question=p.get("question", ""),
                 correct_answer=p.get("correct_answer", ""),
                 options=p.get("options", []),
@@ -1,43 +1,85 @@
 """
 AI API routes.
 POST /api/ai/chat                (personalized conversation)
+POST /api/ai/chat/stream         (personalized conversation, SSE)
+POST /api/ai/chat/speech         (conversation + YuBu voice, SSE)
 POST /api/ai/hint/{chapter_id}   (chapter hint)
 GET  /api/ai/analysis/{student_id} (performance analysis)
+GET  /api/ai/admin/usage         (token usage per school, admin)
 POST /api/ai/tts/speak           (YuBu TTS - metin → ses)
+POST /api/ai/tts/speak/stream    (YuBu TTS - metin → ses, akış)
 POST /api/ai/tts/scenario        (YuBu TTS - senaryo → ses)
+GET  /api/ai/tts/scenario/audio/{file} (Önceden üretilmiş senaryo sesi)
 GET  /api/ai/tts/scenarios       (Mevcut senaryolar listesi)
 """
 
+import base64
+from typing import Any, AsyncIterator, Dict, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import (
     get_ai_service,
+    get_ai_stream_service,
     get_chapter_service,
     get_current_active_user,
+    get_scenario_audio,
+    get_school_repo,
+    get_token_budget,
     get_tts_service,
+    require_admin,
 )
+from app.api.sse import sse_event, sse_response, stream_in_session
 from app.application.dtos.ai_dtos import (
     AIAnalysisResponse,
     AIChatRequest,
     AIChatResponse,
+    AIChatSpeechRequest,
     AIHintRequest,
     AIHintResponse,
+    AIUsageResponse,
     TTSRequest,
     TTSScenarioRequest,
     YuBuScenariosResponse,
 )
 from app.application.services.chapter_service import ChapterService
+from app.domain.entities.ai_conversation import AIConversation
 from app.domain.entities.user import User
+from app.domain.repositories.school_repository import SchoolRepository
 from app.infrastructure.ai.ai_service import AIService
+from app.infrastructure.ai.audio_variants import choose_variant
+from app.infrastructure.ai.scenario_audio import ScenarioAudioLibrary, ScenarioClip
+from app.infrastructure.ai.speech_pipeline import SpeechChunk, speak_while_generating
+from app.infrastructure.ai.token_budget import TokenBudget
 from app.infrastructure.ai.tts_service import YuBuVoice
+from app.infrastructure.database.session import get_stream_db
 
 router = APIRouter(prefix="/api/ai", tags=["AI"])
 
 
+async def _chapter_context(
+    request: AIChatRequest,
+    chapter_service: ChapterService,
+) -> Optional[Dict[str, Any]]:
+    """If chapter_id provided, fetch chapter for context."""
+    if not request.chapter_id:
+        return None
+    chapter = await chapter_service.get_chapter(request.chapter_id)
+    if not chapter:
+        return None
+    return {
+        "title": chapter.title,
+        "activity_type": chapter.activity_type.value if hasattr(chapter.activity_type, 'value') else str(chapter.activity_type),
+        "chapter_number": chapter.chapter_number,
+        "difficulty_type": chapter.difficulty_type.value if hasattr(chapter.difficulty_type, 'value') else str(chapter.difficulty_type),
+        "description": chapter.description or "",
+    }
+
+
 @router.post(
     "/chat",
     response_model=AIChatResponse,
@@ -52,19 +94,7 @@ async def ai_chat(
 ):
     """Send a message to AI and get a personalized response."""
     try:
-        # If chapter_id provided, fetch chapter for context
-        chapter_context = None
-        if request.chapter_id:
-            chapter = await chapter_service.get_chapter(request.chapter_id)
-            if chapter:
-                chapter_context = {
-                    "title": chapter.title,
-                    "activity_type": chapter.activity_type.value if hasattr(chapter.activity_type, 'value') else str(chapter.activity_type),
-                    "chapter_number": chapter.chapter_number,
-                    "difficulty_type": chapter.difficulty_type.value if hasattr(chapter.difficulty_type, 'value') else str(chapter.difficulty_type),
-                    "description": chapter.description or "",
-                }
-
+        chapter_context = await _chapter_context(request, chapter_service)
         conversation = await ai_service.chat(
             user_id=current_user.id,
             message=request.message,
@@ -87,6 +117,110 @@ async def ai_chat(
         )
 
 
+@router.post(
+    "/chat/stream",
+    summary="AI Sohbet (Akış)",
+    description=(
+        "AI sohbetin Server-Sent Events sürümü. Yanıt `token` olaylarıyla "
+        "parça parça gelir; sonunda kayıtlı konuşma `done` olayı ile döner."
+    ),
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def ai_chat_stream(
+    request: AIChatRequest,
+    current_user: User = Depends(get_current_active_user),
+    ai_service: AIService = Depends(get_ai_stream_service),
+    chapter_service: ChapterService = Depends(get_chapter_service),
+    session: AsyncSession = Depends(get_stream_db),
+):
+    """Stream an AI response token by token over SSE."""
+    try:
+        chapter_context = await _chapter_context(request, chapter_service)
+    except Exception:
+        # The stream never starts, so it cannot close its session
+        await session.close()
+        raise
+
+    async def events():
+        async for item in ai_service.chat_stream(
+            user_id=current_user.id,
+            message=request.message,
+            role_context=request.role_context,
+            chapter_context=chapter_context,
+        ):
+            if isinstance(item, AIConversation):
+                done = AIChatResponse(
+                    id=item.id,
+                    message=item.message,
+                    response=item.response,
+                    role_context=item.role_context,
+                    tokens_used=item.tokens_used,
+                    timestamp=item.timestamp,
+                )
+                yield sse_event("done", done.model_dump(mode="json"))
+            else:
+                yield sse_event("token", {"text": item})
+
+    return sse_response(stream_in_session(session, events()))
+
+
+@router.post(
+    "/chat/speech",
+    summary="AI Sohbet (Sesli Akış)",
+    description=(
+        "Sohbet yanıtını YuBu sesiyle tek bağlantıda döndürür. Metin `token` "
+        "olaylarıyla gelir; her cümle tamamlanır tamamlanmaz seslendirilir ve "
+        "`audio` olayı (base64 MP3) olarak sırayla iletilir; sonunda `done`."
+    ),
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def ai_chat_speech(
+    request: AIChatSpeechRequest,
+    current_user: User = Depends(get_current_active_user),
+    ai_service: AIService = Depends(get_ai_stream_service),
+    chapter_service: ChapterService = Depends(get_chapter_service),
+    tts_service: YuBuVoice = Depends(get_tts_service),
+    session: AsyncSession = Depends(get_stream_db),
+):
+    """Stream an AI response with its speech interleaved, sentence by sentence."""
+    try:
+        chapter_context = await _chapter_context(request, chapter_service)
+    except Exception:
+        # The stream never starts, so it cannot close its session
+        await session.close()
+        raise
+
+    async def events():
+        items = ai_service.chat_stream(
+            user_id=current_user.id,
+            message=request.message,
+            role_context=request.role_context,
+            chapter_context=chapter_context,
+        )
+        async for item in speak_while_generating(items, tts_service, request.emotion):
+            if isinstance(item, SpeechChunk):
+                yield sse_event("audio", {
+                    "seq": item.seq,
+                    "text": item.text,
+                    "media_type": "audio/mpeg",
+                    "audio": base64.b64encode(item.audio).decode("ascii"),
+                })
+            elif isinstance(item, AIConversation):
+                done = AIChatResponse(
+                    id=item.id,
+                    message=item.message,
+                    response=item.response,
+                    role_context=item.role_context,
+                    tokens_used=item.tokens_used,
+                    timestamp=item.timestamp,
+                )
+                yield sse_event("done", done.model_dump(mode="json"))
+            else:
+                yield sse_event("token", {"text": item})
+
+    return sse_response(stream_in_session(session, events()))
+
+
 @router.post(
     "/hint/{chapter_id}",
     response_model=AIHintResponse,
@@ -169,6 +303,32 @@ async def get_analysis(
         )
 
 
+@router.get(
+    "/admin/usage",
+    response_model=AIUsageResponse,
+    summary="AI Token Kullanımı",
+    description="Okul bazında günlük AI token kullanımı (Redis sayaçlarından). Sadece yönetici.",
+)
+async def get_ai_usage(
+    days: int = Query(default=1, ge=1, le=35, description="Bugün dahil kaç gün"),
+    current_user: User = Depends(require_admin),
+    budget: TokenBudget = Depends(get_token_budget),
+    school_repo: SchoolRepository = Depends(get_school_repo),
+):
+    """Roll up token usage per school without scanning ai_conversations."""
+    schools = await budget.school_usage(days)
+    names = {str(school.id): school.name for school in await school_repo.list_all(limit=1000)}
+    for entry in schools:
+        entry["school_name"] = names.get(entry["school_id"])
+    return AIUsageResponse(
+        days=days,
+        limits=budget.limits,
+        total_tokens=sum(entry["tokens"] for entry in schools),
+        schools=schools,
+        top_users=await budget.top_users(),
+    )
+
+
 # ═══════════════════════════════════════════════════════════════
 # YuBu TTS (Text-to-Speech) Endpoints
 # ═══════════════════════════════════════════════════════════════
@@ -176,27 +336,39 @@ async def get_analysis(
 @router.post(
     "/tts/speak",
     summary="YuBu Sesli Konuşma",
-    description="Metni YuBu sesiyle seslendirme. Emosyon desteği ile MP3 döner.",
-    responses={200: {"content": {"audio/mpeg": {}}}},
+    description=(
+        "Metni YuBu sesiyle seslendirme. Emosyon desteği ile MP3 döner; "
+        "`?format=opus|mp3_low` veya `Accept: audio/ogg` ile düşük bit hızlı "
+        "sürüm istenebilir."
+    ),
+    responses={200: {"content": {"audio/mpeg": {}, "audio/ogg": {}}}},
 )
 async def tts_speak(
     request: TTSRequest,
+    format: Optional[str] = Query(
+        default=None,
+        description="Ses biçimi: mp3 (varsayılan), opus veya mp3_low",
+    ),
+    accept: Optional[str] = Header(default=None),
     current_user: User = Depends(get_current_active_user),
     tts_service: YuBuVoice = Depends(get_tts_service),
 ):
-    """Convert text to YuBu voice (MP3 audio)."""
+    """Convert text to YuBu voice (MP3, or a compact variant on request)."""
+    variant = choose_variant(accept, format)
     try:
-        audio_bytes = await tts_service.speak(
+        audio_bytes, media_type = await tts_service.speak_variant(
             text=request.text,
             emotion=request.emotion,
-            speed=request.speed,
+            variant=variant,
         )
+        extension = "ogg" if media_type.startswith("audio/ogg") else "mp3"
         return Response(
             content=audio_bytes,
-            media_type="audio/mpeg",
+            media_type=media_type,
             headers={
-                "Content-Disposition": "inline; filename=yubu_speech.mp3",
+                "Content-Disposition": f"inline; filename=yubu_speech.{extension}",
                 "Cache-Control": "public, max-age=3600",
+                "Vary": "Accept",
             },
         )
     except Exception as e:
@@ -207,6 +379,68 @@ async def tts_speak(
         )
 
 
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+@router.post(
+    "/tts/speak/stream",
+    summary="YuBu Sesli Konuşma (Akış)",
+    description=(
+        "`/tts/speak` ile aynı ses, ancak MP3 parçaları ElevenLabs'ten "
+        "geldikçe iletilir; oynatma sentez bitmeden başlayabilir."
+    ),
+    responses={200: {"content": {"audio/mpeg": {}}}},
+)
+async def tts_speak_stream(
+    request: TTSRequest,
+    current_user: User = Depends(get_current_active_user),
+    tts_service: YuBuVoice = Depends(get_tts_service),
+):
+    """Stream YuBu voice audio chunk by chunk."""
+    chunks = tts_service.stream(text=request.text, emotion=request.emotion)
+    # Wait for the first chunk so upstream failures still return a 500
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except Exception as e:
+        logger.error(f"TTS stream error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ses oluşturulurken bir hata oluştu",
+        )
+    return StreamingResponse(
+        _prepend(first, chunks),
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "inline; filename=yubu_speech.mp3",
+            "Cache-Control": "public, max-age=3600",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+def _scenario_file_response(
+    library: ScenarioAudioLibrary,
+    clip: ScenarioClip,
+    if_none_match: Optional[str],
+    cache_control: str,
+) -> Response:
+    """Prerendered scenario file (or 304 if the client already has this version)."""
+    etag = f'"{clip.etag}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        library.path(clip),
+        media_type="audio/mpeg",
+        headers={**headers, "Content-Disposition": f"inline; filename={clip.file}"},
+    )
+
+
 @router.post(
     "/tts/scenario",
     summary="YuBu Senaryo Sesi",
@@ -215,10 +449,18 @@ async def tts_speak(
 )
 async def tts_scenario(
     request: TTSScenarioRequest,
+    if_none_match: Optional[str] = Header(default=None),
     current_user: User = Depends(get_current_active_user),
     tts_service: YuBuVoice = Depends(get_tts_service),
+    library: ScenarioAudioLibrary = Depends(get_scenario_audio),
 ):
     """Play a predefined YuBu scenario voice (MP3 audio)."""
+    clip = library.current(request.scenario, tts_service)
+    if clip is not None:
+        return _scenario_file_response(
+            library, clip, if_none_match, "public, max-age=86400"
+        )
+
     try:
         audio_bytes = await tts_service.speak_scenario(request.scenario)
         if audio_bytes is None:
@@ -244,22 +486,58 @@ async def tts_scenario(
         )
 
 
+@router.get(
+    "/tts/scenario/audio/{filename}",
+    summary="YuBu Senaryo Dosyası",
+    description=(
+        "Derleme sırasında üretilmiş, sürümlü senaryo sesi. Dosya adı metin "
+        "özetini içerdiği için yanıt kalıcı (immutable) önbelleğe alınabilir."
+    ),
+    responses={200: {"content": {"audio/mpeg": {}}}, 304: {}},
+)
+async def tts_scenario_audio(
+    filename: str,
+    if_none_match: Optional[str] = Header(default=None),
+    current_user: User = Depends(get_current_active_user),
+    library: ScenarioAudioLibrary = Depends(get_scenario_audio),
+):
+    """Serve a versioned prerendered scenario file."""
+    clip = library.by_file(filename)
+    if clip is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Senaryo dosyası bulunamadı: {filename}",
+        )
+    return _scenario_file_response(
+        library, clip, if_none_match, "public, max-age=31536000, immutable"
+    )
+
+
 @router.get(
     "/tts/scenarios",
     response_model=YuBuScenariosResponse,
     summary="YuBu Senaryoları",
-    description="Mevcut tüm YuBu ses senaryolarının listesi.",
+    description=(
+        "Mevcut tüm YuBu ses senaryolarının listesi. Önceden üretilmiş "
+        "senaryolar sürümlü `audio_url` adresini de içerir."
+    ),
 )
-async def list_tts_scenarios():
+async def list_tts_scenarios(
+    tts_service: YuBuVoice = Depends(get_tts_service),
+    library: ScenarioAudioLibrary = Depends(get_scenario_audio),
+):
     """List all available YuBu TTS scenarios."""
     from app.infrastructure.ai.yubu_prompts import YUBU_SCENARIOS
 
-    scenarios = {
-        key: {
+    scenarios = {}
+    for key, val in YUBU_SCENARIOS.items():
+        entry = {
             "text": val["text"],
             "emotion": val["emotion"],
             "description": val.get("description", ""),
         }
-        for key, val in YUBU_SCENARIOS.items()
-    }
+        clip = library.current(key, tts_service)
+        if clip is not None:
+            entry["audio_url"] = f"{router.prefix}/tts/scenario/audio/{clip.file}"
+        scenarios[key] = entry
     return YuBuScenariosResponse(scenarios=scenarios)
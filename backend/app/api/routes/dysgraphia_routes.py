@@ -5,6 +5,7 @@ POST /api/dysgraphia/spelling/help
 POST /api/dysgraphia/ai/story-ideas
 POST /api/dysgraphia/composition/feedback
 POST /api/dysgraphia/ai/writing-coach
+POST /api/dysgraphia/ai/writing-coach/stream
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -12,7 +13,9 @@ from loguru import logger
 
 from app.api.dependencies import (
     get_current_active_user,
+    get_llm_gateway,
 )
+from app.api.sse import sse_event, sse_response, stream_in_session
 from app.application.dtos.dysgraphia_dtos import (
     CompositionFeedbackRequest,
     CompositionFeedbackResponse,
@@ -29,16 +32,18 @@ from app.application.dtos.dysgraphia_dtos import (
     WritingCoachRequest,
     WritingCoachResponse,
 )
+from app.domain.entities.ai_conversation import AIConversation
 from app.domain.entities.user import User
 from app.infrastructure.ai.dysgraphia_service import DysgraphiaAIService
+from app.infrastructure.ai.llm_gateway import LLMGateway
 from app.infrastructure.cache.redis_cache import redis_cache
-from app.infrastructure.database.ai_conversation_repository_impl import (
-    SQLAlchemyAIConversationRepository,
+from app.infrastructure.database.conversation_writer import (
+    buffered_conversation_repository,
 )
 from app.infrastructure.database.progress_repository_impl import (
     SQLAlchemyProgressRepository,
 )
-from app.infrastructure.database.session import get_db
+from app.infrastructure.database.session import get_db, get_stream_db
 from app.infrastructure.database.student_profile_repository_impl import (
     SQLAlchemyStudentProfileRepository,
 )
@@ -48,12 +53,26 @@ from fastapi import Depends
 router = APIRouter(prefix="/api/dysgraphia", tags=["Dysgraphia"])
 
 
-def get_dysgraphia_ai_service(session: AsyncSession = Depends(get_db)):
+def get_dysgraphia_ai_service(
+    session: AsyncSession = Depends(get_db),
+    llm: LLMGateway = Depends(get_llm_gateway),
+):
     """Inject DysgraphiaAIService."""
-    conversation_repo = SQLAlchemyAIConversationRepository(session)
+    conversation_repo = buffered_conversation_repository(session)
     profile_repo = SQLAlchemyStudentProfileRepository(session)
     progress_repo = SQLAlchemyProgressRepository(session)
-    return DysgraphiaAIService(conversation_repo, profile_repo, progress_repo, redis_cache)
+    return DysgraphiaAIService(conversation_repo, profile_repo, progress_repo, redis_cache, llm)
+
+
+def get_dysgraphia_stream_service(
+    session: AsyncSession = Depends(get_stream_db),
+    llm: LLMGateway = Depends(get_llm_gateway),
+):
+    """Inject DysgraphiaAIService bound to a session owned by the streaming response."""
+    conversation_repo = buffered_conversation_repository(session)
+    profile_repo = SQLAlchemyStudentProfileRepository(session)
+    progress_repo = SQLAlchemyProgressRepository(session)
+    return DysgraphiaAIService(conversation_repo, profile_repo, progress_repo, redis_cache, llm)
 
 
 @router.post(
@@ -236,3 +255,38 @@ async def writing_coach(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Yazma koçu yanıt oluştururken hata oluştu",
         )
+
+
+@router.post(
+    "/ai/writing-coach/stream",
+    summary="Yazma Koçu (Akış)",
+    description=(
+        "Yazma koçunun Server-Sent Events sürümü. Yanıt `token` olaylarıyla "
+        "parça parça gelir; sonunda `done` olayı ile tamamlanır."
+    ),
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def writing_coach_stream(
+    request: WritingCoachRequest,
+    current_user: User = Depends(get_current_active_user),
+    service: DysgraphiaAIService = Depends(get_dysgraphia_stream_service),
+    session: AsyncSession = Depends(get_stream_db),
+):
+    """Stream writing coach support token by token over SSE."""
+
+    async def events():
+        async for item in service.writing_coach_stream(
+            user_id=current_user.id,
+            message=request.message,
+            writing_task=request.writing_task,
+        ):
+            if isinstance(item, AIConversation):
+                done = WritingCoachResponse(
+                    response=item.response,
+                    tokens_used=item.tokens_used,
+                )
+                yield sse_event("done", done.model_dump(mode="json"))
+            else:
+                yield sse_event("token", {"text": item})
+
+    return sse_response(stream_in_session(session, events()))
@@ -0,0 +1,49 @@
+"""
+Server-Sent Events helpers for streaming API responses.
+"""
+
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format a single SSE frame with a JSON payload."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def stream_in_session(
+    session: AsyncSession,
+    events: AsyncIterator[str],
+) -> AsyncIterator[str]:
+    """
+    Forward SSE frames while owning the stream's database session.
+    Commits once the stream finishes; errors become a final `error` frame
+    because the HTTP status has already been sent.
+    """
+    try:
+        async for frame in events:
+            yield frame
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"SSE stream error: {e}")
+        yield sse_event("error", {"detail": "Yanıt akışı sırasında bir hata oluştu"})
+    finally:
+        await session.close()
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap SSE frames in a non-buffered streaming response."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -93,6 +93,10 @@ class AdaptiveDifficultyRequest(BaseModel):
         ...,
         description="Son 5-10 aktivite performansı: [{score, hints_used, time_seconds, errors}]",
     )
+    explain: bool = Field(
+        default=False,
+        description="Kararın gerekçesini AI ile yazdır (karar yerel motorda verilir)",
+    )
 
 
 class AdaptiveDifficultyResponse(BaseModel):
@@ -105,6 +109,10 @@ class AdaptiveDifficultyResponse(BaseModel):
         default_factory=list,
         description="Somut ayarlama önerileri",
     )
+    signals: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Kararı veren istatistikler (EWMA, eğilim, seriler)",
+    )
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -188,6 +196,7 @@ class PersonalizedPracticeRequest(BaseModel):
 class PracticeItem(BaseModel):
     """Tek bir pratik problemi."""
     id: int
+    problem_id: Optional[str] = Field(None, description="Problem bankası ID'si")
     question: str
     correct_answer: str
     options: List[str] = Field(default_factory=list)
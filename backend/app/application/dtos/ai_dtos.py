@@ -34,6 +34,14 @@ class AIChatRequest(BaseModel):
     }}
 
 
+class AIChatSpeechRequest(AIChatRequest):
+    """Request body for chat answered with YuBu's voice."""
+    emotion: str = Field(
+        default="neutral",
+        description="Emosyon tipi: happy, encouraging, gentle, neutral, excited"
+    )
+
+
 class AIHintRequest(BaseModel):
     """Request body for getting a hint for a specific chapter."""
     student_id: Optional[UUID] = None
@@ -79,6 +87,32 @@ class AIAnalysisResponse(BaseModel):
     encouragement_message: str
 
 
+# ─── AI Usage (token budget) DTOs ───────────────────────────
+
+class AIUsageSchoolItem(BaseModel):
+    """Token usage of one school (or of users without a school)."""
+    school_id: str
+    school_name: Optional[str] = None
+    tokens: int
+    requests: int
+    daily: Dict[str, int] = Field(default_factory=dict, description="YYYYMMDD → token")
+
+
+class AIUsageUserItem(BaseModel):
+    """Token usage of one user today."""
+    user_id: str
+    tokens: int
+
+
+class AIUsageResponse(BaseModel):
+    """AI token usage rolled up from the Redis counters."""
+    days: int
+    limits: Dict[str, int]
+    total_tokens: int
+    schools: List[AIUsageSchoolItem]
+    top_users: List[AIUsageUserItem]
+
+
 # ─── TTS (Text-to-Speech) DTOs ──────────────────────────────
 
 class TTSRequest(BaseModel):
@@ -3,7 +3,7 @@ Application settings using pydantic-settings.
 Loads configuration from environment variables and .env file.
 """
 
-from typing import List
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -38,11 +38,125 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_MAX_TOKENS: int = 2048
+    # Alternative endpoint, e.g. app.fake_openai_server for benchmarks
+    OPENAI_BASE_URL: Optional[str] = None
+
+    # LLM Gateway — shared OpenAI connection pool
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    OPENAI_MAX_CONCURRENCY: int = 32
+
+    # LLM scheduler lanes (share OPENAI_MAX_CONCURRENCY; interactive served first)
+    LLM_LANE_INTERACTIVE_CONCURRENCY: int = 32
+    LLM_LANE_INTERACTIVE_QUEUE: int = 256
+    LLM_LANE_STANDARD_CONCURRENCY: int = 16
+    LLM_LANE_STANDARD_QUEUE: int = 128
+    LLM_LANE_BACKGROUND_CONCURRENCY: int = 6
+    LLM_LANE_BACKGROUND_QUEUE: int = 64
+
+    # LLM prompt-response cache (in-process tier; Redis tier uses REDIS_URL)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_LOCAL_MAX_ENTRIES: int = 2048
+
+    # Single-flight coalescing of identical in-flight upstream calls
+    SINGLE_FLIGHT_LEASE_SECONDS: int = 15
+
+    # Circuit breaker per (model, endpoint) and hedged requests
+    LLM_CIRCUIT_ENABLED: bool = True
+    LLM_CIRCUIT_WINDOW: int = 50
+    LLM_CIRCUIT_MIN_CALLS: int = 10
+    LLM_CIRCUIT_ERROR_RATE: float = 0.5
+    LLM_CIRCUIT_SLOW_FRACTION: float = 0.8  # p95 above this share of the timeout trips
+    LLM_CIRCUIT_OPEN_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY_MS: int = 250
+
+    # Model routing: endpoints pick a tier (standard = OPENAI_MODEL) and move
+    # to the next faster tier while their latency SLO is broken
+    LLM_MODEL_FAST: str = "gpt-4o-mini"
+    LLM_ROUTER_FALLBACK_ENABLED: bool = True
+    LLM_ROUTER_WINDOW: int = 50
+    LLM_ROUTER_MIN_CALLS: int = 10
+    LLM_ROUTER_SLO_PERCENTILE: float = 95.0
+    LLM_ROUTER_RECHECK_SECONDS: float = 60.0
+
+    # Structured output: JSON endpoints send their response DTO's JSON schema
+    # (disable for OpenAI-compatible servers without response_format support)
+    LLM_STRUCTURED_OUTPUT_ENABLED: bool = True
+
+    # AI conversation write-behind buffer
+    AI_CONVERSATION_BATCH_SIZE: int = 100
+    AI_CONVERSATION_FLUSH_INTERVAL_MS: int = 250
+    AI_CONVERSATION_MAX_PENDING: int = 5000
+
+    # Chat context — verbatim recent turns + rolling summary of older ones
+    AI_CONTEXT_FETCH_TURNS: int = 20
+    AI_CONTEXT_VERBATIM_TOKEN_BUDGET: int = 1200
+    AI_CONTEXT_MIN_VERBATIM_TURNS: int = 2
+    AI_CONTEXT_SUMMARY_TOKEN_BUDGET: int = 300
+    AI_CONTEXT_SUMMARY_TTL_SECONDS: int = 604800
+    AI_CONTEXT_SUMMARY_LOCK_SECONDS: int = 60
+
+    # Pregenerated chapter hints (python -m app.generate_hint_bank)
+    HINT_BANK_ENABLED: bool = True
+    HINT_BANK_VARIANTS: int = 5
+    HINT_BANK_CACHE_TTL_SECONDS: int = 86400
+    HINT_BANK_REGEN_LOCK_SECONDS: int = 600
+
+    # Speculative generation of the next activity hint levels
+    ACTIVITY_HINT_PREFETCH_ENABLED: bool = True
+    ACTIVITY_HINT_PREFETCH_TTL_SECONDS: int = 300
+    ACTIVITY_HINT_PREFETCH_WAIT_SECONDS: float = 8.0
+
+    # Shared practice-problem bank
+    PRACTICE_BANK_ENABLED: bool = True
+    PRACTICE_BANK_MIN_BUCKET: int = 30
+    PRACTICE_BANK_TOP_UP_BATCH: int = 10
+    PRACTICE_BANK_TOP_UP_LOCK_SECONDS: int = 120
+    PRACTICE_SEEN_TTL_DAYS: int = 90
+
+    # Daily LLM token budgets (0 = unlimited); counters kept in Redis
+    AI_USER_DAILY_TOKEN_BUDGET: int = 50000
+    AI_SCHOOL_DAILY_TOKEN_BUDGET: int = 2000000
+    AI_USAGE_RETENTION_DAYS: int = 35
 
     # ElevenLabs TTS — YuBu Voice
     ELEVENLABS_API_KEY: str = ""
     ELEVENLABS_VOICE_ID: str = "cgSgspJ2msm6clMCkdW9"  # Jessica — Playful, Bright, Warm, Cute
     ELEVENLABS_MODEL: str = "eleven_multilingual_v2"  # Çok dilli (Türkçe dahil)
+    ELEVENLABS_BASE_URL: Optional[str] = None  # None = https://api.elevenlabs.io/v1
+    TTS_TIMEOUT_SECONDS: float = 30.0
+    TTS_MAX_CONNECTIONS: int = 20
+    TTS_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    TTS_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    TTS_HTTP2: bool = True  # used when the h2 package is installed
+
+    # Content-addressed TTS audio cache (disk LRU, access index in Redis)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: str = "cache/tts"
+    TTS_CACHE_MAX_BYTES: int = 536870912
+
+    # Compact TTS variants (Opus / low-bitrate MP3) transcoded with ffmpeg
+    TTS_VARIANTS_ENABLED: bool = True
+    FFMPEG_PATH: str = "ffmpeg"
+    TTS_TRANSCODE_WORKERS: int = 2
+    TTS_TRANSCODE_TIMEOUT_SECONDS: float = 20.0
+    TTS_OPUS_BITRATE: str = "24k"
+    TTS_LOW_MP3_BITRATE: str = "32k"
+
+    # Long TTS texts are voiced sentence by sentence, in parallel
+    TTS_CHUNK_MIN_CHARS: int = 160
+    TTS_CHUNK_CONCURRENCY: int = 3
+
+    # Splice prerendered catchphrase clips instead of re-voicing them
+    TTS_PHRASE_LIBRARY_ENABLED: bool = True
+
+    # Prerendered scenario clips (python -m app.prerender_scenarios)
+    TTS_SCENARIO_DIR: str = "static/tts/scenarios"
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001,http://localhost:3002,http://localhost:19006,http://localhost:8081"
@@ -0,0 +1,24 @@
+"""
+Domain entity: HintBankEntry
+One pregenerated hint variant for a (chapter, learning difficulty, hint level).
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from app.domain.entities.enums import LearningDifficulty
+
+
+@dataclass
+class HintBankEntry:
+    """A pregenerated chapter hint served without an LLM call."""
+
+    id: UUID = field(default_factory=uuid4)
+    chapter_id: UUID = field(default_factory=uuid4)
+    learning_difficulty: LearningDifficulty = LearningDifficulty.DYSLEXIA
+    hint_level: int = 1
+    variant: int = 0
+    hint: str = ""
+    fingerprint: str = ""  # chapter content the hint was generated from
+    created_at: datetime = field(default_factory=datetime.utcnow)
@@ -0,0 +1,29 @@
+"""
+Domain entity: PracticeProblem
+A reusable practice problem in the shared problem bank.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List
+from uuid import UUID, uuid4
+
+from app.domain.entities.enums import LearningDifficulty
+
+
+@dataclass
+class PracticeProblem:
+    """A practice problem indexed by difficulty type, skill, age band and difficulty."""
+
+    id: UUID = field(default_factory=uuid4)
+    learning_difficulty: LearningDifficulty = LearningDifficulty.DYSLEXIA
+    skill: str = ""
+    age_band: str = ""  # e.g. "7-8"
+    difficulty: str = "easy"  # easy, medium, hard
+    question: str = ""
+    question_key: str = ""  # hash of the normalized question, for dedup
+    correct_answer: str = ""
+    options: List[str] = field(default_factory=list)
+    hint: str = ""
+    skill_focus: str = ""
+    created_at: datetime = field(default_factory=datetime.utcnow)
@@ -18,6 +18,11 @@ class AIConversationRepository(ABC):
         """Create a new conversation record."""
         ...
 
+    @abstractmethod
+    async def create_many(self, conversations: List[AIConversation]) -> None:
+        """Insert many conversation records in a single statement."""
+        ...
+
     @abstractmethod
     async def get_by_id(self, conversation_id: UUID) -> Optional[AIConversation]:
         """Get a conversation by ID."""
@@ -32,7 +37,7 @@ class AIConversationRepository(ABC):
 
     @abstractmethod
     async def get_recent_context(
-        self, user_id: UUID, limit: int = 10
+        self, user_id: UUID, limit: int = 10, role_context: Optional[str] = None
     ) -> List[AIConversation]:
-        """Get recent conversation context for AI continuity."""
+        """Get recent conversation context for AI continuity, optionally for one role."""
         ...
@@ -0,0 +1,44 @@
+"""
+Repository interface: HintBankRepository
+Abstract base class for pregenerated hint access.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from app.domain.entities.enums import LearningDifficulty
+from app.domain.entities.hint_bank import HintBankEntry
+
+
+class HintBankRepository(ABC):
+    """Abstract repository for HintBankEntry operations."""
+
+    @abstractmethod
+    async def list_variants(
+        self,
+        chapter_id: UUID,
+        learning_difficulty: LearningDifficulty,
+        hint_level: int,
+    ) -> List[HintBankEntry]:
+        """List the hint variants of one bucket, ordered by variant."""
+        ...
+
+    @abstractmethod
+    async def fingerprints(
+        self, chapter_id: UUID
+    ) -> Dict[Tuple[LearningDifficulty, int], str]:
+        """Fingerprint of every generated bucket of a chapter."""
+        ...
+
+    @abstractmethod
+    async def replace_variants(
+        self,
+        chapter_id: UUID,
+        learning_difficulty: LearningDifficulty,
+        hint_level: int,
+        hints: List[str],
+        fingerprint: str,
+    ) -> None:
+        """Replace all variants of one bucket."""
+        ...
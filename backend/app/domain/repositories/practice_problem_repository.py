@@ -0,0 +1,40 @@
+"""
+Repository interface: PracticeProblemRepository
+Abstract base class for the shared practice-problem bank.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Collection, List
+from uuid import UUID
+
+from app.domain.entities.enums import LearningDifficulty
+from app.domain.entities.practice_problem import PracticeProblem
+
+
+class PracticeProblemRepository(ABC):
+    """Abstract repository for PracticeProblem operations."""
+
+    @abstractmethod
+    async def sample(
+        self,
+        learning_difficulty: LearningDifficulty,
+        skill: str,
+        age_band: str,
+        difficulties: Collection[str],
+        exclude_ids: Collection[UUID],
+        limit: int,
+    ) -> List[PracticeProblem]:
+        """Random problems from a bucket, skipping the excluded IDs."""
+        ...
+
+    @abstractmethod
+    async def count(
+        self, learning_difficulty: LearningDifficulty, skill: str, age_band: str
+    ) -> int:
+        """Number of problems in a bucket (all difficulties)."""
+        ...
+
+    @abstractmethod
+    async def add_many(self, problems: List[PracticeProblem]) -> List[PracticeProblem]:
+        """Insert problems, skipping duplicate questions. Returns the ones stored."""
+        ...
@@ -0,0 +1,496 @@
+"""
+Fake OpenAI-compatible chat completions server for offline benchmarking.
+Answers /v1/chat/completions (plain and streamed) with canned bodies shaped
+for every registered prompt, after a configurable time-to-first-token
+distribution and token rate, and can inject 429/5xx errors and hangs.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1 (any
+OPENAI_API_KEY works). Run with:
+    python -m app.fake_openai_server [--port 8900] [--latency lognormal:400,0.35]
+        [--tps 60] [--errors 429=0.02,500=0.01,timeout=0.005] [--seed 1]
+In-process, use create_app() with httpx.ASGITransport or FakeOpenAIServer,
+which serves on a background thread and exposes `base_url`.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Importing the prompt modules registers their templates
+import app.infrastructure.ai.activity_prompts  # noqa: F401
+import app.infrastructure.ai.dysgraphia_prompts  # noqa: F401
+import app.infrastructure.ai.prompts  # noqa: F401
+from app.infrastructure.ai.prompt_registry import prompt_registry
+from app.infrastructure.ai.tokens import count_tokens
+
+# Characters per streamed chunk; roughly one token of Turkish text
+_CHUNK_CHARS = 3
+ERROR_KINDS = ("429", "500", "503", "timeout")
+
+
+# ─── Latency ────────────────────────────────────────────────
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Time-to-first-token sampler in seconds from a spec in milliseconds:
+    fixed:MS, uniform:LO,HI, normal:MEAN,STD or lognormal:MEDIAN,SIGMA.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(max(values[0], 1e-3))
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+def parse_errors(spec: str) -> Dict[str, float]:
+    """'429=0.02,timeout=0.01' → {'429': 0.02, 'timeout': 0.01}."""
+    errors = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, _, rate = part.partition("=")
+        if kind not in ERROR_KINDS:
+            raise ValueError(f"Unknown error kind {kind!r}; use one of {ERROR_KINDS}")
+        errors[kind] = float(rate)
+    return errors
+
+
+@dataclass
+class FakeOpenAIConfig:
+    """Behaviour of the fake server."""
+
+    latency: str = "lognormal:400,0.35"  # time to first token, ms
+    tokens_per_second: float = 60.0  # completion pacing; 0 = instant
+    errors: Dict[str, float] = field(default_factory=dict)  # kind → probability
+    hang_seconds: float = 120.0  # how long a "timeout" error stalls
+    model_latency: Dict[str, str] = field(default_factory=dict)  # per-model override
+    seed: Optional[int] = None
+
+
+# ─── Canned bodies ──────────────────────────────────────────
+
+def _int_after(pattern: str, text: str, default: int) -> int:
+    match = re.search(pattern, text)
+    return int(match.group(1)) if match else default
+
+
+def _activity_hint(system: str, user: str, rng: random.Random) -> Any:
+    level = _int_after(r"İPUCU SEVİYESİ: (\d)", system, 1)
+    return {
+        "hint": rng.choice([
+            "Parmaklarınla tek tek saymayı dene.",
+            "Önce onlukları, sonra birlikleri topla.",
+            "Sayı doğrusunda ileri doğru atla.",
+        ]),
+        "hint_level": level,
+        "should_show_answer": False,
+        "visual_aid": rng.choice(["fingers", "number_line", "blocks"]),
+        "encouragement": "Neredeyse oldu, harika çaba! 💪",
+    }
+
+
+def _practice(system: str, user: str, rng: random.Random) -> Any:
+    count = _int_after(r"OLUŞTUR: (\d+) adet", system, _int_after(r"(\d+) pratik", user, 5))
+    problems = []
+    for i in range(count):
+        a, b = rng.randint(1, 99), rng.randint(1, 99)
+        problems.append({
+            "id": i + 1,
+            "question": f"{a} + {b} = ?",
+            "correct_answer": str(a + b),
+            "options": [str(a + b + d) for d in (0, 1, -1, 10)],
+            "hint": "Önce birlikleri topla.",
+            "difficulty": ("easy", "medium", "hard")[min(2, i * 3 // max(1, count))],
+            "skill_focus": "toplama",
+        })
+    return problems
+
+
+def _hint_text(system: str, user: str, rng: random.Random) -> Any:
+    if "JSON dizi" in user:  # hint bank generation
+        count = _int_after(r"farklı (\d+) ipucu", user, 5)
+        return [f"İpucu {i + 1}: adım adım düşün." for i in range(count)]
+    return "Soruyu yavaşça tekrar oku ve ilk adımı düşün. Yapabilirsin! 🌟"
+
+
+CANNED: Dict[str, Callable[[str, str, random.Random], Any]] = {
+    "activity_hint": _activity_hint,
+    "evaluate_work": lambda s, u, rng: {
+        "score": rng.randint(2, 4),
+        "feedback": "Harfleri çok düzgün yazmışsın, çizgiye dikkat etmeye devam et.",
+        "strengths": ["Harf şekli", "Sabır"],
+        "improvements": ["Harf boyutunu eşit tut"],
+        "error_analysis": {"error_type": "none", "pattern": "", "severity": "low"},
+    },
+    "adaptive_difficulty": lambda s, u, rng: {
+        "reason": "Son aktivitelerde puanlar istikrarlı, seviye uygun.",
+        "specific_adjustments": ["Aynı seviyede yeni problem tipleri dene"],
+    },
+    "session_analysis": lambda s, u, rng: {
+        "dominant_error": "place_value",
+        "error_frequency": rng.randint(0, 4),
+        "severity": rng.choice(["low", "medium"]),
+        "intervention_needed": False,
+        "intervention_type": None,
+        "teacher_note": "Basamak değerinde ara sıra karışıklık var.",
+        "parent_note": "Çocuğunuz bugün çok çalıştı!",
+        "positive_observations": ["Görevlere odaklandı", "İpuçlarını iyi kullandı"],
+        "session_summary": "Oturum başarılı geçti, basamak değeri tekrar edilebilir.",
+    },
+    "next_steps": lambda s, u, rng: {
+        "next_action": rng.choice(["continue", "review", "advance"]),
+        "reason": "Performans mevcut seviyeye uygun.",
+        "next_chapter_id": None,
+        "review_activities": ["place_value_blocks"],
+        "intervention_module": None,
+        "encouragement": "Harikasın, böyle devam! 🌟",
+    },
+    "personalized_practice": _practice,
+    "handwriting_assessment": lambda s, u, rng: {
+        "shape_accuracy": 3, "size_consistency": 3, "baseline_alignment": 2,
+        "vertical_alignment": 3, "overall_legibility": 3, "total_score": 14,
+        "strength": "Harfin şekli tanınıyor.",
+        "improvement": "Harfi çizgiye oturt.",
+        "encouragement": "Her gün daha güzel yazıyorsun! ✍️",
+    },
+    "sentence_check": lambda s, u, rng: {
+        "praise": "Cümlende güzel bir fikir var!",
+        "errors": [{
+            "type": "capitalization", "issue": "Cümle küçük harfle başlamış",
+            "position": "ilk kelime", "correction": "Büyük harfle başla",
+        }],
+        "corrected_sentence": "Kedi uyuyor.",
+        "tip": "Cümleye büyük harfle başla, noktayla bitir.",
+    },
+    "spelling_help": lambda s, u, rng: {
+        "syllables": "ar-ka-daş",
+        "sounds": "/a/ /r/ /k/ /a/ /d/ /a/ /ş/",
+        "strategy": "Hece Bölme",
+        "hint": "Kelimeyi hecelere ayırıp her heceyi ayrı yaz.",
+        "rule": "",
+        "similar_words": ["arka", "daş"],
+        "encouragement": "Harika gidiyorsun! 🌟",
+    },
+    "story_ideas": lambda s, u, rng: [
+        {"title": f"Macera {i + 1}", "character": "Meraklı bir sincap",
+         "setting": "Orman", "problem": "Fındıklar kayboldu",
+         "hint": "Bir sabah sincap uyandığında..."}
+        for i in range(3)
+    ],
+    "composition_feedback": lambda s, u, rng: {
+        "scores": {"ideas": 3, "organization": 3, "sentence_structure": 2, "mechanics": 2, "total": 10},
+        "praise": "Hikayen çok ilgi çekici başlıyor!",
+        "strengths": ["Yaratıcı fikirler", "Net başlangıç"],
+        "improvements": [{"area": "Detay", "suggestion": "Karakteri biraz daha anlat"}],
+        "next_step": "Hikayene bir sonuç cümlesi ekle",
+        "encouragement": "Yazdıkça gelişiyorsun! ✍️",
+        "word_count": 0,
+    },
+    "analysis": lambda s, u, rng: {
+        "analysis": "Öğrenci düzenli çalışıyor ve puanları yükseliyor.",
+        "strengths": ["Düzenli katılım", "Azim", "Görsel destekleri kullanma"],
+        "areas_for_improvement": ["Okuma hızı", "Dikkat süresi"],
+        "recommendations": ["Kısa oturumlar", "Sesli okuma", "Görsel ipuçları"],
+        "encouragement_message": "Her gün biraz daha ileri! 🌟",
+    },
+    "hint": _hint_text,
+    "writing_coach": lambda s, u, rng: "Önce ana karakterini düşün. Kim o, ne istiyor? ✍️",
+    "context_summary": lambda s, u, rng: "Öğrenci toplama ve basamak değeri üzerinde çalışıyor.",
+    "system": lambda s, u, rng: "Merhaba! Bu konuda sana yardım edebilirim. Birlikte adım adım bakalım. 🌟",
+}
+
+
+def _prompt_matchers() -> List[Tuple[str, str]]:
+    """(static prefix, canned key) pairs, longest prefix first."""
+    matchers = []
+    for name in prompt_registry.names():
+        key = name.split(":", 1)[0]
+        if key in CANNED:
+            matchers.append((prompt_registry.get(name).static, key))
+    return sorted(matchers, key=lambda m: len(m[0]), reverse=True)
+
+
+def _example_from_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """A minimal instance of a JSON schema, for prompts without a canned body."""
+    if "$ref" in schema:
+        return _example_from_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "default" in schema:
+        return schema["default"]
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return _example_from_schema(options[0], defs) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: _example_from_schema(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [_example_from_schema(schema.get("items", {}), defs)]
+    if kind == "integer":
+        return int(schema.get("minimum", 1))
+    if kind == "number":
+        return float(schema.get("minimum", 0.5))
+    if kind == "boolean":
+        return False
+    return "örnek"
+
+
+def _shape_for_format(body: Any, response_format: Optional[Dict[str, Any]]) -> Any:
+    """Wrap bare arrays the way a schema-following model would."""
+    schema = ((response_format or {}).get("json_schema") or {}).get("schema")
+    if not isinstance(body, list) or not schema:
+        return body
+    arrays = [
+        name for name, prop in schema.get("properties", {}).items()
+        if prop.get("type") == "array"
+    ]
+    return {arrays[0]: body} if len(arrays) == 1 else body
+
+
+# ─── Server ─────────────────────────────────────────────────
+
+class _FakeOpenAI:
+    def __init__(self, config: FakeOpenAIConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.matchers = _prompt_matchers()
+        self.default_latency = parse_latency(config.latency)
+        self.model_latency = {m: parse_latency(s) for m, s in config.model_latency.items()}
+        self.stats: Dict[str, Any] = {
+            "requests": 0, "streamed": 0, "completion_tokens": 0,
+            "errors": {kind: 0 for kind in ERROR_KINDS}, "prompts": {},
+        }
+
+    def reply_for(self, body: Dict[str, Any]) -> Tuple[str, str]:
+        """(prompt key, completion text) for a request body."""
+        messages = body.get("messages") or []
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        response_format = body.get("response_format")
+
+        key = next((k for static, k in self.matchers if system.startswith(static)), "unknown")
+        if key in CANNED:
+            reply = _shape_for_format(CANNED[key](system, user, self.rng), response_format)
+        elif response_format and response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            reply = _example_from_schema(schema, schema.get("$defs", {}))
+        else:
+            reply = CANNED["system"](system, user, self.rng)
+        text = reply if isinstance(reply, str) else json.dumps(reply, ensure_ascii=False)
+        return key, text
+
+    def pick_error(self) -> Optional[str]:
+        roll = self.rng.random()
+        for kind, rate in self.config.errors.items():
+            if roll < rate:
+                return kind
+            roll -= rate
+        return None
+
+    def first_token_delay(self, model: str) -> float:
+        return self.model_latency.get(model, self.default_latency)(self.rng)
+
+    def token_delay(self) -> float:
+        tps = self.config.tokens_per_second
+        return 1 / tps if tps > 0 else 0.0
+
+
+def _error_response(kind: str) -> JSONResponse:
+    status = 504 if kind == "timeout" else int(kind)
+    error_type = "rate_limit_exceeded" if kind == "429" else "server_error"
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": f"Injected {kind} error", "type": error_type, "code": error_type}},
+        headers={"retry-after-ms": "100"} if kind == "429" else None,
+    )
+
+
+def create_app(config: Optional[FakeOpenAIConfig] = None) -> FastAPI:
+    """ASGI app implementing the subset of the OpenAI API the gateway uses."""
+    fake = _FakeOpenAI(config or FakeOpenAIConfig())
+    app = FastAPI(title="Fake OpenAI", docs_url=None, redoc_url=None)
+    app.state.fake = fake
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return fake.stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-4o")
+        fake.stats["requests"] += 1
+
+        error = fake.pick_error()
+        if error is not None:
+            fake.stats["errors"][error] += 1
+            if error == "timeout":
+                await asyncio.sleep(fake.config.hang_seconds)
+            elif error != "429":
+                await asyncio.sleep(fake.first_token_delay(model))
+            return _error_response(error)
+
+        key, text = fake.reply_for(body)
+        fake.stats["prompts"][key] = fake.stats["prompts"].get(key, 0) + 1
+        prompt_tokens = sum(count_tokens(m.get("content") or "", model) for m in body.get("messages", []))
+        completion_tokens = count_tokens(text, model)
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        finish_reason = "stop"
+        if max_tokens and completion_tokens > max_tokens:
+            text = text[: int(len(text) * max_tokens / completion_tokens)]
+            completion_tokens, finish_reason = max_tokens, "length"
+        fake.stats["completion_tokens"] += completion_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(
+                fake.first_token_delay(model) + completion_tokens * fake.token_delay()
+            )
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": finish_reason,
+                    "logprobs": None,
+                }],
+                "usage": usage,
+            }
+
+        fake.stats["streamed"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events():
+            await asyncio.sleep(fake.first_token_delay(model))
+            yield chunk({"role": "assistant", "content": ""})
+            for start in range(0, len(text), _CHUNK_CHARS):
+                yield chunk({"content": text[start:start + _CHUNK_CHARS]})
+                await asyncio.sleep(fake.token_delay())
+            yield chunk({}, finish_reason)
+            if include_usage:
+                payload = {
+                    "id": completion_id, "object": "chat.completion.chunk",
+                    "created": created, "model": model, "choices": [], "usage": usage,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class FakeOpenAIServer:
+    """Serves the fake API on a background thread (in-process benchmarks)."""
+
+    def __init__(
+        self,
+        config: Optional[FakeOpenAIConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.app = create_app(config)
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host=host, port=port, log_level="warning")
+        )
+        self._thread: Optional[threading.Thread] = None
+        self.host = host
+        self.port = port
+
+    @property
+    def base_url(self) -> str:
+        """Value for OPENAI_BASE_URL."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Fake OpenAI server failed to start")
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default=FakeOpenAIConfig.latency,
+                        help="fixed:MS | uniform:LO,HI | normal:MEAN,STD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tps", type=float, default=FakeOpenAIConfig.tokens_per_second,
+                        help="completion tokens per second (0 = instant)")
+    parser.add_argument("--errors", default="", help="e.g. 429=0.02,500=0.01,timeout=0.005")
+    parser.add_argument("--hang-seconds", type=float, default=FakeOpenAIConfig.hang_seconds)
+    parser.add_argument("--model-latency", action="append", default=[],
+                        help="per-model latency, e.g. gpt-4o-mini=fixed:150 (repeatable)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(
+        latency=args.latency,
+        tokens_per_second=args.tps,
+        errors=parse_errors(args.errors),
+        hang_seconds=args.hang_seconds,
+        model_latency=dict(item.split("=", 1) for item in args.model_latency),
+        seed=args.seed,
+    )
+    print(f"Fake OpenAI listening on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Batch job: pregenerate hint variants for every active chapter,
+learning difficulty and hint level into the hint_bank table.
+Buckets whose fingerprint still matches are skipped.
+Run with: python -m app.generate_hint_bank [--force] [--variants N]
+"""
+
+import argparse
+import asyncio
+
+from loguru import logger
+
+from app.infrastructure.ai.hint_bank import HintBankGenerator
+from app.infrastructure.ai.llm_gateway import llm_gateway
+from app.infrastructure.cache.redis_cache import redis_cache
+from app.infrastructure.database.chapter_repository_impl import (
+    SQLAlchemyChapterRepository,
+)
+from app.infrastructure.database.session import async_session_factory
+
+
+async def generate_hint_bank(force: bool = False, variants: int = 0) -> None:
+    """Fill missing or stale hint buckets for all active chapters."""
+    await redis_cache.connect()
+    await llm_gateway.connect()
+    generator = HintBankGenerator(
+        llm_gateway, redis_cache, async_session_factory, variants=variants or None
+    )
+
+    try:
+        async with async_session_factory() as session:
+            chapters = await SQLAlchemyChapterRepository(session).list_all(limit=1000)
+
+        logger.info(f"🧠 Generating hint bank for {len(chapters)} chapters...")
+        written = await asyncio.gather(*(
+            generator.generate_chapter(
+                chapter.id, chapter.title, chapter.activity_type.value, force=force
+            )
+            for chapter in chapters
+        ))
+        logger.info(f"✅ Hint bank ready: {sum(written)} buckets written")
+    finally:
+        await llm_gateway.disconnect()
+        await redis_cache.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="regenerate every bucket")
+    parser.add_argument("--variants", type=int, default=0, help="variants per bucket")
+    args = parser.parse_args()
+    asyncio.run(generate_hint_bank(force=args.force, variants=args.variants))
@@ -7,16 +7,26 @@ Katman 2: Oturum sonu analiz, sonraki adım önerisi
 """
 
 import json
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Type, Union
 from uuid import UUID
 
-import openai
 from loguru import logger
-
+from pydantic import BaseModel
+
+from app.application.dtos.ai_activity_dtos import (
+    ActivityHintResponse,
+    AdaptiveDifficultyResponse,
+    EvaluateWorkResponse,
+    NextStepsResponse,
+    PersonalizedPracticeResponse,
+    SessionAnalysisResponse,
+)
 from app.config import settings
 from app.domain.entities.ai_conversation import AIConversation
 from app.domain.entities.enums import LearningDifficulty
 from app.domain.repositories.ai_conversation_repository import AIConversationRepository
+from app.domain.repositories.practice_problem_repository import PracticeProblemRepository
 from app.domain.repositories.progress_repository import ProgressRepository
 from app.domain.repositories.student_profile_repository import StudentProfileRepository
 from app.infrastructure.ai.activity_prompts import (
@@ -27,9 +37,26 @@ from app.infrastructure.ai.activity_prompts import (
     SESSION_ANALYSIS_PROMPT,
     get_activity_hint_prompt,
 )
+from app.infrastructure.ai.difficulty_engine import decide
+from app.infrastructure.ai.errors import LLM_ERRORS
+from app.infrastructure.ai.hint_prefetch import HintPrefetcher, prefetch_key
+from app.infrastructure.ai.json_stream import FieldDelta, JSONFieldStream
+from app.infrastructure.ai.practice_bank import (
+    PracticeBank,
+    PracticeBucket,
+    age_band,
+    practice_bank_generator,
+)
+from app.infrastructure.ai.llm_gateway import LLMGateway
+from app.infrastructure.ai.structured_output import parse_structured, response_format_for
+from app.infrastructure.ai.token_budget import UsageScope
 from app.infrastructure.cache.redis_cache import RedisCache
 
 
+# İpucu akışında istemciye üretildikçe gönderilen alanlar
+STREAMED_HINT_FIELDS = ("hint", "encouragement")
+
+
 class ActivityAIService:
     """3 katmanlı AI servisi: aktivite-içi destek, oturum analizi, kişiselleştirme."""
 
@@ -39,53 +66,56 @@ class ActivityAIService:
         profile_repo: StudentProfileRepository,
         progress_repo: ProgressRepository,
         cache: RedisCache,
+        llm: LLMGateway,
+        hint_prefetcher: Optional[HintPrefetcher] = None,
+        practice_repo: Optional[PracticeProblemRepository] = None,
     ):
         self._conversation_repo = conversation_repo
         self._profile_repo = profile_repo
         self._progress_repo = progress_repo
         self._cache = cache
-        self._client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self._llm = llm
+        self._hint_prefetcher = hint_prefetcher
+        self._practice_bank = (
+            PracticeBank(practice_repo, cache, practice_bank_generator)
+            if practice_repo is not None and settings.PRACTICE_BANK_ENABLED
+            else None
+        )
 
     # ─── Yardımcılar ────────────────────────────────────────
 
-    def _parse_json(self, text: str) -> Any:
-        """AI yanıtından JSON çıkar."""
-        try:
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start >= 0 and end > start:
-                return json.loads(text[start:end])
-        except json.JSONDecodeError:
-            pass
-        try:
-            start = text.find("[")
-            end = text.rfind("]") + 1
-            if start >= 0 and end > start:
-                return json.loads(text[start:end])
-        except json.JSONDecodeError:
-            pass
-        return {"raw_response": text}
-
     async def _call_openai(
         self,
+        endpoint: str,
         system_prompt: str,
         user_message: str,
         max_tokens: int = 512,
+        scope: Optional[UsageScope] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
     ) -> tuple[str, int]:
-        """OpenAI API çağrısı yap, (yanıt_metni, token_sayısı) döndür."""
+        """
+        OpenAI API çağrısı yap, (yanıt_metni, token_sayısı) döndür.
+        `schema` verilirse yanıt bu DTO'nun JSON şemasında istenir ve yalnızca
+        şemaya (`defaults` ile) uyan yanıtlar önbelleğe alınır.
+        """
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=max_tokens,
-                messages=[
+            completion = await self._llm.complete(
+                endpoint,
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_message},
                 ],
+                max_tokens=max_tokens,
+                scope=scope,
+                response_format=response_format_for(schema) if schema else None,
+                validate=(
+                    partial(parse_structured, dto=schema, defaults=defaults)
+                    if schema else None
+                ),
             )
-            text = response.choices[0].message.content or ""
-            tokens = response.usage.total_tokens if response.usage else 0
-            return text, tokens
-        except openai.APIError as e:
+            return completion.text, completion.tokens
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API hatası: {e}")
             raise
 
@@ -136,67 +166,250 @@ class ActivityAIService:
         Returns:
             {hint, hint_level, should_show_answer, visual_aid, encouragement}
         """
-        # Öğrenci profilini al
         profile = await self._profile_repo.get_by_user_id(student_id)
-        difficulty = context.get(
+        difficulty = self._hint_difficulty(profile, context)
+        attempt_number = student_attempt.get("attempt_number", 1)
+        hint_level = min(attempt_number, 3)
+        scope = UsageScope.of(student_id, profile)
+
+        try:
+            # Önceden üretilmiş (spekülatif) ipucu varsa LLM'i bekleme
+            prefetched = await self._take_prefetched_hint(
+                student_id, chapter_id, problem, hint_level
+            )
+            if prefetched is not None:
+                text, tokens = prefetched["text"], prefetched["tokens"]
+            else:
+                text, tokens = await self._generate_activity_hint(
+                    difficulty, activity_type, problem,
+                    student_attempt.get("answer", ""), attempt_number, hint_level,
+                    context, scope,
+                )
+            result = await self._finish_activity_hint(
+                student_id, chapter_id, difficulty, activity_type, problem,
+                student_attempt, hint_level, context, scope, text, tokens,
+            )
+            logger.info(
+                f"Activity hint: student={student_id}, type={activity_type}, "
+                f"level={hint_level}, tokens={tokens}, prefetched={prefetched is not None}"
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Activity hint error: {e}")
+            return self._activity_hint_fallback(hint_level)
+
+    async def provide_activity_hint_stream(
+        self,
+        student_id: UUID,
+        chapter_id: str,
+        activity_type: str,
+        problem: dict,
+        student_attempt: dict,
+        context: dict,
+    ) -> AsyncIterator[Union[FieldDelta, Dict[str, Any]]]:
+        """
+        provide_activity_hint() akış sürümü.
+        `hint` ve `encouragement` metinleri üretildikçe FieldDelta olarak
+        döner; en son öğe şemaya göre doğrulanmış tam yanıttır (hata
+        durumunda yedek yanıt). İstemci her zaman son yanıtı esas almalıdır.
+        """
+        profile = await self._profile_repo.get_by_user_id(student_id)
+        difficulty = self._hint_difficulty(profile, context)
+        attempt_number = student_attempt.get("attempt_number", 1)
+        hint_level = min(attempt_number, 3)
+        scope = UsageScope.of(student_id, profile)
+        fields = JSONFieldStream(STREAMED_HINT_FIELDS)
+
+        try:
+            prefetched = await self._take_prefetched_hint(
+                student_id, chapter_id, problem, hint_level
+            )
+            if prefetched is not None:
+                text, tokens = prefetched["text"], prefetched["tokens"]
+                for delta in fields.feed(text):
+                    yield delta
+            else:
+                stream = self._llm.stream(
+                    "activity_hint",
+                    [
+                        {
+                            "role": "system",
+                            "content": self._activity_hint_prompt(
+                                difficulty, activity_type, problem,
+                                student_attempt.get("answer", ""), attempt_number,
+                                hint_level, context,
+                            ),
+                        },
+                        {"role": "user", "content": f"İpucu ver: Deneme #{attempt_number}"},
+                    ],
+                    max_tokens=256,
+                    scope=scope,
+                    response_format=response_format_for(ActivityHintResponse),
+                    validate=partial(
+                        parse_structured,
+                        dto=ActivityHintResponse,
+                        defaults=self._hint_defaults(hint_level),
+                    ),
+                )
+                async for chunk in stream:
+                    for delta in fields.feed(chunk):
+                        yield delta
+                text, tokens = stream.result.text, stream.result.tokens
+
+            result = await self._finish_activity_hint(
+                student_id, chapter_id, difficulty, activity_type, problem,
+                student_attempt, hint_level, context, scope, text, tokens,
+            )
+        except Exception as e:
+            logger.error(f"Activity hint stream error: {e}")
+            result = self._activity_hint_fallback(hint_level)
+        yield result
+
+    @staticmethod
+    def _hint_difficulty(profile: Any, context: dict) -> str:
+        return context.get(
             "learning_difficulty",
             profile.learning_difficulty.value if profile else "dyslexia",
         )
 
-        hint_level = min(student_attempt.get("attempt_number", 1), 3)
-        prompt_template = get_activity_hint_prompt(difficulty)
+    async def _take_prefetched_hint(
+        self, student_id: UUID, chapter_id: str, problem: dict, hint_level: int
+    ) -> Optional[Dict[str, Any]]:
+        if self._hint_prefetcher is None or hint_level <= 1:
+            return None
+        return await self._hint_prefetcher.take(
+            prefetch_key(student_id, chapter_id, problem, hint_level)
+        )
 
-        prompt = prompt_template.format(
+    async def _finish_activity_hint(
+        self,
+        student_id: UUID,
+        chapter_id: str,
+        difficulty: str,
+        activity_type: str,
+        problem: dict,
+        student_attempt: dict,
+        hint_level: int,
+        context: dict,
+        scope: UsageScope,
+        text: str,
+        tokens: int,
+    ) -> Dict[str, Any]:
+        """Üst seviyeleri önceden üret, konuşmayı kaydet, yanıtı doğrula."""
+        self._prefetch_higher_hints(
+            student_id, chapter_id, difficulty, activity_type, problem,
+            student_attempt.get("answer", ""), hint_level, context, scope,
+        )
+        await self._save_conversation(
+            student_id,
+            f"[Aktivite İpucu] {activity_type} — {problem.get('question', '')}",
+            text,
+            {"type": "activity_hint", "chapter_id": chapter_id, "hint_level": hint_level},
+            tokens,
+        )
+        return parse_structured(text, ActivityHintResponse, self._hint_defaults(hint_level))
+
+    @staticmethod
+    def _hint_defaults(hint_level: int) -> Dict[str, Any]:
+        return {
+            "hint_level": hint_level,
+            "should_show_answer": hint_level >= 3,
+            "visual_aid": "none",
+            "encouragement": "Harika gidiyorsun! 💪",
+        }
+
+    @staticmethod
+    def _activity_hint_fallback(hint_level: int) -> Dict[str, Any]:
+        return {
+            "hint": "Yavaşça düşün ve tekrar dene! Yapabilirsin! 💪",
+            "hint_level": hint_level,
+            "should_show_answer": False,
+            "visual_aid": "none",
+            "encouragement": "Her deneme seni güçlendirir! 🌟",
+        }
+
+    @staticmethod
+    def _activity_hint_prompt(
+        difficulty: str,
+        activity_type: str,
+        problem: dict,
+        student_answer: Any,
+        attempt_number: int,
+        hint_level: int,
+        context: dict,
+    ) -> str:
+        return get_activity_hint_prompt(difficulty).render(
             chapter_title=context.get("chapter_title", "Bilinmeyen Bölüm"),
             activity_type=activity_type,
             problem_description=problem.get("question", str(problem)),
-            student_answer=student_attempt.get("answer", ""),
+            student_answer=student_answer,
             correct_answer=problem.get("correct_answer", ""),
-            attempt_number=student_attempt.get("attempt_number", 1),
+            attempt_number=attempt_number,
             error_type=context.get("error_type", "belirtilmedi"),
             hint_level=hint_level,
         )
 
-        try:
-            text, tokens = await self._call_openai(
-                prompt,
-                f"İpucu ver: Deneme #{student_attempt.get('attempt_number', 1)}",
-                max_tokens=256,
-            )
-            result = self._parse_json(text)
-
-            # Konuşmayı kaydet
-            await self._save_conversation(
-                student_id,
-                f"[Aktivite İpucu] {activity_type} — {problem.get('question', '')}",
-                text,
-                {"type": "activity_hint", "chapter_id": chapter_id, "hint_level": hint_level},
-                tokens,
-            )
+    async def _generate_activity_hint(
+        self,
+        difficulty: str,
+        activity_type: str,
+        problem: dict,
+        student_answer: Any,
+        attempt_number: int,
+        hint_level: int,
+        context: dict,
+        scope: UsageScope,
+        endpoint: str = "activity_hint",
+    ) -> tuple[str, int]:
+        """
+        Belirli bir seviye için ipucu üret, (yanıt_metni, token_sayısı) döndür.
+        Önceden üretim `activity_hint_prefetch` (arka plan kuyruğu) kullanır.
+        """
+        return await self._call_openai(
+            endpoint,
+            self._activity_hint_prompt(
+                difficulty, activity_type, problem, student_answer,
+                attempt_number, hint_level, context,
+            ),
+            f"İpucu ver: Deneme #{attempt_number}",
+            max_tokens=256,
+            scope=scope,
+            schema=ActivityHintResponse,
+            defaults=self._hint_defaults(hint_level),
+        )
 
-            logger.info(
-                f"Activity hint: student={student_id}, type={activity_type}, "
-                f"level={hint_level}, tokens={tokens}"
+    def _prefetch_higher_hints(
+        self,
+        student_id: UUID,
+        chapter_id: str,
+        difficulty: str,
+        activity_type: str,
+        problem: dict,
+        student_answer: Any,
+        hint_level: int,
+        context: dict,
+        scope: UsageScope,
+    ) -> None:
+        """
+        Çocuk ilk ipucunu okurken üst seviyeleri arka planda üret.
+        Aynı soru ve cevap bağlamı kullanılır; sonraki deneme önbellekten döner.
+        """
+        if self._hint_prefetcher is None or not settings.ACTIVITY_HINT_PREFETCH_ENABLED:
+            return
+
+        for level in range(hint_level + 1, 4):
+            async def generate(level: int = level) -> Dict[str, Any]:
+                text, tokens = await self._generate_activity_hint(
+                    difficulty, activity_type, problem, student_answer,
+                    level, level, context, scope, endpoint="activity_hint_prefetch",
+                )
+                return {"text": text, "tokens": tokens}
+
+            self._hint_prefetcher.schedule(
+                prefetch_key(student_id, chapter_id, problem, level), generate
             )
 
-            # Fallback alanları ekle
-            result.setdefault("hint", text[:100])
-            result.setdefault("hint_level", hint_level)
-            result.setdefault("should_show_answer", hint_level >= 3)
-            result.setdefault("visual_aid", "none")
-            result.setdefault("encouragement", "Harika gidiyorsun! 💪")
-            return result
-
-        except Exception as e:
-            logger.error(f"Activity hint error: {e}")
-            return {
-                "hint": "Yavaşça düşün ve tekrar dene! Yapabilirsin! 💪",
-                "hint_level": hint_level,
-                "should_show_answer": False,
-                "visual_aid": "none",
-                "encouragement": "Her deneme seni güçlendirir! 🌟",
-            }
-
     async def evaluate_student_work(
         self,
         student_id: UUID,
@@ -221,7 +434,7 @@ class ActivityAIService:
         age = profile.age if profile else 8
         level = profile.current_level if profile else 1
 
-        prompt = EVALUATE_WORK_PROMPT.format(
+        prompt = EVALUATE_WORK_PROMPT.render(
             learning_difficulty=difficulty,
             student_age=age,
             student_level=level,
@@ -230,9 +443,23 @@ class ActivityAIService:
             work_data=json.dumps(work_data.get("content", work_data), ensure_ascii=False),
         )
 
+        defaults = {
+            "score": 2,
+            "feedback": "Çalışmaya devam et!",
+            "strengths": ["Çaba gösterdin"],
+            "improvements": ["Pratik yapmaya devam et"],
+            "error_analysis": {"error_type": "none", "pattern": "", "severity": "low"},
+        }
+
         try:
-            text, tokens = await self._call_openai(prompt, "Bu çalışmayı değerlendir.")
-            result = self._parse_json(text)
+            text, tokens = await self._call_openai(
+                "evaluate_work",
+                prompt,
+                "Bu çalışmayı değerlendir.",
+                scope=UsageScope.of(student_id, profile),
+                schema=EvaluateWorkResponse,
+                defaults=defaults,
+            )
 
             await self._save_conversation(
                 student_id,
@@ -242,16 +469,12 @@ class ActivityAIService:
                 tokens,
             )
 
+            result = parse_structured(text, EvaluateWorkResponse, defaults)
+
             logger.info(
                 f"Evaluate work: student={student_id}, type={work_type}, "
-                f"score={result.get('score', '?')}"
+                f"score={result['score']}"
             )
-
-            result.setdefault("score", 2)
-            result.setdefault("feedback", "Çalışmaya devam et!")
-            result.setdefault("strengths", ["Çaba gösterdin"])
-            result.setdefault("improvements", ["Pratik yapmaya devam et"])
-            result.setdefault("error_analysis", {"error_type": "none", "pattern": "", "severity": "low"})
             return result
 
         except Exception as e:
@@ -268,21 +491,29 @@ class ActivityAIService:
         self,
         student_id: UUID,
         recent_performance: list,
+        explain: bool = False,
     ) -> Dict[str, Any]:
         """
         Son performansa göre zorluk seviyesi önerisi.
+        Karar yerel istatistik motorunda verilir (LLM çağrısı yok);
+        `explain` verilirse LLM yalnızca kararın gerekçesini yazar.
 
         Args:
             student_id: Öğrenci UUID
             recent_performance: Son aktivitelerin listesi [{score, hints_used, time, errors}]
+            explain: Gerekçeyi LLM ile zenginleştir
 
         Returns:
-            {action, reason, confidence, next_difficulty, specific_adjustments}
+            {action, reason, confidence, next_difficulty, specific_adjustments, signals}
         """
         profile = await self._profile_repo.get_by_user_id(student_id)
         difficulty = profile.learning_difficulty.value if profile else "dyslexia"
         level = profile.current_level if profile else 1
 
+        result = decide(recent_performance, difficulty, level).to_dict()
+        if not explain:
+            return result
+
         perf_text = "\n".join(
             f"- Aktivite {i+1}: Skor={p.get('score', 0)}, "
             f"İpucu={p.get('hints_used', 0)}, "
@@ -291,15 +522,25 @@ class ActivityAIService:
             for i, p in enumerate(recent_performance[-10:])
         )
 
-        prompt = ADAPTIVE_DIFFICULTY_PROMPT.format(
+        prompt = ADAPTIVE_DIFFICULTY_PROMPT.render(
             learning_difficulty=difficulty,
             current_level=level,
+            action=result["action"],
+            next_difficulty=result["next_difficulty"],
+            signals=json.dumps(result["signals"], ensure_ascii=False),
             performance_data=perf_text or "Veri yok",
         )
 
         try:
-            text, tokens = await self._call_openai(prompt, "Zorluk önerisi yap.", max_tokens=256)
-            result = self._parse_json(text)
+            text, tokens = await self._call_openai(
+                "adaptive_difficulty",
+                prompt,
+                "Zorluk kararını açıkla.",
+                max_tokens=256,
+                scope=UsageScope.of(student_id, profile),
+                schema=AdaptiveDifficultyResponse,
+                defaults=result,
+            )
 
             await self._save_conversation(
                 student_id,
@@ -309,22 +550,17 @@ class ActivityAIService:
                 tokens,
             )
 
-            result.setdefault("action", "maintain")
-            result.setdefault("reason", "Mevcut seviye uygun görünüyor.")
-            result.setdefault("confidence", 0.7)
-            result.setdefault("next_difficulty", "medium")
-            result.setdefault("specific_adjustments", [])
+            # Karar alanları motorda kalır; LLM sadece açıklamayı doldurur
+            explanation = parse_structured(text, AdaptiveDifficultyResponse, result)
+            if explanation["reason"]:
+                result["reason"] = explanation["reason"]
+            if explanation["specific_adjustments"]:
+                result["specific_adjustments"] = explanation["specific_adjustments"]
             return result
 
         except Exception as e:
-            logger.error(f"Adaptive difficulty error: {e}")
-            return {
-                "action": "maintain",
-                "reason": "Değerlendirme yapılamadı, mevcut seviye korunuyor.",
-                "confidence": 0.5,
-                "next_difficulty": "medium",
-                "specific_adjustments": [],
-            }
+            logger.error(f"Adaptive difficulty explanation error: {e}")
+            return result
 
     # ═════════════════════════════════════════════════════════
     # KATMAN 2: BÖLÜM SONRASI ANALİZ
@@ -358,7 +594,7 @@ class ActivityAIService:
         errors_text = json.dumps(session_data.get("errors", []), ensure_ascii=False)
         scores_text = json.dumps(session_data.get("scores", []), ensure_ascii=False)
 
-        prompt = SESSION_ANALYSIS_PROMPT.format(
+        prompt = SESSION_ANALYSIS_PROMPT.render(
             learning_difficulty=difficulty,
             student_age=age,
             student_level=level,
@@ -371,9 +607,23 @@ class ActivityAIService:
             scores=scores_text,
         )
 
+        defaults = {
+            "teacher_note": "Öğrenci iyi bir performans gösterdi.",
+            "parent_note": "Çocuğunuz güzel ilerliyor!",
+            "positive_observations": ["Göreve katılım sağladı"],
+            "session_summary": "Oturum başarıyla tamamlandı.",
+        }
+
         try:
-            text, tokens = await self._call_openai(prompt, "Oturum analizi yap.", max_tokens=768)
-            result = self._parse_json(text)
+            text, tokens = await self._call_openai(
+                "session_analysis",
+                prompt,
+                "Oturum analizi yap.",
+                max_tokens=768,
+                scope=UsageScope.of(student_id, profile),
+                schema=SessionAnalysisResponse,
+                defaults=defaults,
+            )
 
             await self._save_conversation(
                 student_id,
@@ -383,21 +633,13 @@ class ActivityAIService:
                 tokens,
             )
 
+            result = parse_structured(text, SessionAnalysisResponse, defaults)
+
             logger.info(
                 f"Session analysis: student={student_id}, "
                 f"chapter={session_data.get('chapter_title', '')}, "
-                f"severity={result.get('severity', '?')}"
+                f"severity={result['severity']}"
             )
-
-            result.setdefault("dominant_error", "none")
-            result.setdefault("error_frequency", 0)
-            result.setdefault("severity", "low")
-            result.setdefault("intervention_needed", False)
-            result.setdefault("intervention_type", None)
-            result.setdefault("teacher_note", "Öğrenci iyi bir performans gösterdi.")
-            result.setdefault("parent_note", "Çocuğunuz güzel ilerliyor!")
-            result.setdefault("positive_observations", ["Göreve katılım sağladı"])
-            result.setdefault("session_summary", "Oturum başarıyla tamamlandı.")
             return result
 
         except Exception as e:
@@ -431,7 +673,7 @@ class ActivityAIService:
         difficulty = profile.learning_difficulty.value if profile else "dyslexia"
         level = profile.current_level if profile else 1
 
-        prompt = NEXT_STEPS_PROMPT.format(
+        prompt = NEXT_STEPS_PROMPT.render(
             learning_difficulty=difficulty,
             student_level=level,
             chapter_title=performance_summary.get("chapter_title", ""),
@@ -442,9 +684,22 @@ class ActivityAIService:
             available_chapters="Sistem tarafından belirlenecek",
         )
 
+        defaults = {
+            "next_action": "continue",
+            "reason": "Mevcut seviyede devam önerilir.",
+            "encouragement": "Harikasın! 🌟",
+        }
+
         try:
-            text, tokens = await self._call_openai(prompt, "Sonraki adımı öner.", max_tokens=512)
-            result = self._parse_json(text)
+            text, tokens = await self._call_openai(
+                "next_steps",
+                prompt,
+                "Sonraki adımı öner.",
+                max_tokens=512,
+                scope=UsageScope.of(student_id, profile),
+                schema=NextStepsResponse,
+                defaults=defaults,
+            )
 
             await self._save_conversation(
                 student_id,
@@ -454,13 +709,7 @@ class ActivityAIService:
                 tokens,
             )
 
-            result.setdefault("next_action", "continue")
-            result.setdefault("reason", "Mevcut seviyede devam önerilir.")
-            result.setdefault("next_chapter_id", None)
-            result.setdefault("review_activities", [])
-            result.setdefault("intervention_module", None)
-            result.setdefault("encouragement", "Harikasın! 🌟")
-            return result
+            return parse_structured(text, NextStepsResponse, defaults)
 
         except Exception as e:
             logger.error(f"Next steps error: {e}")
@@ -485,6 +734,8 @@ class ActivityAIService:
     ) -> List[Dict[str, Any]]:
         """
         Zayıf alana özel pratik problemleri oluştur.
+        Problem bankası varsa öğrencinin görmediği problemler bankadan
+        seçilir; LLM yalnızca banka boşken ya da arka planda çağrılır.
 
         Args:
             student_id: Öğrenci UUID
@@ -499,13 +750,32 @@ class ActivityAIService:
         age = profile.age if profile else 8
         level = profile.current_level if profile else 1
 
+        if self._practice_bank is not None:
+            bucket = PracticeBucket(
+                LearningDifficulty(difficulty), weak_skill.strip().lower(), age_band(age)
+            )
+            try:
+                problems = await self._practice_bank.draw(
+                    student_id, bucket, age, level, count,
+                    scope=UsageScope.of(student_id, profile),
+                )
+                if problems:
+                    logger.info(
+                        f"Personalized practice (bank): student={student_id}, "
+                        f"skill={weak_skill}, count={len(problems)}"
+                    )
+                    return problems
+            except LLM_ERRORS as e:
+                logger.error(f"Practice bank error: {e}")
+            return self._generate_fallback_problems(weak_skill, count)
+
         # Cache kontrolü
         cache_key = f"practice:{student_id}:{weak_skill}:{count}"
         cached = await self._cache.get(cache_key)
         if cached:
             return cached
 
-        prompt = PERSONALIZED_PRACTICE_PROMPT.format(
+        prompt = PERSONALIZED_PRACTICE_PROMPT.render(
             learning_difficulty=difficulty,
             student_age=age,
             student_level=level,
@@ -515,11 +785,14 @@ class ActivityAIService:
 
         try:
             text, tokens = await self._call_openai(
+                "personalized_practice",
                 prompt,
                 f"{weak_skill} alanı için {count} pratik problemi oluştur.",
                 max_tokens=1024,
+                scope=UsageScope.of(student_id, profile),
+                schema=PersonalizedPracticeResponse,
+                defaults={"skill": weak_skill},
             )
-            parsed = self._parse_json(text)
 
             await self._save_conversation(
                 student_id,
@@ -529,15 +802,9 @@ class ActivityAIService:
                 tokens,
             )
 
-            # Liste formatına dönüştür
-            if isinstance(parsed, list):
-                problems = parsed
-            elif "items" in parsed:
-                problems = parsed["items"]
-            elif isinstance(parsed, dict) and "raw_response" not in parsed:
-                problems = [parsed]
-            else:
-                problems = self._generate_fallback_problems(weak_skill, count)
+            problems = parse_structured(
+                text, PersonalizedPracticeResponse, {"skill": weak_skill}
+            )["problems"] or self._generate_fallback_problems(weak_skill, count)
 
             # 30 dakika cache'le
             await self._cache.set(cache_key, problems, expire_seconds=1800)
@@ -9,25 +9,25 @@ Kanıt tabanlı:
 - Disleksi: Orton-Gillingham, fonolojik farkındalık (NRP, 2000)
 - Disgrafi: Handwriting Without Tears (Olsen, 2003), SRSD (Graham & Harris, 2005)
 - Diskalkuli: CRA modeli (Concrete-Representational-Abstract), Butterworth (2005)
+
+Her prompt statik kısım (kurallar, yanıt şeması) + en sonda öğrenci verisi
+olarak kayıtlıdır; böylece sağlayıcı tarafı prefix cache aynı ön eki yakalar.
 """
 
+from app.infrastructure.ai.prompt_registry import PromptTemplate, prompt_registry
+
+
 # ═══════════════════════════════════════════════════════════════
 # KATMAN 1 — AKTİVİTE İÇİ ANLıK İPUCU PROMPT'LARI
 # ═══════════════════════════════════════════════════════════════
 
-DYSCALCULIA_ACTIVITY_HINT_PROMPT = """Sen bir matematik aktivitesi içinde çocuklara ANLıK yardım eden AI asistansın.
+DYSCALCULIA_ACTIVITY_HINT_PROMPT = prompt_registry.register(PromptTemplate(
+    name="activity_hint:dyscalculia",
+    static="""Sen bir matematik aktivitesi içinde çocuklara ANLıK yardım eden AI asistansın.
 Diskalkuli (sayı ve matematik güçlüğü) yaşayan bir öğrenci şu anda bir problem çözüyor.
+Aktivite bilgisi ve ipucu seviyesi en sonda verilmiştir.
 
-AKTİVİTE BİLGİSİ:
-- Bölüm: {chapter_title}
-- Aktivite tipi: {activity_type}
-- Problem: {problem_description}
-- Öğrencinin cevabı: {student_answer}
-- Doğru cevap: {correct_answer}
-- Deneme sayısı: {attempt_number}
-- Hata türü (varsa): {error_type}
-
-İPUCU SEVİYESİ: {hint_level}/3
+İPUCU SEVİYELERİ:
 - Seviye 1: Çok hafif yönlendirme ("Parmakla say", "Sayı doğrusuna bak")
 - Seviye 2: Stratejik ipucu ("Önce onlukları topla, sonra birlikleri")
 - Seviye 3: Adım adım çözüm rehberi (ama cevabı VERMEden)
@@ -40,28 +40,33 @@ KURALLAR:
 5. Türkçe, basit dil (7-12 yaş seviyesi)
 
 YANIT JSON:
-{{
+{
     "hint": "İpucu metni (max 25 kelime)",
-    "hint_level": {hint_level},
+    "hint_level": İPUCU SEVİYESİ (1-3),
     "should_show_answer": false,
     "visual_aid": "number_line|blocks|fingers|drawing|none",
     "encouragement": "Kısa cesaretlendirme"
-}}"""
-
-
-DYSLEXIA_ACTIVITY_HINT_PROMPT = """Sen bir okuma aktivitesi içinde çocuklara ANLıK yardım eden AI asistansın.
-Disleksi (okuma güçlüğü) yaşayan bir öğrenci şu anda bir kelime/metin üzerinde çalışıyor.
-
-AKTİVİTE BİLGİSİ:
+}""",
+    data="""AKTİVİTE BİLGİSİ:
 - Bölüm: {chapter_title}
 - Aktivite tipi: {activity_type}
-- Hedef kelime/metin: {problem_description}
+- Problem: {problem_description}
 - Öğrencinin cevabı: {student_answer}
 - Doğru cevap: {correct_answer}
 - Deneme sayısı: {attempt_number}
 - Hata türü (varsa): {error_type}
 
-İPUCU SEVİYESİ: {hint_level}/3
+İPUCU SEVİYESİ: {hint_level}/3""",
+))
+
+
+DYSLEXIA_ACTIVITY_HINT_PROMPT = prompt_registry.register(PromptTemplate(
+    name="activity_hint:dyslexia",
+    static="""Sen bir okuma aktivitesi içinde çocuklara ANLıK yardım eden AI asistansın.
+Disleksi (okuma güçlüğü) yaşayan bir öğrenci şu anda bir kelime/metin üzerinde çalışıyor.
+Aktivite bilgisi ve ipucu seviyesi en sonda verilmiştir.
+
+İPUCU SEVİYELERİ:
 - Seviye 1: Hafif yönlendirme ("Hecelere ayıral: ke-di", "İlk sese odaklan")
 - Seviye 2: Fonetik ipucu ("Bu harf /k/ sesi çıkarır", "Uyak: kedi-bedi")
 - Seviye 3: Çok duyulu destek ("Parmağınla takip et, her heceyi vurgula")
@@ -74,28 +79,33 @@ KURALLAR:
 5. Türkçe, basit dil
 
 YANIT JSON:
-{{
+{
     "hint": "İpucu metni (max 25 kelime)",
-    "hint_level": {hint_level},
+    "hint_level": İPUCU SEVİYESİ (1-3),
     "should_show_answer": false,
     "visual_aid": "syllable_split|sound_map|word_family|none",
     "encouragement": "Kısa cesaretlendirme"
-}}"""
-
-
-DYSGRAPHIA_ACTIVITY_HINT_PROMPT = """Sen bir yazma aktivitesi içinde çocuklara ANLıK yardım eden AI asistansın.
-Disgrafi (yazma güçlüğü) yaşayan bir öğrenci şu anda yazı yazıyor.
-
-AKTİVİTE BİLGİSİ:
+}""",
+    data="""AKTİVİTE BİLGİSİ:
 - Bölüm: {chapter_title}
 - Aktivite tipi: {activity_type}
-- Görev: {problem_description}
-- Öğrencinin yazdığı: {student_answer}
-- Beklenen: {correct_answer}
+- Hedef kelime/metin: {problem_description}
+- Öğrencinin cevabı: {student_answer}
+- Doğru cevap: {correct_answer}
 - Deneme sayısı: {attempt_number}
 - Hata türü (varsa): {error_type}
 
-İPUCU SEVİYESİ: {hint_level}/3
+İPUCU SEVİYESİ: {hint_level}/3""",
+))
+
+
+DYSGRAPHIA_ACTIVITY_HINT_PROMPT = prompt_registry.register(PromptTemplate(
+    name="activity_hint:dysgraphia",
+    static="""Sen bir yazma aktivitesi içinde çocuklara ANLıK yardım eden AI asistansın.
+Disgrafi (yazma güçlüğü) yaşayan bir öğrenci şu anda yazı yazıyor.
+Aktivite bilgisi ve ipucu seviyesi en sonda verilmiştir.
+
+İPUCU SEVİYELERİ:
 - Seviye 1: Motor yönlendirme ("Yukarıdan başla", "Yavaşça çiz")
 - Seviye 2: Şekil tarifi ("Önce daire, sonra çizgi")
 - Seviye 3: Adım adım talimat ("1. Noktadan başla 2. Aşağı in 3. Sağa kıvır")
@@ -108,30 +118,33 @@ KURALLAR:
 5. Türkçe
 
 YANIT JSON:
-{{
+{
     "hint": "İpucu metni (max 25 kelime)",
-    "hint_level": {hint_level},
+    "hint_level": İPUCU SEVİYESİ (1-3),
     "should_show_answer": false,
     "visual_aid": "stroke_order|grid_guide|letter_anatomy|none",
     "encouragement": "Kısa cesaretlendirme"
-}}"""
+}""",
+    data="""AKTİVİTE BİLGİSİ:
+- Bölüm: {chapter_title}
+- Aktivite tipi: {activity_type}
+- Görev: {problem_description}
+- Öğrencinin yazdığı: {student_answer}
+- Beklenen: {correct_answer}
+- Deneme sayısı: {attempt_number}
+- Hata türü (varsa): {error_type}
+
+İPUCU SEVİYESİ: {hint_level}/3""",
+))
 
 
 # ═══════════════════════════════════════════════════════════════
 # KATMAN 1 — ÖĞRENCİ ÇALIŞMASI DEĞERLENDİRME
 # ═══════════════════════════════════════════════════════════════
 
-EVALUATE_WORK_PROMPT = """Bir öğrencinin çalışmasını değerlendir.
-
-ÖĞRENCİ PROFİLİ:
-- Öğrenme güçlüğü: {learning_difficulty}
-- Yaş: {student_age}
-- Seviye: {student_level}
-
-ÇALIŞMA BİLGİSİ:
-- Tür: {work_type}
-- Aktivite: {activity_description}
-- Öğrenci verisi: {work_data}
+EVALUATE_WORK_PROMPT = prompt_registry.register(PromptTemplate(
+    name="evaluate_work",
+    static="""Bir öğrencinin çalışmasını değerlendir. Öğrenci profili ve çalışma bilgisi en sondadır.
 
 DEĞERLENDİRME KRİTERLERİ:
 - Performans puanı (0-4): Görev ne kadar başarılı
@@ -147,68 +160,62 @@ KURALLAR:
 5. Türkçe, cesaretlendirici ton
 
 YANIT JSON:
-{{
+{
     "score": 0-4,
     "feedback": "Genel geri bildirim (max 50 kelime)",
     "strengths": ["Güçlü yön 1", "Güçlü yön 2"],
     "improvements": ["Gelişim önerisi 1"],
-    "error_analysis": {{
+    "error_analysis": {
         "error_type": "hata_türü|none",
         "pattern": "tekrarlanan_hata_varsa_açıklama",
         "severity": "low|medium|high"
-    }}
-}}"""
+    }
+}""",
+    data="""ÖĞRENCİ PROFİLİ:
+- Öğrenme güçlüğü: {learning_difficulty}
+- Yaş: {student_age}
+- Seviye: {student_level}
+
+ÇALIŞMA BİLGİSİ:
+- Tür: {work_type}
+- Aktivite: {activity_description}
+- Öğrenci verisi: {work_data}""",
+))
 
 
 # ═══════════════════════════════════════════════════════════════
 # KATMAN 1 — UYARLANABILIR ZORLUK ÖNERİSİ
 # ═══════════════════════════════════════════════════════════════
 
-ADAPTIVE_DIFFICULTY_PROMPT = """Son performans verilerine göre zorluk seviyesi önerisi yap.
+ADAPTIVE_DIFFICULTY_PROMPT = prompt_registry.register(PromptTemplate(
+    name="adaptive_difficulty",
+    static="""Zorluk motorunun verdiği kararı öğretmen ve veli için açıkla. Karar, öğrenci profili ve veriler en sondadır.
+Kararı DEĞİŞTİRME; sadece sebebini sade bir dille anlat ve somut ayarlamalar öner.
 
-ÖĞRENCİ PROFİLİ:
+YANIT JSON:
+{
+    "reason": "Karar sebebi (max 30 kelime)",
+    "specific_adjustments": ["Somut öneri 1"]
+}""",
+    data="""ÖĞRENCİ PROFİLİ:
 - Öğrenme güçlüğü: {learning_difficulty}
 - Mevcut seviye: {current_level}
 
-SON PERFORMANS VERİLERİ:
-{performance_data}
-
-KARAR KURALLARI:
-- 5 üst üste ≥80 puan → "increase" (zorlaştır)
-- 3 üst üste ≤40 puan → "decrease" (kolaylaştır)
-- Karışık sonuçlar → "maintain" (aynı tut)
-- Çok fazla ipucu kullanma (>3/aktivite) → "decrease"
-- Tamamlama süresi çok uzun → "maintain" veya "decrease"
+MOTOR KARARI: {action} → {next_difficulty}
+GÖSTERGELER: {signals}
 
-YANIT JSON:
-{{
-    "action": "increase|decrease|maintain",
-    "reason": "Karar sebebi (max 30 kelime)",
-    "confidence": 0.0-1.0,
-    "next_difficulty": "beginner|easy|medium|hard|advanced",
-    "specific_adjustments": ["Somut öneri 1"]
-}}"""
+SON PERFORMANS VERİLERİ:
+{performance_data}""",
+))
 
 
 # ═══════════════════════════════════════════════════════════════
 # KATMAN 2 — OTURUM SONU PERFORMANS ANALİZİ
 # ═══════════════════════════════════════════════════════════════
 
-SESSION_ANALYSIS_PROMPT = """Bir öğrenme oturumunun detaylı analizini yap.
-
-ÖĞRENCİ PROFİLİ:
-- Öğrenme güçlüğü: {learning_difficulty}
-- Yaş: {student_age}
-- Seviye: {student_level}
-
-OTURUM VERİLERİ:
-- Bölüm: {chapter_title}
-- Aktivite tipi: {activity_type}
-- Tamamlanan aktivite sayısı: {activities_completed}
-- Toplam süre: {time_spent} saniye
-- Kullanılan ipucu sayısı: {hints_used}
-- Hatalar: {errors}
-- Skorlar: {scores}
+SESSION_ANALYSIS_PROMPT = prompt_registry.register(PromptTemplate(
+    name="session_analysis",
+    static="""Bir öğrenme oturumunun detaylı analizini yap. Öğrenci profili ve oturum verileri en sondadır.
 
 ANALİZ GÖREVLERİ:
 1. BASKIN HATA TİPİ: En sık yapılan hata ne? (ör. "basamak_degeri", "hece_karıştırma", "harf_tersleme")
@@ -218,7 +225,7 @@ ANALİZ GÖREVLERİ:
 5. VELİ NOTU: Veliye kısa bilgi (max 40 kelime)
 
 YANIT JSON:
-{{
+{
     "dominant_error": "hata_türü_adı",
     "error_frequency": sayı,
     "severity": "low|medium|high",
@@ -228,28 +235,30 @@ YANIT JSON:
     "parent_note": "Veliye mesaj",
     "positive_observations": ["Pozitif gözlem 1", "Pozitif gözlem 2"],
     "session_summary": "Genel özet (max 50 kelime)"
-}}"""
+}""",
+    data="""ÖĞRENCİ PROFİLİ:
+- Öğrenme güçlüğü: {learning_difficulty}
+- Yaş: {student_age}
+- Seviye: {student_level}
+
+OTURUM VERİLERİ:
+- Bölüm: {chapter_title}
+- Aktivite tipi: {activity_type}
+- Tamamlanan aktivite sayısı: {activities_completed}
+- Toplam süre: {time_spent} saniye
+- Kullanılan ipucu sayısı: {hints_used}
+- Hatalar: {errors}
+- Skorlar: {scores}""",
+))
 
 
 # ═══════════════════════════════════════════════════════════════
 # KATMAN 2 — SONRAKİ ADIM ÖNERİSİ
 # ═══════════════════════════════════════════════════════════════
 
-NEXT_STEPS_PROMPT = """Öğrencinin performansına göre sonraki adım önerisi yap.
-
-ÖĞRENCİ PROFİLİ:
-- Öğrenme güçlüğü: {learning_difficulty}
-- Mevcut seviye: {student_level}
-
-PERFORMANS ÖZETİ:
-- Tamamlanan bölüm: {chapter_title}
-- Ortalama skor: {average_score}
-- Baskın hata: {dominant_error}
-- Ciddiyet: {severity}
-- Müdahale gerekli: {intervention_needed}
-
-MEVCUT BÖLÜMLER:
-{available_chapters}
+NEXT_STEPS_PROMPT = prompt_registry.register(PromptTemplate(
+    name="next_steps",
+    static="""Öğrencinin performansına göre sonraki adım önerisi yap. Öğrenci profili, performans özeti ve mevcut bölümler en sondadır.
 
 KARAR MATRİSİ:
 - Skor ≥ 80 ve hata yok → "advance" (sonraki bölüme geç)
@@ -258,29 +267,37 @@ KARAR MATRİSİ:
 - Ciddi hata paterni → "intervene" (özel müdahale modülü)
 
 YANIT JSON:
-{{
+{
     "next_action": "continue|review|advance|intervene",
     "reason": "Sebep (max 30 kelime)",
     "next_chapter_id": "bölüm_id|null",
     "review_activities": ["tekrar_edilecek_aktivite_1"],
     "intervention_module": "müdahale_modülü|null",
     "encouragement": "Cesaretlendirici mesaj"
-}}"""
+}""",
+    data="""ÖĞRENCİ PROFİLİ:
+- Öğrenme güçlüğü: {learning_difficulty}
+- Mevcut seviye: {student_level}
+
+PERFORMANS ÖZETİ:
+- Tamamlanan bölüm: {chapter_title}
+- Ortalama skor: {average_score}
+- Baskın hata: {dominant_error}
+- Ciddiyet: {severity}
+- Müdahale gerekli: {intervention_needed}
+
+MEVCUT BÖLÜMLER:
+{available_chapters}""",
+))
 
 
 # ═══════════════════════════════════════════════════════════════
 # KİŞİSELLEŞTİRİLMİŞ PRATİK OLUŞTURMA
 # ═══════════════════════════════════════════════════════════════
 
-PERSONALIZED_PRACTICE_PROMPT = """Öğrencinin zayıf alanına özel pratik problemleri oluştur.
-
-ÖĞRENCİ:
-- Öğrenme güçlüğü: {learning_difficulty}
-- Yaş: {student_age}
-- Seviye: {student_level}
-- Zayıf alan: {weak_skill}
-
-OLUŞTUR: {count} adet pratik problemi
+PERSONALIZED_PRACTICE_PROMPT = prompt_registry.register(PromptTemplate(
+    name="personalized_practice",
+    static="""Öğrencinin zayıf alanına özel pratik problemleri oluştur. Öğrenci bilgisi ve problem sayısı en sondadır.
 
 KURALLAR:
 1. Yaşa uygun zorluk
@@ -292,7 +309,7 @@ KURALLAR:
 
 YANIT JSON array:
 [
-    {{
+    {
         "id": 1,
         "question": "Problem sorusu",
         "correct_answer": "Doğru cevap",
@@ -300,15 +317,23 @@ YANIT JSON array:
         "hint": "İpucu",
         "difficulty": "easy|medium|hard",
         "skill_focus": "Odak beceri"
-    }}
-]"""
+    }
+]""",
+    data="""ÖĞRENCİ:
+- Öğrenme güçlüğü: {learning_difficulty}
+- Yaş: {student_age}
+- Seviye: {student_level}
+- Zayıf alan: {weak_skill}
+
+OLUŞTUR: {count} adet pratik problemi""",
+))
 
 
 # ═══════════════════════════════════════════════════════════════
 # YARDIMCI: PROMPT SEÇİM FONKSİYONU
 # ═══════════════════════════════════════════════════════════════
 
-def get_activity_hint_prompt(learning_difficulty: str) -> str:
+def get_activity_hint_prompt(learning_difficulty: str) -> PromptTemplate:
     """Öğrenme güçlüğüne göre doğru ipucu prompt'unu döndür."""
     prompts = {
         "dyscalculia": DYSCALCULIA_ACTIVITY_HINT_PROMPT,
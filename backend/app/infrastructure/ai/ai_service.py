@@ -3,24 +3,33 @@ AI Service using OpenAI ChatGPT API.
 Provides personalized AI conversations, hints, and performance analysis.
 """
 
-import json
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
-import openai
 from loguru import logger
 
+from app.application.dtos.ai_dtos import AIAnalysisResponse
 from app.config import settings
 from app.domain.entities.ai_conversation import AIConversation
 from app.domain.entities.enums import LearningDifficulty
+from app.domain.entities.student_profile import StudentProfile
 from app.domain.repositories.ai_conversation_repository import AIConversationRepository
+from app.domain.repositories.hint_bank_repository import HintBankRepository
 from app.domain.repositories.progress_repository import ProgressRepository
 from app.domain.repositories.student_profile_repository import StudentProfileRepository
+from app.infrastructure.ai.conversation_context import ConversationContextManager
+from app.infrastructure.ai.errors import LLM_ERRORS
+from app.infrastructure.ai.hint_bank import HintBank, hint_bank_generator
+from app.infrastructure.ai.llm_gateway import LLMGateway
 from app.infrastructure.ai.prompts import (
+    DEFAULT_HINT_ENCOURAGEMENT,
+    HINT_ENCOURAGEMENTS,
     get_analysis_prompt,
     get_hint_prompt,
     get_system_prompt,
 )
+from app.infrastructure.ai.structured_output import parse_structured, response_format_for
+from app.infrastructure.ai.token_budget import UsageScope
 from app.infrastructure.cache.redis_cache import RedisCache
 
 
@@ -33,12 +42,20 @@ class AIService:
         profile_repo: StudentProfileRepository,
         progress_repo: ProgressRepository,
         cache: RedisCache,
+        llm: LLMGateway,
+        hint_bank_repo: Optional[HintBankRepository] = None,
     ):
         self._conversation_repo = conversation_repo
         self._profile_repo = profile_repo
         self._progress_repo = progress_repo
         self._cache = cache
-        self._client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self._llm = llm
+        self._context = ConversationContextManager(conversation_repo, cache, llm)
+        self._hint_bank = (
+            HintBank(hint_bank_repo, cache, hint_bank_generator)
+            if hint_bank_repo is not None and settings.HINT_BANK_ENABLED
+            else None
+        )
 
     async def chat(
         self,
@@ -51,60 +68,21 @@ class AIService:
         Send a message to ChatGPT and get a personalized response.
         Context-aware based on student profile and conversation history.
         """
-        # Get student profile for context
-        profile = await self._profile_repo.get_by_user_id(user_id)
-        learning_difficulty = (
-            profile.learning_difficulty if profile
-            else LearningDifficulty.DYSLEXIA
+        messages, profile, learning_difficulty = await self._build_chat_messages(
+            user_id, message, role_context, chapter_context
         )
 
-        # Get system prompt
-        system_prompt = get_system_prompt(learning_difficulty, role_context)
-
-        # Build context from profile
-        if profile:
-            system_prompt += f"""
-MEVCUT ÖĞRENCİ DURUMU:
-- Yaş: {profile.age}
-- Seviye: {profile.current_level}
-- Toplam puan: {profile.total_score}
-- Seri gün: {profile.streak_days}
-"""
-
-        # Inject chapter context if available
-        if chapter_context:
-            system_prompt += f"""
-ŞU AN OYNANAN BÖLÜM:
-- Bölüm Başlığı: {chapter_context.get('title', 'Bilinmiyor')}
-- Aktivite Tipi: {chapter_context.get('activity_type', '')}
-- Bölüm No: {chapter_context.get('chapter_number', '')}
-- Zorluk Türü: {chapter_context.get('difficulty_type', '')}
-- Açıklama: {chapter_context.get('description', '')}
-
-ÖĞrenci şu anda bu bölümü oynuyor. Soruları bu bölümle ilgili olabilir.
-Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
-"""
-
-        # Get recent conversation history for context
-        recent = await self._conversation_repo.get_recent_context(user_id, limit=6)
-        messages: List[Dict[str, str]] = [
-            {"role": "system", "content": system_prompt}
-        ]
-        for conv in recent:
-            messages.append({"role": "user", "content": conv.message})
-            messages.append({"role": "assistant", "content": conv.response})
-        messages.append({"role": "user", "content": message})
-
         try:
             # Call OpenAI ChatGPT API
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
+            completion = await self._llm.complete(
+                "chat",
+                messages,
                 max_tokens=settings.OPENAI_MAX_TOKENS,
-                messages=messages,
+                scope=UsageScope.of(user_id, profile),
             )
 
-            ai_response = response.choices[0].message.content or ""
-            tokens_used = response.usage.total_tokens if response.usage else 0
+            ai_response = completion.text
+            tokens_used = completion.tokens
 
             # Save conversation
             conversation = AIConversation(
@@ -127,7 +105,7 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
             )
             return saved
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error: {e}")
             # Return a fallback response
             fallback = AIConversation(
@@ -140,6 +118,119 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
             )
             return await self._conversation_repo.create(fallback)
 
+    async def chat_stream(
+        self,
+        user_id: UUID,
+        message: str,
+        role_context: str = "student",
+        chapter_context: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Union[str, AIConversation]]:
+        """
+        Streaming variant of chat().
+        Yields text deltas as they arrive, then the saved AIConversation
+        once the completion has finished.
+        """
+        messages, profile, learning_difficulty = await self._build_chat_messages(
+            user_id, message, role_context, chapter_context
+        )
+
+        stream = self._llm.stream(
+            "chat",
+            messages,
+            max_tokens=settings.OPENAI_MAX_TOKENS,
+            scope=UsageScope.of(user_id, profile),
+        )
+        try:
+            async for delta in stream:
+                yield delta
+        except LLM_ERRORS as e:
+            logger.error(f"OpenAI API error (chat stream): {e}")
+            fallback_text = "Şu anda yanıt veremiyorum. Lütfen biraz sonra tekrar deneyin. 🙏"
+            if not stream.result.text:
+                yield fallback_text
+            yield await self._conversation_repo.create(AIConversation(
+                user_id=user_id,
+                message=message,
+                response=stream.result.text or fallback_text,
+                context={"error": str(e)},
+                role_context=role_context,
+                tokens_used=stream.result.tokens,
+            ))
+            return
+
+        conversation = AIConversation(
+            user_id=user_id,
+            message=message,
+            response=stream.result.text,
+            context={
+                "learning_difficulty": learning_difficulty.value,
+                "role_context": role_context,
+                "student_level": profile.current_level if profile else 1,
+            },
+            role_context=role_context,
+            tokens_used=stream.result.tokens,
+        )
+        saved = await self._conversation_repo.create(conversation)
+
+        logger.info(
+            f"AI chat stream: user={user_id}, tokens={stream.result.tokens}, "
+            f"difficulty={learning_difficulty.value}"
+        )
+        yield saved
+
+    async def _build_chat_messages(
+        self,
+        user_id: UUID,
+        message: str,
+        role_context: str,
+        chapter_context: Optional[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, str]], Optional[StudentProfile], LearningDifficulty]:
+        """Build the chat prompt from profile, chapter and recent history."""
+        # Get student profile for context
+        profile = await self._profile_repo.get_by_user_id(user_id)
+        learning_difficulty = (
+            profile.learning_difficulty if profile
+            else LearningDifficulty.DYSLEXIA
+        )
+
+        # Get system prompt
+        system_prompt = get_system_prompt(learning_difficulty, role_context)
+
+        # Build context from profile
+        if profile:
+            system_prompt += f"""
+MEVCUT ÖĞRENCİ DURUMU:
+- Yaş: {profile.age}
+- Seviye: {profile.current_level}
+- Toplam puan: {profile.total_score}
+- Seri gün: {profile.streak_days}
+"""
+
+        # Inject chapter context if available
+        if chapter_context:
+            system_prompt += f"""
+ŞU AN OYNANAN BÖLÜM:
+- Bölüm Başlığı: {chapter_context.get('title', 'Bilinmiyor')}
+- Aktivite Tipi: {chapter_context.get('activity_type', '')}
+- Bölüm No: {chapter_context.get('chapter_number', '')}
+- Zorluk Türü: {chapter_context.get('difficulty_type', '')}
+- Açıklama: {chapter_context.get('description', '')}
+
+ÖĞrenci şu anda bu bölümü oynuyor. Soruları bu bölümle ilgili olabilir.
+Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
+"""
+
+        # Token-bounded history: rolling summary + newest turns verbatim
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": system_prompt}
+        ]
+        messages.extend(await self._context.build_history(
+            user_id, role_context, UsageScope.of(user_id, profile)
+        ))
+        messages.append({"role": "user", "content": message})
+
+        return messages, profile, learning_difficulty
+
     async def get_hint(
         self,
         user_id: UUID,
@@ -157,6 +248,19 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
             else LearningDifficulty.DYSLEXIA
         )
 
+        # Pregenerated variants cost no tokens and no LLM latency
+        if self._hint_bank is not None:
+            banked = await self._hint_bank.pick(
+                chapter_id, learning_difficulty, chapter_title, activity_type, hint_level
+            )
+            if banked:
+                return {
+                    "chapter_id": str(chapter_id),
+                    "hint": banked,
+                    "hint_level": hint_level,
+                    "encouragement": self._get_encouragement(learning_difficulty),
+                }
+
         # Check cache first
         cache_key = f"hint:{chapter_id}:{learning_difficulty.value}:{hint_level}"
         cached = await self._cache.get(cache_key)
@@ -168,16 +272,17 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
         )
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=512,
-                messages=[
+            completion = await self._llm.complete(
+                "hint",
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"'{chapter_title}' aktivitesi için ipucu ver."},
                 ],
+                max_tokens=512,
+                scope=UsageScope.of(user_id, profile),
             )
 
-            hint_text = response.choices[0].message.content or ""
+            hint_text = completion.text
 
             result = {
                 "chapter_id": str(chapter_id),
@@ -191,7 +296,7 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
 
             return result
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (hint): {e}")
             return {
                 "chapter_id": str(chapter_id),
@@ -212,48 +317,27 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
         system_prompt = get_analysis_prompt(profile.learning_difficulty, analytics)
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=1024,
-                messages=[
+            completion = await self._llm.complete(
+                "analysis",
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": "Bu öğrencinin performans analizini yap."},
                 ],
+                max_tokens=1024,
+                scope=UsageScope.of(profile.user_id, profile),
+                response_format=response_format_for(AIAnalysisResponse),
             )
 
-            response_text = response.choices[0].message.content or ""
-
-            # Try to parse JSON response
-            try:
-                # Find JSON block in response
-                json_start = response_text.find("{")
-                json_end = response_text.rfind("}") + 1
-                if json_start >= 0 and json_end > json_start:
-                    analysis_data = json.loads(response_text[json_start:json_end])
-                else:
-                    analysis_data = {
-                        "analysis": response_text,
-                        "strengths": [],
-                        "areas_for_improvement": [],
-                        "recommendations": [],
-                        "encouragement_message": "",
-                    }
-            except json.JSONDecodeError:
-                analysis_data = {
-                    "analysis": response_text,
-                    "strengths": [],
-                    "areas_for_improvement": [],
-                    "recommendations": [],
-                    "encouragement_message": "",
-                }
-
-            return {
+            # Identity fields come from the profile, never from the model
+            identity = {
                 "student_id": str(student_id),
                 "learning_difficulty": profile.learning_difficulty.value,
-                **analysis_data,
             }
+            return parse_structured(
+                completion.text, AIAnalysisResponse, overrides=identity
+            )
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (analysis): {e}")
             return {
                 "student_id": str(student_id),
@@ -267,9 +351,4 @@ Cevaplarını bu bölümün konusuyla ilişkilendir ve yardımcı ol.
 
     def _get_encouragement(self, difficulty: LearningDifficulty) -> str:
         """Get a difficulty-specific encouragement message."""
-        messages = {
-            LearningDifficulty.DYSLEXIA: "Her kelimeyi doğru okuduğunda daha da güçleniyorsun! 📚",
-            LearningDifficulty.DYSGRAPHIA: "Her harfi yazdığında daha da ustalaşıyorsun! ✍️",
-            LearningDifficulty.DYSCALCULIA: "Sayılar seninle dost, birlikte çözelim! 🔢",
-        }
-        return messages.get(difficulty, "Çok iyi gidiyorsun! 🌟")
+        return HINT_ENCOURAGEMENTS.get(difficulty, DEFAULT_HINT_ENCOURAGEMENT)
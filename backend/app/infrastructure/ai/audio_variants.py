@@ -0,0 +1,128 @@
+"""
+Compact audio variants for constrained networks.
+ElevenLabs returns full-size MP3; mobile clients on school Wi-Fi can ask
+for Opus or a low-bitrate mono MP3 instead (Accept header or ?format=).
+Variants are transcoded with ffmpeg in a process pool so the event loop
+never encodes audio, and cached next to the original clip. Without an
+ffmpeg binary the original MP3 is served.
+"""
+
+import asyncio
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+ORIGINAL = "mp3"
+ORIGINAL_MEDIA_TYPE = "audio/mpeg"
+
+
+@dataclass(frozen=True)
+class AudioVariant:
+    """One transcoded output format."""
+
+    name: str
+    extension: str
+    media_type: str
+    ffmpeg_args: List[str]
+
+
+def _variants() -> Dict[str, AudioVariant]:
+    return {
+        "opus": AudioVariant(
+            name="opus",
+            extension="ogg",
+            media_type="audio/ogg; codecs=opus",
+            ffmpeg_args=[
+                "-c:a", "libopus", "-b:a", settings.TTS_OPUS_BITRATE,
+                "-application", "voip", "-f", "ogg",
+            ],
+        ),
+        "mp3_low": AudioVariant(
+            name="mp3_low",
+            extension="mp3",
+            media_type="audio/mpeg",
+            ffmpeg_args=[
+                "-c:a", "libmp3lame", "-b:a", settings.TTS_LOW_MP3_BITRATE,
+                "-ac", "1", "-ar", "22050", "-f", "mp3",
+            ],
+        ),
+    }
+
+
+VARIANTS = _variants()
+
+
+def choose_variant(accept: Optional[str], requested: Optional[str]) -> Optional[str]:
+    """
+    Variant a client asked for, or None for the original MP3.
+    ?format= wins over Accept; Accept only selects Opus, since both MP3
+    variants share audio/mpeg.
+    """
+    if requested:
+        return requested if requested in VARIANTS else None
+    if accept:
+        accepted = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+        if "audio/ogg" in accepted or "audio/opus" in accepted:
+            return "opus"
+    return None
+
+
+def media_type_for(variant: Optional[str]) -> str:
+    return VARIANTS[variant].media_type if variant in VARIANTS else ORIGINAL_MEDIA_TYPE
+
+
+def transcode(ffmpeg: str, audio: bytes, args: List[str], timeout: float) -> bytes:
+    """Run ffmpeg over an in-memory clip. Executed in a worker process."""
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", *args, "pipe:1"],
+        input=audio,
+        capture_output=True,
+        timeout=timeout,
+        check=True,
+    )
+    return result.stdout
+
+
+class AudioTranscoder:
+    """Process pool that turns cached MP3 clips into compact variants."""
+
+    def __init__(self, ffmpeg: Optional[str] = None, workers: Optional[int] = None):
+        self._ffmpeg = ffmpeg or shutil.which(settings.FFMPEG_PATH)
+        self._workers = workers or settings.TTS_TRANSCODE_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if settings.TTS_VARIANTS_ENABLED and self._ffmpeg is None:
+            logger.info("ffmpeg not found; TTS audio variants fall back to the original MP3")
+
+    @property
+    def available(self) -> bool:
+        return settings.TTS_VARIANTS_ENABLED and self._ffmpeg is not None
+
+    async def transcode(self, audio: bytes, variant: str) -> bytes:
+        """Encode a clip as the given variant in the process pool."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool,
+            transcode,
+            self._ffmpeg,
+            audio,
+            VARIANTS[variant].ffmpeg_args,
+            settings.TTS_TRANSCODE_TIMEOUT_SECONDS,
+        )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes. Called from the app lifespan."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Singleton transcoder; worker processes start on first use
+audio_transcoder = AudioTranscoder()
@@ -0,0 +1,184 @@
+"""
+Circuit breakers for upstream LLM calls.
+One breaker per (model, endpoint) watches a sliding window of recent calls
+and opens when the error rate or the p95 latency crosses its threshold.
+While open, calls fail immediately with CircuitOpenError so requests drop
+straight to the static fallbacks instead of holding a coroutine and a DB
+session until the provider times out. After a cool-down a single probe
+call is let through; its outcome closes or re-opens the breaker.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import openai
+
+from app.config import settings
+from app.infrastructure.ai.errors import CircuitOpenError
+
+# Provider-side trouble; 4xx request errors say nothing about provider health
+TRIPPING_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.InternalServerError,
+    openai.RateLimitError,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class CircuitBreaker:
+    """Error-rate and p95-latency breaker for one model/endpoint pair."""
+
+    def __init__(
+        self,
+        model: str,
+        endpoint: str,
+        slow_call_seconds: float,
+        window_size: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        error_rate_threshold: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+    ):
+        self.model = model
+        self.endpoint = endpoint
+        self.slow_call_seconds = slow_call_seconds
+        self._min_calls = (
+            settings.LLM_CIRCUIT_MIN_CALLS if min_calls is None else min_calls
+        )
+        self._error_rate_threshold = (
+            settings.LLM_CIRCUIT_ERROR_RATE
+            if error_rate_threshold is None else error_rate_threshold
+        )
+        self._open_seconds = (
+            settings.LLM_CIRCUIT_OPEN_SECONDS if open_seconds is None else open_seconds
+        )
+        # (succeeded, latency seconds or None) per finished call
+        self._window: Deque[Tuple[bool, Optional[float]]] = deque(
+            maxlen=settings.LLM_CIRCUIT_WINDOW if window_size is None else window_size
+        )
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._cooled_down():
+            return HALF_OPEN
+        return self._state
+
+    def _cooled_down(self) -> bool:
+        return time.monotonic() - self._opened_at >= self._open_seconds
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go upstream now."""
+        if self._state == CLOSED:
+            return
+        if self._state == OPEN and self._cooled_down():
+            self._state = HALF_OPEN
+        if self._state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        retry_in = max(0.0, self._open_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.model, self.endpoint, retry_in)
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """A call finished; `latency` is None for streams."""
+        if self._state == HALF_OPEN:
+            self._close()
+        self._window.append((True, latency))
+        self._evaluate()
+
+    def record_failure(self) -> None:
+        """A call failed with a provider-side error."""
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._window.append((False, None))
+        self._evaluate()
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (e.g. cancelled or a 4xx)."""
+        self._probe_in_flight = False
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile of recent successful calls, if enough were seen."""
+        latencies = [lat for ok, lat in self._window if ok and lat is not None]
+        if len(latencies) < self._min_calls:
+            return None
+        return percentile(latencies, pct)
+
+    def _evaluate(self) -> None:
+        if self._state != CLOSED or len(self._window) < self._min_calls:
+            return
+        failures = sum(1 for ok, _ in self._window if not ok)
+        if failures / len(self._window) >= self._error_rate_threshold:
+            self._open()
+            return
+        p95 = self.latency_percentile(95)
+        if p95 is not None and p95 >= self.slow_call_seconds:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._probe_in_flight = False
+        self._window.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        window = list(self._window)
+        failures = sum(1 for ok, _ in window if not ok)
+        p95 = self.latency_percentile(95)
+        return {
+            "model": self.model,
+            "endpoint": self.endpoint,
+            "state": self.state,
+            "calls": len(window),
+            "error_rate": round(failures / len(window), 3) if window else 0.0,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Lazily created breakers keyed by (model, endpoint)."""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, model: str, endpoint: str, timeout: float) -> CircuitBreaker:
+        """Breaker for a pair; a p95 near the endpoint timeout counts as failing."""
+        key = (model, endpoint)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                model,
+                endpoint,
+                slow_call_seconds=timeout * settings.LLM_CIRCUIT_SLOW_FRACTION,
+            )
+            self._breakers[key] = breaker
+        return breaker
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        return [breaker.snapshot() for breaker in self._breakers.values()]
+
+    def open_circuits(self) -> List[str]:
+        """'model/endpoint' of every breaker that is not closed."""
+        return [
+            f"{b.model}/{b.endpoint}"
+            for b in self._breakers.values()
+            if b.state != CLOSED
+        ]
@@ -0,0 +1,195 @@
+"""
+Token-bounded conversation context.
+Keeps the newest turns verbatim within a token budget and folds older
+turns into a rolling summary stored in Redis, so chat prompts stay the
+same size however long a conversation runs.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from app.config import settings
+from app.domain.entities.ai_conversation import AIConversation
+from app.domain.repositories.ai_conversation_repository import AIConversationRepository
+from app.infrastructure.ai.errors import LLM_ERRORS
+from app.infrastructure.ai.llm_gateway import LLMGateway
+from app.infrastructure.ai.prompts import CONTEXT_SUMMARY_PROMPT
+from app.infrastructure.ai.token_budget import UsageScope
+from app.infrastructure.ai.tokens import count_tokens, truncate_to_tokens
+from app.infrastructure.background import spawn
+from app.infrastructure.cache.redis_cache import RedisCache
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class ConversationContextManager:
+    """Builds the history part of a chat prompt for one (user, role_context)."""
+
+    def __init__(
+        self,
+        conversation_repo: AIConversationRepository,
+        cache: RedisCache,
+        llm: LLMGateway,
+    ):
+        self._conversation_repo = conversation_repo
+        self._cache = cache
+        self._llm = llm
+
+    @staticmethod
+    def summary_key(user_id: UUID, role_context: str) -> str:
+        return f"ai:ctx:summary:{user_id}:{role_context}"
+
+    async def build_history(
+        self,
+        user_id: UUID,
+        role_context: str,
+        scope: Optional[UsageScope] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Return prompt messages for past turns: an optional summary message
+        followed by the newest turns that fit the verbatim token budget.
+        Older turns not yet in the summary trigger a background refresh.
+        """
+        turns = await self._conversation_repo.get_recent_context(
+            user_id,
+            limit=settings.AI_CONTEXT_FETCH_TURNS,
+            role_context=role_context,
+        )
+        verbatim = self._select_verbatim(turns)
+        older = turns[: len(turns) - len(verbatim)]
+
+        summary = await self._cache.get(self.summary_key(user_id, role_context))
+        pending = self._unsummarized(older, summary)
+        if pending:
+            spawn(
+                self._refresh_summary(user_id, role_context, summary, pending, scope),
+                name=f"context-summary:{user_id}:{role_context}",
+            )
+
+        messages: List[Dict[str, str]] = []
+        if summary and summary.get("text"):
+            text = truncate_to_tokens(
+                summary["text"], settings.AI_CONTEXT_SUMMARY_TOKEN_BUDGET
+            )
+            messages.append({
+                "role": "system",
+                "content": f"ÖNCEKİ KONUŞMA ÖZETİ:\n{text}",
+            })
+        for turn in verbatim:
+            messages.append({"role": "user", "content": turn.message})
+            messages.append({"role": "assistant", "content": turn.response})
+        return messages
+
+    def _select_verbatim(self, turns: List[AIConversation]) -> List[AIConversation]:
+        """Newest turns (chronological order) that fit the verbatim budget."""
+        budget = settings.AI_CONTEXT_VERBATIM_TOKEN_BUDGET
+        min_turns = settings.AI_CONTEXT_MIN_VERBATIM_TURNS
+        # The guaranteed turns share the budget so one huge turn cannot blow it
+        per_turn_cap = max(1, budget // max(1, min_turns))
+
+        selected: List[AIConversation] = []
+        used = 0
+        for turn in reversed(turns):
+            cost = count_tokens(turn.message) + count_tokens(turn.response)
+            if len(selected) < min_turns and cost > per_turn_cap:
+                turn = self._clip_turn(turn, per_turn_cap)
+                cost = per_turn_cap
+            elif used + cost > budget:
+                break
+            selected.append(turn)
+            used += cost
+        selected.reverse()
+        return selected
+
+    @staticmethod
+    def _clip_turn(turn: AIConversation, max_tokens: int) -> AIConversation:
+        half = max(1, max_tokens // 2)
+        return AIConversation(
+            id=turn.id,
+            user_id=turn.user_id,
+            message=truncate_to_tokens(turn.message, half),
+            response=truncate_to_tokens(turn.response, half),
+            role_context=turn.role_context,
+            timestamp=turn.timestamp,
+        )
+
+    @staticmethod
+    def _unsummarized(
+        older: List[AIConversation], summary: Optional[Dict[str, Any]]
+    ) -> List[AIConversation]:
+        """Older turns newer than the summary's high-water mark."""
+        if not older:
+            return []
+        if not summary or not summary.get("through"):
+            return older
+        through = _as_utc(datetime.fromisoformat(summary["through"]))
+        return [t for t in older if _as_utc(t.timestamp) > through]
+
+    async def _refresh_summary(
+        self,
+        user_id: UUID,
+        role_context: str,
+        summary: Optional[Dict[str, Any]],
+        pending: List[AIConversation],
+        scope: Optional[UsageScope] = None,
+    ) -> None:
+        """Fold pending turns into the stored summary (one refresher per key)."""
+        key = self.summary_key(user_id, role_context)
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not await self._cache.acquire_lock(
+            lock_key, token, settings.AI_CONTEXT_SUMMARY_LOCK_SECONDS
+        ):
+            return
+
+        try:
+            transcript = "\n".join(
+                f"Kullanıcı: {t.message}\nAsistan: {t.response}" for t in pending
+            )
+            previous = summary.get("text", "") if summary else ""
+            max_tokens = settings.AI_CONTEXT_SUMMARY_TOKEN_BUDGET
+            completion = await self._llm.complete(
+                "context_summary",
+                [
+                    {
+                        "role": "system",
+                        "content": CONTEXT_SUMMARY_PROMPT.render(
+                            max_words=max_tokens // 2
+                        ),
+                    },
+                    {
+                        "role": "user",
+                        "content": (
+                            f"MEVCUT ÖZET:\n{previous or '(yok)'}\n\n"
+                            f"YENİ TURLAR:\n{transcript}"
+                        ),
+                    },
+                ],
+                max_tokens=max_tokens,
+                scope=scope,
+            )
+            if not completion.text:
+                return
+
+            await self._cache.set(
+                key,
+                {
+                    "text": completion.text.strip(),
+                    "through": _as_utc(pending[-1].timestamp).isoformat(),
+                },
+                expire_seconds=settings.AI_CONTEXT_SUMMARY_TTL_SECONDS,
+            )
+            logger.debug(
+                f"Context summary refreshed: user={user_id}, role={role_context}, "
+                f"turns={len(pending)}, tokens={completion.tokens}"
+            )
+        except LLM_ERRORS as e:
+            logger.warning(f"Context summary refresh failed: {e}")
+        finally:
+            await self._cache.release_lock(lock_key, token)
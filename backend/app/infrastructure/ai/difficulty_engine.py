@@ -0,0 +1,197 @@
+"""
+Local adaptive-difficulty engine.
+Decides increase / decrease / maintain from a student's recent activity
+results with plain statistics (EWMA, least-squares trend, streaks) and
+per-learning-difficulty thresholds, in microseconds and without tokens.
+The rules mirror the ones the LLM prompt used to apply; the LLM is only
+consulted when a caller asks for a written explanation.
+"""
+
+from dataclasses import dataclass, field
+from statistics import pstdev
+from typing import Any, Dict, List, Sequence
+
+DIFFICULTY_LADDER = ["beginner", "easy", "medium", "hard", "advanced"]
+HISTORY_SIZE = 10
+
+
+@dataclass(frozen=True)
+class DifficultyThresholds:
+    """Decision thresholds for one learning difficulty."""
+
+    increase_score: float = 80.0
+    increase_streak: int = 5
+    decrease_score: float = 40.0
+    decrease_streak: int = 3
+    max_hints: float = 3.0  # mean hints per activity above this → decrease
+    slow_seconds: float = 180.0  # EWMA completion time considered "too long"
+    ewma_alpha: float = 0.4
+
+
+# Reading and handwriting tasks take longer by nature, so the time ceiling
+# is looser there; dyscalculia drills are short and timed more tightly.
+THRESHOLDS: Dict[str, DifficultyThresholds] = {
+    "dyslexia": DifficultyThresholds(slow_seconds=210.0),
+    "dysgraphia": DifficultyThresholds(slow_seconds=270.0, max_hints=3.5),
+    "dyscalculia": DifficultyThresholds(slow_seconds=150.0),
+}
+
+ADJUSTMENTS: Dict[str, Dict[str, List[str]]] = {
+    "dyslexia": {
+        "increase": ["Daha uzun kelimeler ve cümleler ekle", "Görsel destekleri azalt"],
+        "decrease": ["Hece sayısını azalt", "Sesli okuma desteğini aç"],
+        "maintain": ["Aynı seviyede farklı kelimelerle tekrar et"],
+    },
+    "dysgraphia": {
+        "increase": ["Yazılacak metni uzat", "Kılavuz çizgileri incelt"],
+        "decrease": ["Harf sayısını azalt", "Noktalı kılavuzları geri getir"],
+        "maintain": ["Aynı harflerle kısa tekrarlar yap"],
+    },
+    "dyscalculia": {
+        "increase": ["Sayı aralığını genişlet", "Somut nesne desteğini azalt"],
+        "decrease": ["Sayı aralığını küçült", "Sayı doğrusu ve nesne desteği ekle"],
+        "maintain": ["Aynı aralıkta farklı problem tipleri dene"],
+    },
+}
+
+
+@dataclass
+class DifficultyDecision:
+    """Engine output, shaped like the former LLM JSON answer."""
+
+    action: str
+    reason: str
+    confidence: float
+    next_difficulty: str
+    specific_adjustments: List[str] = field(default_factory=list)
+    signals: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "action": self.action,
+            "reason": self.reason,
+            "confidence": self.confidence,
+            "next_difficulty": self.next_difficulty,
+            "specific_adjustments": list(self.specific_adjustments),
+            "signals": dict(self.signals),
+        }
+
+
+def _number(entry: Dict[str, Any], key: str) -> float:
+    try:
+        return float(entry.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def ewma(values: Sequence[float], alpha: float) -> float:
+    """Exponentially weighted mean, newest value weighted most."""
+    average = values[0]
+    for value in values[1:]:
+        average = alpha * value + (1 - alpha) * average
+    return average
+
+
+def trend(values: Sequence[float]) -> float:
+    """Least-squares slope per activity (0 for fewer than two points)."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    variance = sum((x - mean_x) ** 2 for x in range(n))
+    return covariance / variance
+
+
+def trailing_streak(values: Sequence[float], predicate) -> int:
+    """How many of the newest values in a row satisfy `predicate`."""
+    streak = 0
+    for value in reversed(values):
+        if not predicate(value):
+            break
+        streak += 1
+    return streak
+
+
+def _ladder_index(current_level: int) -> int:
+    return max(0, min(len(DIFFICULTY_LADDER) - 1, current_level - 1))
+
+
+def decide(
+    recent_performance: List[Dict[str, Any]],
+    learning_difficulty: str,
+    current_level: int = 1,
+) -> DifficultyDecision:
+    """Recommend a difficulty change from the newest activity results."""
+    limits = THRESHOLDS.get(learning_difficulty, DifficultyThresholds())
+    adjustments = ADJUSTMENTS.get(learning_difficulty, ADJUSTMENTS["dyslexia"])
+    index = _ladder_index(current_level)
+
+    history = recent_performance[-HISTORY_SIZE:]
+    if not history:
+        return DifficultyDecision(
+            action="maintain",
+            reason="Henüz yeterli performans verisi yok, mevcut seviye korunuyor.",
+            confidence=0.5,
+            next_difficulty=DIFFICULTY_LADDER[index],
+            specific_adjustments=adjustments["maintain"],
+        )
+
+    scores = [_number(p, "score") for p in history]
+    hints = [_number(p, "hints_used") for p in history]
+    times = [_number(p, "time_seconds") for p in history]
+    errors = [_number(p, "errors") for p in history]
+
+    signals = {
+        "score_ewma": round(ewma(scores, limits.ewma_alpha), 2),
+        "score_trend": round(trend(scores), 2),
+        "hints_mean": round(sum(hints) / len(hints), 2),
+        "time_ewma": round(ewma(times, limits.ewma_alpha), 2),
+        "errors_mean": round(sum(errors) / len(errors), 2),
+        "high_streak": trailing_streak(scores, lambda s: s >= limits.increase_score),
+        "low_streak": trailing_streak(scores, lambda s: s <= limits.decrease_score),
+    }
+
+    if signals["high_streak"] >= limits.increase_streak:
+        action, base = "increase", 0.9
+        reason = f"Üst üste {signals['high_streak']} aktivitede {limits.increase_score:.0f}+ puan."
+    elif signals["low_streak"] >= limits.decrease_streak:
+        action, base = "decrease", 0.9
+        reason = f"Üst üste {signals['low_streak']} aktivitede {limits.decrease_score:.0f} altı puan."
+    elif signals["hints_mean"] > limits.max_hints:
+        action, base = "decrease", 0.8
+        reason = f"Aktivite başına ortalama {signals['hints_mean']:.1f} ipucu kullanılıyor."
+    elif signals["time_ewma"] > limits.slow_seconds:
+        action = "decrease" if signals["score_ewma"] < 60 else "maintain"
+        base = 0.7
+        reason = "Tamamlama süreleri uzun; seviye hızlı ilerlemeye uygun değil."
+    elif signals["score_ewma"] >= 85 and signals["score_trend"] >= 0 and len(scores) >= 3:
+        action, base = "increase", 0.7
+        reason = "Puanlar yüksek ve yükselen bir eğilimde."
+    elif signals["score_ewma"] <= 45 and signals["score_trend"] <= 0 and len(scores) >= 3:
+        action, base = "decrease", 0.7
+        reason = "Puanlar düşük ve düşen bir eğilimde."
+    else:
+        action, base = "maintain", 0.65
+        reason = "Sonuçlar karışık; mevcut seviye uygun görünüyor."
+
+    # Fewer data points and noisier scores lower the confidence
+    coverage = min(1.0, len(scores) / 5)
+    consistency = max(0.0, 1.0 - pstdev(scores) / 50) if len(scores) > 1 else 0.5
+    confidence = base * (0.6 + 0.4 * coverage) * (0.7 + 0.3 * consistency)
+    confidence = round(max(0.3, min(0.95, confidence)), 2)
+
+    if action == "increase":
+        index = min(len(DIFFICULTY_LADDER) - 1, index + 1)
+    elif action == "decrease":
+        index = max(0, index - 1)
+
+    return DifficultyDecision(
+        action=action,
+        reason=reason,
+        confidence=confidence,
+        next_difficulty=DIFFICULTY_LADDER[index],
+        specific_adjustments=adjustments[action],
+        signals=signals,
+    )
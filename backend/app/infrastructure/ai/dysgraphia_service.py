@@ -6,14 +6,18 @@ spelling help, story idea generation, and composition feedback.
 Evidence-based: Graham & Harris (2005), MacArthur (2009), Morphy & Graham (2012)
 """
 
-import json
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from uuid import UUID
 
-import openai
 from loguru import logger
 
-from app.config import settings
+from app.application.dtos.dysgraphia_dtos import (
+    CompositionFeedbackResponse,
+    SentenceCheckResponse,
+    SpellingHelpResponse,
+    StoryIdeasResponse,
+)
 from app.domain.entities.ai_conversation import AIConversation
 from app.domain.repositories.ai_conversation_repository import AIConversationRepository
 from app.domain.repositories.progress_repository import ProgressRepository
@@ -26,6 +30,10 @@ from app.infrastructure.ai.dysgraphia_prompts import (
     SPELLING_HELP_PROMPT,
     STORY_IDEAS_PROMPT,
 )
+from app.infrastructure.ai.errors import LLM_ERRORS, StructuredOutputError
+from app.infrastructure.ai.llm_gateway import LLMGateway
+from app.infrastructure.ai.structured_output import parse_structured, response_format_for
+from app.infrastructure.ai.token_budget import usage_scope_for
 from app.infrastructure.cache.redis_cache import RedisCache
 
 
@@ -38,31 +46,13 @@ class DysgraphiaAIService:
         profile_repo: StudentProfileRepository,
         progress_repo: ProgressRepository,
         cache: RedisCache,
+        llm: LLMGateway,
     ):
         self._conversation_repo = conversation_repo
         self._profile_repo = profile_repo
         self._progress_repo = progress_repo
         self._cache = cache
-        self._client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-
-    def _parse_json_response(self, text: str) -> Dict[str, Any]:
-        """Extract JSON from AI response text."""
-        try:
-            json_start = text.find("{")
-            json_end = text.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                return json.loads(text[json_start:json_end])
-        except json.JSONDecodeError:
-            pass
-        # Try array
-        try:
-            arr_start = text.find("[")
-            arr_end = text.rfind("]") + 1
-            if arr_start >= 0 and arr_end > arr_start:
-                return {"items": json.loads(text[arr_start:arr_end])}
-        except json.JSONDecodeError:
-            pass
-        return {"raw_response": text}
+        self._llm = llm
 
     async def check_sentence(
         self,
@@ -74,24 +64,31 @@ class DysgraphiaAIService:
         Check a student's sentence for errors with dysgraphia-sensitive feedback.
         Focus on content first, mechanics second.
         """
-        prompt = SENTENCE_CHECK_PROMPT.format(
+        prompt = SENTENCE_CHECK_PROMPT.render(
             sentence=sentence,
             focus_area=focus_area,
         )
+        parse = partial(
+            parse_structured,
+            dto=SentenceCheckResponse,
+            defaults={"corrected_sentence": sentence},
+        )
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=512,
-                messages=[
+            completion = await self._llm.complete(
+                "sentence_check",
+                [
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"Bu cümleyi kontrol et: '{sentence}'"},
                 ],
+                max_tokens=512,
+                scope=await usage_scope_for(self._profile_repo, user_id),
+                response_format=response_format_for(SentenceCheckResponse),
+                validate=parse,
             )
 
-            result_text = response.choices[0].message.content or ""
-            tokens = response.usage.total_tokens if response.usage else 0
-            result = self._parse_json_response(result_text)
+            result_text = completion.text
+            tokens = completion.tokens
 
             # Save conversation
             await self._conversation_repo.create(AIConversation(
@@ -102,11 +99,12 @@ class DysgraphiaAIService:
                 role_context="student",
                 tokens_used=tokens,
             ))
+            result = parse(result_text)
 
             logger.info(f"Sentence check: user={user_id}, errors={len(result.get('errors', []))}")
             return result
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (sentence check): {e}")
             return {
                 "praise": "Güzel bir cümle yazmışsın!",
@@ -125,21 +123,23 @@ class DysgraphiaAIService:
         Provide spelling help without giving the answer directly.
         Uses phonetic breakdown, syllable segmentation, and rule hints.
         """
-        prompt = SPELLING_HELP_PROMPT.format(word=word, context=context)
+        prompt = SPELLING_HELP_PROMPT.render(word=word, context=context)
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=512,
-                messages=[
+            completion = await self._llm.complete(
+                "spelling_help",
+                [
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"'{word}' kelimesini yazmak istiyorum."},
                 ],
+                max_tokens=512,
+                scope=await usage_scope_for(self._profile_repo, user_id),
+                response_format=response_format_for(SpellingHelpResponse),
+                validate=partial(parse_structured, dto=SpellingHelpResponse),
             )
 
-            result_text = response.choices[0].message.content or ""
-            tokens = response.usage.total_tokens if response.usage else 0
-            result = self._parse_json_response(result_text)
+            result_text = completion.text
+            tokens = completion.tokens
 
             await self._conversation_repo.create(AIConversation(
                 user_id=user_id,
@@ -149,11 +149,12 @@ class DysgraphiaAIService:
                 role_context="student",
                 tokens_used=tokens,
             ))
+            result = parse_structured(result_text, SpellingHelpResponse)
 
             logger.info(f"Spelling help: user={user_id}, word={word}")
             return result
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (spelling help): {e}")
             return {
                 "syllables": word,
@@ -174,21 +175,23 @@ class DysgraphiaAIService:
         """
         Generate story ideas for writing planning with graphic organizer support.
         """
-        prompt = STORY_IDEAS_PROMPT.format(topic=topic, age=student_age)
+        prompt = STORY_IDEAS_PROMPT.render(topic=topic, age=student_age)
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=1024,
-                messages=[
+            completion = await self._llm.complete(
+                "story_ideas",
+                [
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"'{topic}' konusunda hikaye fikirleri üret."},
                 ],
+                max_tokens=1024,
+                scope=await usage_scope_for(self._profile_repo, user_id),
+                response_format=response_format_for(StoryIdeasResponse),
+                validate=partial(parse_structured, dto=StoryIdeasResponse),
             )
 
-            result_text = response.choices[0].message.content or ""
-            tokens = response.usage.total_tokens if response.usage else 0
-            parsed = self._parse_json_response(result_text)
+            result_text = completion.text
+            tokens = completion.tokens
 
             await self._conversation_repo.create(AIConversation(
                 user_id=user_id,
@@ -199,14 +202,12 @@ class DysgraphiaAIService:
                 tokens_used=tokens,
             ))
 
-            # Return as list
-            if "items" in parsed:
-                return parsed["items"]
-            elif isinstance(parsed, list):
-                return parsed
-            return [parsed]
+            ideas = parse_structured(result_text, StoryIdeasResponse)["ideas"]
+            if not ideas:
+                raise StructuredOutputError("StoryIdeasResponse", "no ideas")
+            return ideas
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (story ideas): {e}")
             return [
                 {
@@ -242,21 +243,28 @@ class DysgraphiaAIService:
         Provide comprehensive composition feedback using rubric-based assessment.
         Prioritizes ideas and organization over mechanics for dysgraphia students.
         """
-        prompt = COMPOSITION_FEEDBACK_PROMPT.format(text=text, task_type=task_type)
+        prompt = COMPOSITION_FEEDBACK_PROMPT.render(text=text, task_type=task_type)
+        parse = partial(
+            parse_structured,
+            dto=CompositionFeedbackResponse,
+            defaults={"word_count": len(text.split())},
+        )
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                max_tokens=1024,
-                messages=[
+            completion = await self._llm.complete(
+                "composition_feedback",
+                [
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"Bu yazıyı değerlendir:\n\n{text}"},
                 ],
+                max_tokens=1024,
+                scope=await usage_scope_for(self._profile_repo, user_id),
+                response_format=response_format_for(CompositionFeedbackResponse),
+                validate=parse,
             )
 
-            result_text = response.choices[0].message.content or ""
-            tokens = response.usage.total_tokens if response.usage else 0
-            result = self._parse_json_response(result_text)
+            result_text = completion.text
+            tokens = completion.tokens
 
             await self._conversation_repo.create(AIConversation(
                 user_id=user_id,
@@ -266,11 +274,12 @@ class DysgraphiaAIService:
                 role_context="student",
                 tokens_used=tokens,
             ))
+            result = parse(result_text)
 
             logger.info(f"Composition feedback: user={user_id}, words={len(text.split())}")
             return result
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (composition): {e}")
             return {
                 "scores": {"ideas": 3, "organization": 3, "sentence_structure": 3, "mechanics": 2, "total": 11},
@@ -291,26 +300,18 @@ class DysgraphiaAIService:
         """
         Real-time writing coach interaction for dysgraphia students.
         """
-        prompt = DYSGRAPHIA_WRITING_COACH_PROMPT.format(writing_task=writing_task)
-
-        # Get recent conversation history
-        recent = await self._conversation_repo.get_recent_context(user_id, limit=4)
-        messages = [{"role": "system", "content": prompt}]
-        for conv in recent:
-            if "[Yazma Koçu]" in conv.message:
-                messages.append({"role": "user", "content": conv.message.replace("[Yazma Koçu] ", "")})
-                messages.append({"role": "assistant", "content": conv.response})
-        messages.append({"role": "user", "content": message})
+        messages = await self._build_coach_messages(user_id, message, writing_task)
 
         try:
-            response = await self._client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
+            completion = await self._llm.complete(
+                "writing_coach",
+                messages,
                 max_tokens=256,
-                messages=messages,
+                scope=await usage_scope_for(self._profile_repo, user_id),
             )
 
-            ai_response = response.choices[0].message.content or ""
-            tokens = response.usage.total_tokens if response.usage else 0
+            ai_response = completion.text
+            tokens = completion.tokens
 
             await self._conversation_repo.create(AIConversation(
                 user_id=user_id,
@@ -326,9 +327,74 @@ class DysgraphiaAIService:
                 "tokens_used": tokens,
             }
 
-        except openai.APIError as e:
+        except LLM_ERRORS as e:
             logger.error(f"OpenAI API error (writing coach): {e}")
             return {
                 "response": "Yazmaya devam et, harika gidiyorsun! Takılırsan bana sor. ✍️",
                 "tokens_used": 0,
             }
+
+    async def writing_coach_stream(
+        self,
+        user_id: UUID,
+        message: str,
+        writing_task: str = "serbest yazma",
+    ) -> AsyncIterator[Union[str, AIConversation]]:
+        """
+        Streaming variant of writing_coach().
+        Yields text deltas as they arrive, then the saved AIConversation
+        once the completion has finished.
+        """
+        messages = await self._build_coach_messages(user_id, message, writing_task)
+
+        stream = self._llm.stream(
+            "writing_coach",
+            messages,
+            max_tokens=256,
+            scope=await usage_scope_for(self._profile_repo, user_id),
+        )
+        try:
+            async for delta in stream:
+                yield delta
+        except LLM_ERRORS as e:
+            logger.error(f"OpenAI API error (writing coach stream): {e}")
+            if not stream.result.text:
+                fallback_text = "Yazmaya devam et, harika gidiyorsun! Takılırsan bana sor. ✍️"
+                yield fallback_text
+                yield AIConversation(
+                    user_id=user_id,
+                    message=f"[Yazma Koçu] {message}",
+                    response=fallback_text,
+                    context={"type": "writing_coach", "task": writing_task, "error": str(e)},
+                    role_context="student",
+                    tokens_used=0,
+                )
+                return
+
+        yield await self._conversation_repo.create(AIConversation(
+            user_id=user_id,
+            message=f"[Yazma Koçu] {message}",
+            response=stream.result.text,
+            context={"type": "writing_coach", "task": writing_task},
+            role_context="student",
+            tokens_used=stream.result.tokens,
+        ))
+
+    async def _build_coach_messages(
+        self,
+        user_id: UUID,
+        message: str,
+        writing_task: str,
+    ) -> List[Dict[str, str]]:
+        """Build the writing coach prompt with recent coach turns."""
+        prompt = DYSGRAPHIA_WRITING_COACH_PROMPT.render(writing_task=writing_task)
+
+        # Get recent conversation history
+        recent = await self._conversation_repo.get_recent_context(user_id, limit=4)
+        messages = [{"role": "system", "content": prompt}]
+        for conv in recent:
+            if "[Yazma Koçu]" in conv.message:
+                messages.append({"role": "user", "content": conv.message.replace("[Yazma Koçu] ", "")})
+                messages.append({"role": "assistant", "content": conv.response})
+        messages.append({"role": "user", "content": message})
+        return messages
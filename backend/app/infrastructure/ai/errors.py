@@ -0,0 +1,56 @@
+"""
+Errors raised by the LLM gateway instead of calling the provider, or when
+a completion cannot be used. Services catch LLM_ERRORS wherever they
+already catch openai.APIError, so every refusal lands on the same static
+fallback payloads.
+"""
+
+import openai
+
+
+class LLMUnavailableError(Exception):
+    """The gateway declined to call the provider."""
+
+
+class TokenBudgetExceeded(LLMUnavailableError):
+    """The user's or school's daily token budget is used up."""
+
+    def __init__(self, scope: str, used: int, limit: int):
+        super().__init__(f"Daily token budget exceeded for {scope}: {used}/{limit}")
+        self.scope = scope
+        self.used = used
+        self.limit = limit
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """The provider is failing or too slow for this model and endpoint."""
+
+    def __init__(self, model: str, endpoint: str, retry_in: float):
+        super().__init__(
+            f"Circuit open for {model}/{endpoint}; retry in {retry_in:.0f}s"
+        )
+        self.model = model
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class LaneSaturatedError(LLMUnavailableError):
+    """The scheduler lane for this kind of work is full or waited too long."""
+
+    def __init__(self, lane: str, reason: str):
+        super().__init__(f"LLM lane '{lane}' saturated: {reason}")
+        self.lane = lane
+        self.reason = reason
+
+
+class StructuredOutputError(LLMUnavailableError):
+    """The completion is not valid JSON for the endpoint's response schema."""
+
+    def __init__(self, schema: str, detail: str):
+        super().__init__(f"Completion does not match {schema}: {detail}")
+        self.schema = schema
+        self.detail = detail
+
+
+# Everything a service should treat as "AI unavailable, use the fallback"
+LLM_ERRORS = (openai.APIError, LLMUnavailableError)
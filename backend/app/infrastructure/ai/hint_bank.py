@@ -0,0 +1,241 @@
+"""
+Offline hint bank.
+Chapter hints depend only on (chapter, learning difficulty, hint level), a
+small fixed space, so several variants per bucket are generated ahead of
+time and served round-robin without an LLM call. Each bucket stores a
+fingerprint of the prompt it was generated from; when a chapter's title,
+activity type or the hint prompt changes, the stale bucket is regenerated
+in the background while requests fall back to the live path.
+"""
+
+import hashlib
+import json
+import random
+import re
+import uuid
+from typing import List, Optional
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.domain.entities.enums import LearningDifficulty
+from app.domain.repositories.hint_bank_repository import HintBankRepository
+from app.infrastructure.ai.errors import LLM_ERRORS
+from app.infrastructure.ai.llm_gateway import LLMGateway, llm_gateway
+from app.infrastructure.ai.prompts import get_hint_prompt
+from app.infrastructure.background import spawn
+from app.infrastructure.cache.redis_cache import RedisCache, redis_cache
+from app.infrastructure.database.hint_bank_repository_impl import (
+    SQLAlchemyHintBankRepository,
+)
+from app.infrastructure.database.session import async_session_factory
+
+HINT_LEVELS = (1, 2, 3)
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def hint_fingerprint(
+    learning_difficulty: LearningDifficulty,
+    chapter_title: str,
+    activity_type: str,
+    hint_level: int,
+) -> str:
+    """Hash of the exact prompt a bucket is generated from."""
+    prompt = get_hint_prompt(learning_difficulty, chapter_title, activity_type, hint_level)
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:32]
+
+
+def _bucket_key(chapter_id: UUID, learning_difficulty: LearningDifficulty, hint_level: int) -> str:
+    return f"hint_bank:{chapter_id}:{learning_difficulty.value}:{hint_level}"
+
+
+def parse_hint_list(text: str) -> List[str]:
+    """Read the generated variants: a JSON string array, else one hint per line."""
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start:
+        try:
+            items = json.loads(text[start:end + 1])
+            hints = [str(item).strip() for item in items if str(item).strip()]
+            if hints:
+                return hints
+        except json.JSONDecodeError:
+            pass
+    return [
+        _BULLET.sub("", line).strip()
+        for line in text.splitlines()
+        if _BULLET.sub("", line).strip()
+    ]
+
+
+class HintBankGenerator:
+    """Generates and stores hint variants, one bucket per LLM call."""
+
+    def __init__(
+        self,
+        llm: LLMGateway,
+        cache: RedisCache,
+        session_factory: async_sessionmaker[AsyncSession],
+        variants: Optional[int] = None,
+    ):
+        self._llm = llm
+        self._cache = cache
+        self._session_factory = session_factory
+        self._variants = variants or settings.HINT_BANK_VARIANTS
+
+    async def generate_bucket(
+        self,
+        learning_difficulty: LearningDifficulty,
+        chapter_title: str,
+        activity_type: str,
+        hint_level: int,
+    ) -> List[str]:
+        """Ask the LLM for distinct variants of one hint."""
+        completion = await self._llm.complete(
+            "hint_bank",
+            [
+                {
+                    "role": "system",
+                    "content": get_hint_prompt(
+                        learning_difficulty, chapter_title, activity_type, hint_level
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"'{chapter_title}' aktivitesi için birbirinden farklı "
+                        f"{self._variants} ipucu yaz. Sadece JSON dizi döndür: "
+                        '["ipucu 1", "ipucu 2"]'
+                    ),
+                },
+            ],
+            max_tokens=256 * self._variants,
+        )
+        return parse_hint_list(completion.text)[: self._variants]
+
+    async def generate_chapter(
+        self,
+        chapter_id: UUID,
+        chapter_title: str,
+        activity_type: str,
+        force: bool = False,
+    ) -> int:
+        """
+        Fill every (learning difficulty, hint level) bucket of a chapter whose
+        fingerprint is missing or stale. Returns the number of buckets written.
+        """
+        async with self._session_factory() as session:
+            existing = await SQLAlchemyHintBankRepository(session).fingerprints(chapter_id)
+
+        written = 0
+        for learning_difficulty in LearningDifficulty:
+            for hint_level in HINT_LEVELS:
+                fingerprint = hint_fingerprint(
+                    learning_difficulty, chapter_title, activity_type, hint_level
+                )
+                if not force and existing.get((learning_difficulty, hint_level)) == fingerprint:
+                    continue
+                try:
+                    hints = await self.generate_bucket(
+                        learning_difficulty, chapter_title, activity_type, hint_level
+                    )
+                except LLM_ERRORS as e:
+                    logger.warning(
+                        f"Hint bank generation failed: chapter={chapter_id}, "
+                        f"difficulty={learning_difficulty.value}, level={hint_level}: {e}"
+                    )
+                    continue
+                if not hints:
+                    continue
+
+                async with self._session_factory() as session:
+                    await SQLAlchemyHintBankRepository(session).replace_variants(
+                        chapter_id, learning_difficulty, hint_level, hints, fingerprint
+                    )
+                    await session.commit()
+                await self._cache.delete(
+                    _bucket_key(chapter_id, learning_difficulty, hint_level)
+                )
+                written += 1
+        return written
+
+    def schedule(self, chapter_id: UUID, chapter_title: str, activity_type: str) -> None:
+        """Regenerate a chapter's stale buckets in the background (once per chapter)."""
+        spawn(
+            self._regenerate(chapter_id, chapter_title, activity_type),
+            name=f"hint-bank:{chapter_id}",
+        )
+
+    async def _regenerate(
+        self, chapter_id: UUID, chapter_title: str, activity_type: str
+    ) -> None:
+        lock_key = f"hint_bank:regen:{chapter_id}"
+        token = uuid.uuid4().hex
+        if not await self._cache.acquire_lock(
+            lock_key, token, settings.HINT_BANK_REGEN_LOCK_SECONDS
+        ):
+            return
+        try:
+            written = await self.generate_chapter(chapter_id, chapter_title, activity_type)
+            if written:
+                logger.info(f"Hint bank regenerated: chapter={chapter_id}, buckets={written}")
+        finally:
+            await self._cache.release_lock(lock_key, token)
+
+
+class HintBank:
+    """Serves banked hints round-robin; misses schedule regeneration."""
+
+    def __init__(
+        self,
+        repository: HintBankRepository,
+        cache: RedisCache,
+        generator: HintBankGenerator,
+    ):
+        self._repository = repository
+        self._cache = cache
+        self._generator = generator
+
+    async def pick(
+        self,
+        chapter_id: UUID,
+        learning_difficulty: LearningDifficulty,
+        chapter_title: str,
+        activity_type: str,
+        hint_level: int,
+    ) -> Optional[str]:
+        """Next banked variant for the bucket, or None if missing or stale."""
+        fingerprint = hint_fingerprint(
+            learning_difficulty, chapter_title, activity_type, hint_level
+        )
+        key = _bucket_key(chapter_id, learning_difficulty, hint_level)
+
+        bucket = await self._cache.get(key)
+        if bucket is None:
+            entries = await self._repository.list_variants(
+                chapter_id, learning_difficulty, hint_level
+            )
+            bucket = {
+                "fingerprint": entries[0].fingerprint if entries else "",
+                "hints": [e.hint for e in entries],
+            }
+            await self._cache.set(
+                key, bucket, expire_seconds=settings.HINT_BANK_CACHE_TTL_SECONDS
+            )
+
+        hints = bucket["hints"]
+        if not hints or bucket["fingerprint"] != fingerprint:
+            self._generator.schedule(chapter_id, chapter_title, activity_type)
+            return None
+
+        turn = await self._cache.incr(
+            f"{key}:rr", expire_seconds=settings.HINT_BANK_CACHE_TTL_SECONDS
+        )
+        index = (turn - 1) if turn is not None else random.randrange(len(hints))
+        return hints[index % len(hints)]
+
+
+# Singleton generator used by request-time regeneration and the batch job
+hint_bank_generator = HintBankGenerator(llm_gateway, redis_cache, async_session_factory)
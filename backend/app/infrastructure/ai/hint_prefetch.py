@@ -0,0 +1,89 @@
+"""
+Speculative prefetch of escalated activity hints.
+The hint level follows the attempt number, so a level-1 request is almost
+always followed by levels 2 and 3 for the same problem within seconds.
+While the child reads the first hint, the higher levels are generated in
+the background and parked in Redis under a key that ignores the (changing)
+answer, so the escalated hint comes back without an LLM round trip.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.ai.errors import LLM_ERRORS
+from app.infrastructure.background import spawn
+from app.infrastructure.cache.redis_cache import RedisCache, redis_cache
+
+
+def prefetch_key(student_id: UUID, chapter_id: str, problem: dict, hint_level: int) -> str:
+    """Key for one student's hint at one level of one problem."""
+    digest = hashlib.sha256(
+        json.dumps(problem, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()[:24]
+    return f"activity_hint:prefetch:{student_id}:{chapter_id}:{digest}:{hint_level}"
+
+
+class HintPrefetcher:
+    """Runs hint generations ahead of time and hands them to the next request."""
+
+    def __init__(self, cache: RedisCache):
+        self._cache = cache
+        # Same-process generations still running, so a fast follow-up waits
+        # for the speculative call instead of issuing a duplicate
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def take(self, key: str) -> Optional[Dict[str, Any]]:
+        """Prefetched hint payload for a key (consumed), or None."""
+        task = self._inflight.get(key)
+        if task is not None:
+            try:
+                payload = await asyncio.wait_for(
+                    asyncio.shield(task), settings.ACTIVITY_HINT_PREFETCH_WAIT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                return None
+            except Exception:
+                payload = None  # failed generation; an earlier one may be parked
+            if payload is not None:
+                # Use the generated payload even if parking it in Redis failed
+                await self._cache.delete(key)
+                return payload
+        payload = await self._cache.get(key)
+        if payload is not None:
+            await self._cache.delete(key)
+        return payload
+
+    def schedule(
+        self, key: str, generate: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> None:
+        """Generate a payload in the background and park it under `key`."""
+        if key in self._inflight:
+            return
+        task = spawn(self._run(key, generate), name=f"hint-prefetch:{key}")
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def _run(
+        self, key: str, generate: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        if await self._cache.exists(key):
+            return None  # already parked by an earlier request
+        try:
+            payload = await generate()
+        except LLM_ERRORS as e:
+            logger.debug(f"Hint prefetch skipped ({key}): {e}")
+            return None
+        await self._cache.set(
+            key, payload, expire_seconds=settings.ACTIVITY_HINT_PREFETCH_TTL_SECONDS
+        )
+        return payload
+
+
+# Singleton prefetcher; the in-flight map must be shared by all requests
+hint_prefetcher = HintPrefetcher(redis_cache)
@@ -0,0 +1,118 @@
+"""
+Incremental JSON field reader for streamed completions.
+Structured answers arrive as a JSON object token by token; waiting for
+the closing brace would hide the text the child is waiting for. The
+reader follows the object character by character and hands out the
+decoded text of selected top-level string fields (e.g. `hint`,
+`encouragement`) as soon as it is generated.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+@dataclass(frozen=True)
+class FieldDelta:
+    """New text for one top-level string field."""
+
+    field: str
+    text: str
+
+
+class JSONFieldStream:
+    """Feeds completion deltas and returns text of the watched fields."""
+
+    def __init__(self, fields: Iterable[str]):
+        self._fields = set(fields)
+        self._depth = 0
+        self._expect_key = False
+        self._in_string = False
+        self._role: Optional[str] = None  # "key", "value" or None (nested/ignored)
+        self._key_chars: List[str] = []
+        self._key: Optional[str] = None
+        self._escape: Optional[str] = None  # pending escape after a backslash
+        self._high_surrogate: Optional[int] = None
+        # Full text seen so far for every watched field
+        self.values: Dict[str, str] = {}
+
+    def feed(self, chunk: str) -> List[FieldDelta]:
+        """Consume a delta; return new text per watched field, in order."""
+        out: List[FieldDelta] = []
+        for char in chunk:
+            if self._in_string:
+                self._string_char(char, out)
+            else:
+                self._structural_char(char)
+        return out
+
+    def _structural_char(self, char: str) -> None:
+        if char in "{[":
+            self._depth += 1
+            if char == "{" and self._depth == 1:
+                self._expect_key = True
+        elif char in "}]":
+            self._depth -= 1
+        elif self._depth == 1 and char == ":":
+            self._expect_key = False
+        elif self._depth == 1 and char == ",":
+            self._expect_key = True
+        elif char == '"':
+            self._in_string = True
+            if self._depth != 1:
+                self._role = None
+            elif self._expect_key:
+                self._role = "key"
+                self._key_chars = []
+            else:
+                self._role = "value"
+                if self._key in self._fields:
+                    self.values.setdefault(self._key, "")
+
+    def _string_char(self, char: str, out: List[FieldDelta]) -> None:
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] == "u":
+                if len(self._escape) < 5:
+                    return
+                decoded = self._decode_unicode(self._escape[1:])
+            else:
+                decoded = _ESCAPES.get(self._escape, self._escape)
+            self._escape = None
+            if decoded:
+                self._emit(decoded, out)
+            return
+        if char == "\\":
+            self._escape = ""
+        elif char == '"':
+            self._in_string = False
+            if self._role == "key":
+                self._key = "".join(self._key_chars)
+        else:
+            self._emit(char, out)
+
+    def _decode_unicode(self, digits: str) -> str:
+        try:
+            code = int(digits, 16)
+        except ValueError:
+            return ""
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        return chr(code)
+
+    def _emit(self, text: str, out: List[FieldDelta]) -> None:
+        if self._role == "key":
+            self._key_chars.append(text)
+            return
+        if self._role != "value" or self._key not in self._fields:
+            return
+        self.values[self._key] += text
+        if out and out[-1].field == self._key:
+            out[-1] = FieldDelta(self._key, out[-1].text + text)
+        else:
+            out.append(FieldDelta(self._key, text))
@@ -0,0 +1,585 @@
+"""
+Shared LLM gateway.
+Owns a single pooled OpenAI client for the whole process, applies
+per-endpoint timeout/retry policies and schedules upstream calls through
+priority lanes so interactive work is never starved by reports.
+Upstream calls pass through a per-model/endpoint circuit breaker, and
+short idempotent endpoints may send a hedged second request when the
+first one runs past the recent latency percentile. JSON endpoints may
+pass an OpenAI `response_format` (see structured_output) to get
+schema-shaped answers. Each endpoint runs on a model tier with a
+max_tokens cap and a latency SLO; the model router (see model_router)
+moves it to a faster tier while the SLO is broken.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+import openai
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.ai.circuit_breaker import (
+    CLOSED,
+    TRIPPING_ERRORS,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+)
+from app.infrastructure.ai.errors import StructuredOutputError
+from app.infrastructure.ai.model_router import FAST_TIER, STANDARD_TIER, ModelRouter
+from app.infrastructure.ai.response_cache import PromptResponseCache, make_prompt_key
+from app.infrastructure.ai.scheduler import BACKGROUND, INTERACTIVE, STANDARD, LLMScheduler
+from app.infrastructure.ai.token_budget import TokenBudget, UsageScope, token_budget
+from app.infrastructure.cache.redis_cache import redis_cache
+from app.infrastructure.cache.single_flight import SingleFlight, single_flight
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    """Model, timeout, retry and response-cache policy for a single AI operation."""
+
+    timeout: float
+    max_retries: int
+    cache_ttl: int = 0  # seconds; 0 disables the prompt-response cache
+    cache_casefold: bool = True  # False when letter case changes the answer
+    hedge: bool = False  # send a backup request when the first one is slow
+    lane: str = STANDARD  # scheduler lane (see scheduler.LANE_PRIORITY)
+    tier: str = STANDARD_TIER  # model tier (see model_router.TIER_ORDER)
+    max_tokens: Optional[int] = None  # upper bound on the caller's max_tokens
+    latency_slo: float = 0.0  # seconds; a slower primary falls back a tier
+
+    def cap_tokens(self, max_tokens: int) -> int:
+        return min(max_tokens, self.max_tokens) if self.max_tokens else max_tokens
+
+
+# Interactive endpoints fail fast so the static fallback reaches the child
+# quickly; report-style endpoints are allowed to take longer. Only endpoints
+# whose answer depends on the prompt alone are cached — chat-style
+# conversations and per-student reports always go upstream. Hedging is
+# limited to short, idempotent prompts where a duplicate request is cheap.
+# Lanes follow who is waiting: a child mid-activity (interactive), a user
+# on a page (standard), or nobody in particular (background). Short,
+# template-shaped answers run on the fast tier; open-ended feedback and
+# reports stay on the standard tier and, where someone is waiting, carry a
+# p95 latency SLO that sends them to the fast tier when it is broken.
+ENDPOINT_POLICIES: Dict[str, EndpointPolicy] = {
+    # AIService
+    "chat": EndpointPolicy(timeout=30.0, max_retries=1, latency_slo=12.0),
+    "hint": EndpointPolicy(
+        timeout=10.0, max_retries=1, cache_ttl=3600, hedge=True, lane=INTERACTIVE,
+        tier=FAST_TIER, max_tokens=512,
+    ),
+    "analysis": EndpointPolicy(
+        timeout=45.0, max_retries=2, lane=BACKGROUND, max_tokens=1024
+    ),
+    "context_summary": EndpointPolicy(
+        timeout=20.0, max_retries=1, lane=BACKGROUND, tier=FAST_TIER
+    ),
+    "hint_bank": EndpointPolicy(timeout=60.0, max_retries=2, lane=BACKGROUND),  # offline job
+    # ActivityAIService
+    "activity_hint": EndpointPolicy(
+        timeout=8.0, max_retries=1, cache_ttl=1800, hedge=True, lane=INTERACTIVE,
+        tier=FAST_TIER, max_tokens=256,
+    ),
+    # Speculative higher-level hints; nobody is waiting on them yet
+    "activity_hint_prefetch": EndpointPolicy(
+        timeout=15.0, max_retries=1, lane=BACKGROUND, tier=FAST_TIER, max_tokens=256
+    ),
+    "evaluate_work": EndpointPolicy(
+        timeout=15.0, max_retries=1, cache_ttl=600, lane=INTERACTIVE,
+        max_tokens=512, latency_slo=6.0,
+    ),
+    "adaptive_difficulty": EndpointPolicy(
+        timeout=8.0, max_retries=1, cache_ttl=300, hedge=True, lane=INTERACTIVE,
+        tier=FAST_TIER, max_tokens=256,
+    ),
+    "session_analysis": EndpointPolicy(
+        timeout=45.0, max_retries=2, lane=BACKGROUND, max_tokens=768
+    ),
+    "next_steps": EndpointPolicy(
+        timeout=20.0, max_retries=1, cache_ttl=600, max_tokens=512, latency_slo=8.0
+    ),
+    "personalized_practice": EndpointPolicy(
+        timeout=45.0, max_retries=2, cache_ttl=1800, max_tokens=1024, latency_slo=20.0
+    ),
+    "practice_bank": EndpointPolicy(  # bank fills must differ
+        timeout=45.0, max_retries=2, lane=BACKGROUND, max_tokens=1024
+    ),
+    # DysgraphiaAIService
+    "sentence_check": EndpointPolicy(
+        timeout=10.0, max_retries=1, cache_ttl=3600, cache_casefold=False, hedge=True,
+        lane=INTERACTIVE, tier=FAST_TIER, max_tokens=512,
+    ),
+    "spelling_help": EndpointPolicy(
+        timeout=10.0, max_retries=1, cache_ttl=86400, cache_casefold=False, hedge=True,
+        lane=INTERACTIVE, tier=FAST_TIER, max_tokens=512,
+    ),
+    "story_ideas": EndpointPolicy(
+        timeout=30.0, max_retries=1, lane=BACKGROUND, tier=FAST_TIER, max_tokens=1024
+    ),
+    "composition_feedback": EndpointPolicy(
+        timeout=45.0, max_retries=2, max_tokens=1024, latency_slo=20.0
+    ),
+    "writing_coach": EndpointPolicy(
+        timeout=20.0, max_retries=1, lane=INTERACTIVE, max_tokens=256, latency_slo=8.0
+    ),
+}
+
+
+@dataclass
+class LLMResult:
+    """Completion text and token usage returned by the gateway."""
+
+    text: str
+    tokens: int
+    model: str
+    cached: bool = False
+
+
+class LLMStream:
+    """
+    Async iterator over completion text deltas.
+    `result` holds the full text and token usage once iteration finishes.
+    """
+
+    def __init__(self, deltas: AsyncIterator[str], result: LLMResult):
+        self._deltas = deltas
+        self.result = result
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._deltas
+
+
+class LLMGateway:
+    """Process-wide entry point for every chat completion call."""
+
+    def __init__(
+        self,
+        response_cache: Optional[PromptResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        budget: Optional[TokenBudget] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._scheduler = scheduler or LLMScheduler()
+        self._router = router or ModelRouter()
+        self._response_cache = response_cache
+        self._single_flight = single_flight
+        self._budget = budget
+        self._breakers = breakers
+
+    async def connect(self) -> None:
+        """Create the pooled OpenAI client. Called from the app lifespan."""
+        if self._client is not None:
+            return
+        http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+        self._client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=http_client,
+        )
+        logger.info(
+            f"LLM gateway ready (max_connections={settings.OPENAI_MAX_CONNECTIONS}, "
+            f"max_concurrency={settings.OPENAI_MAX_CONCURRENCY})"
+        )
+
+    async def disconnect(self) -> None:
+        """Close the pooled client and release its connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            logger.info("LLM gateway closed")
+
+    def policy_for(self, endpoint: str) -> EndpointPolicy:
+        """Return the model/timeout/retry policy for an endpoint."""
+        return ENDPOINT_POLICIES.get(
+            endpoint,
+            EndpointPolicy(
+                timeout=settings.OPENAI_TIMEOUT_SECONDS,
+                max_retries=settings.OPENAI_MAX_RETRIES,
+            ),
+        )
+
+    async def complete(
+        self,
+        endpoint: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        model: Optional[str] = None,
+        scope: Optional[UsageScope] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> LLMResult:
+        """
+        Run a chat completion through the shared pool.
+
+        Endpoints with a cache TTL are answered from the prompt-response
+        cache when possible (tokens=0), and identical concurrent misses are
+        coalesced into one upstream call. Upstream calls are checked against
+        and billed to `scope`'s daily token budget. Raises openai.APIError
+        (including timeouts) or LLMUnavailableError (budget exhausted,
+        circuit open) so callers keep their existing fallback handling.
+        `response_format` is forwarded to the provider unchanged. Without
+        an explicit `model` the router picks one for the endpoint's tier.
+        When `validate` is given (e.g. the caller's parse_structured), only
+        answers it accepts are cached, so one off-schema completion is not
+        replayed to every student for the whole TTL.
+        """
+        policy = self.policy_for(endpoint)
+        model = model or self._router.route(endpoint, policy.tier)
+        max_tokens = policy.cap_tokens(max_tokens)
+
+        if self._response_cache is None or policy.cache_ttl <= 0:
+            await self._ensure_budget(scope)
+            return await self._complete_upstream(
+                endpoint, policy, messages, max_tokens, model, scope, response_format
+            )
+
+        cache_key = make_prompt_key(
+            model, messages, policy.cache_casefold, response_format
+        )
+        cached = await self._cached_result(cache_key, model)
+        if cached is not None:
+            logger.debug(f"LLM cache hit: endpoint={endpoint}")
+            return cached
+
+        # Cached answers stay available to users who are over budget and
+        # while the endpoint's circuit is open
+        await self._ensure_budget(scope)
+
+        async def produce() -> LLMResult:
+            result = await self._complete_upstream(
+                endpoint, policy, messages, max_tokens, model, scope, response_format
+            )
+            if self._cacheable(endpoint, result.text, validate):
+                await self._response_cache.set(
+                    cache_key,
+                    PromptResponseCache.encode(result.text, result.model),
+                    policy.cache_ttl,
+                )
+            return result
+
+        if self._single_flight is None:
+            return await produce()
+
+        result, leader = await self._single_flight.do(
+            cache_key,
+            produce,
+            lookup=lambda: self._cached_result(cache_key, model),
+        )
+        if not leader:
+            # Tokens were billed to the caller that ran the request
+            return replace(result, tokens=0, cached=True)
+        return result
+
+    @staticmethod
+    def _cacheable(
+        endpoint: str, text: str, validate: Optional[Callable[[str], Any]]
+    ) -> bool:
+        if not text:
+            return False
+        if validate is None:
+            return True
+        try:
+            validate(text)
+        except StructuredOutputError as e:
+            logger.warning(f"LLM answer not cached: endpoint={endpoint}, {e}")
+            return False
+        return True
+
+    async def _ensure_budget(self, scope: Optional[UsageScope]) -> None:
+        if self._budget is not None and scope is not None:
+            await self._budget.ensure_available(scope)
+
+    async def _record_usage(self, scope: Optional[UsageScope], tokens: int) -> None:
+        if self._budget is not None and scope is not None:
+            await self._budget.record(scope, tokens)
+
+    def _breaker(self, model: str, endpoint: str, policy: EndpointPolicy):
+        if self._breakers is None:
+            return None
+        return self._breakers.get(model, endpoint, policy.timeout)
+
+    def open_circuits(self) -> List[str]:
+        """'model/endpoint' pairs currently failing fast."""
+        return self._breakers.open_circuits() if self._breakers else []
+
+    def lane_stats(self) -> Dict[str, Dict[str, int]]:
+        """Active, queued and rejected calls per scheduler lane."""
+        return self._scheduler.snapshot()
+
+    def degraded_routes(self) -> List[str]:
+        """Endpoints running on a fallback tier because of their latency SLO."""
+        return self._router.degraded_routes()
+
+    async def _cached_result(self, cache_key: str, model: str) -> Optional[LLMResult]:
+        cached = await self._response_cache.get(cache_key)
+        if cached is None:
+            return None
+        return LLMResult(
+            text=cached["text"],
+            tokens=0,
+            model=cached.get("model", model),
+            cached=True,
+        )
+
+    async def _complete_upstream(
+        self,
+        endpoint: str,
+        policy: EndpointPolicy,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        model: str,
+        scope: Optional[UsageScope] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> LLMResult:
+        breaker = self._breaker(model, endpoint, policy)
+        if breaker is not None:
+            breaker.before_call()
+
+        if self._client is None:
+            # Scripts and tests may run without the app lifespan
+            await self.connect()
+
+        client = self._client.with_options(
+            timeout=policy.timeout,
+            max_retries=policy.max_retries,
+        )
+        request = {"model": model, "max_tokens": max_tokens, "messages": messages}
+        if response_format is not None:
+            request["response_format"] = response_format
+
+        delay = self._hedge_delay(policy, breaker)
+        if delay is None:
+            response = await self._call(client, breaker, request, policy, endpoint)
+        else:
+            response = await self._hedged_call(
+                client, breaker, request, policy, delay, endpoint
+            )
+
+        text = response.choices[0].message.content or ""
+        tokens = response.usage.total_tokens if response.usage else 0
+        await self._record_usage(scope, tokens)
+        return LLMResult(text=text, tokens=tokens, model=model)
+
+    @staticmethod
+    def _hedge_delay(
+        policy: EndpointPolicy, breaker: Optional[CircuitBreaker]
+    ) -> Optional[float]:
+        """Seconds to wait before hedging, or None to send a single request."""
+        if not (settings.LLM_HEDGE_ENABLED and policy.hedge):
+            return None
+        if breaker is None or breaker.state != CLOSED:
+            return None
+        observed = breaker.latency_percentile(settings.LLM_HEDGE_PERCENTILE)
+        if observed is None:
+            return None
+        delay = max(observed, settings.LLM_HEDGE_MIN_DELAY_MS / 1000.0)
+        return delay if delay < policy.timeout else None
+
+    async def _call(
+        self,
+        client: Any,
+        breaker: Optional[CircuitBreaker],
+        request: Dict[str, Any],
+        policy: EndpointPolicy,
+        endpoint: str,
+    ) -> Any:
+        """One upstream request in the policy's lane, reported to the breaker and router."""
+        try:
+            async with self._scheduler.slot(policy.lane, wait_timeout=policy.timeout):
+                # Queueing time is the scheduler's, not the provider's
+                started = time.monotonic()
+                response = await client.chat.completions.create(**request)
+        except TRIPPING_ERRORS:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        latency = time.monotonic() - started
+        if breaker is not None:
+            breaker.record_success(latency)
+        self._router.record(
+            request["model"], endpoint, policy.tier, policy.latency_slo, latency
+        )
+        return response
+
+    async def _hedged_call(
+        self,
+        client: Any,
+        breaker: Optional[CircuitBreaker],
+        request: Dict[str, Any],
+        policy: EndpointPolicy,
+        delay: float,
+        endpoint: str,
+    ) -> Any:
+        """Send a second request if the first outlives `delay`; first success wins."""
+        first = asyncio.ensure_future(
+            self._call(client, breaker, request, policy, endpoint)
+        )
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+
+            logger.debug(f"LLM hedge sent: endpoint={endpoint}, delay={delay:.2f}s")
+            pending.add(
+                asyncio.ensure_future(
+                    self._call(client, breaker, request, policy, endpoint)
+                )
+            )
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both attempts failed; surface the original request's error
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stream(
+        self,
+        endpoint: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        model: Optional[str] = None,
+        scope: Optional[UsageScope] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> LLMStream:
+        """
+        Stream a chat completion token by token through the shared pool.
+
+        The lane slot is held until the stream is exhausted or closed.
+        Endpoints with a cache TTL replay a cached answer as a single delta
+        and store completed streams that pass `validate`, so streaming costs
+        no more tokens than complete().
+        """
+        policy = self.policy_for(endpoint)
+        result = LLMResult(
+            text="", tokens=0, model=model or self._router.route(endpoint, policy.tier)
+        )
+        return LLMStream(
+            self._stream_deltas(
+                endpoint, messages, policy.cap_tokens(max_tokens), result, scope,
+                response_format, validate,
+            ),
+            result,
+        )
+
+    async def _stream_deltas(
+        self,
+        endpoint: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        result: LLMResult,
+        scope: Optional[UsageScope] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> AsyncIterator[str]:
+        policy = self.policy_for(endpoint)
+        cache_key = None
+        if self._response_cache is not None and policy.cache_ttl > 0:
+            cache_key = make_prompt_key(
+                result.model, messages, policy.cache_casefold, response_format
+            )
+            cached = await self._cached_result(cache_key, result.model)
+            if cached is not None:
+                logger.debug(f"LLM cache hit (stream): endpoint={endpoint}")
+                result.text, result.model, result.cached = cached.text, cached.model, True
+                yield cached.text
+                return
+
+        await self._ensure_budget(scope)
+        breaker = self._breaker(result.model, endpoint, policy)
+        if breaker is not None:
+            breaker.before_call()
+
+        if self._client is None:
+            await self.connect()
+
+        client = self._client.with_options(
+            timeout=policy.timeout,
+            max_retries=policy.max_retries,
+        )
+        request = {
+            "model": result.model,
+            "max_tokens": max_tokens,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+
+        parts: List[str] = []
+        completed = False
+        try:
+            async with self._scheduler.slot(policy.lane, wait_timeout=policy.timeout):
+                response = await client.chat.completions.create(**request)
+                try:
+                    async for chunk in response:
+                        if chunk.usage:
+                            result.tokens = chunk.usage.total_tokens
+                        if chunk.choices:
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                parts.append(delta)
+                                yield delta
+                    completed = True
+                finally:
+                    result.text = "".join(parts)
+                    await self._record_usage(scope, result.tokens)
+        except TRIPPING_ERRORS:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            if breaker is not None:
+                # Stream duration depends on the reader, so only the outcome counts
+                if completed:
+                    breaker.record_success()
+                else:
+                    breaker.release_probe()
+
+        if cache_key is not None and self._cacheable(endpoint, result.text, validate):
+            await self._response_cache.set(
+                cache_key,
+                PromptResponseCache.encode(result.text, result.model),
+                policy.cache_ttl,
+            )
+
+    @property
+    def is_connected(self) -> bool:
+        """Check if the pooled client is open."""
+        return self._client is not None
+
+
+# Singleton gateway instance
+llm_gateway = LLMGateway(
+    response_cache=PromptResponseCache(redis_cache) if settings.LLM_CACHE_ENABLED else None,
+    single_flight=single_flight,
+    budget=token_budget,
+    breakers=CircuitBreakerRegistry() if settings.LLM_CIRCUIT_ENABLED else None,
+)
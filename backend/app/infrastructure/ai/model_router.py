@@ -0,0 +1,112 @@
+"""
+Per-endpoint model routing.
+Each endpoint policy names a model tier; small, short-answer tasks (hints,
+spelling help, sentence checks) run on the fast tier and longer reasoning
+tasks on the standard tier. The router keeps a rolling window of upstream
+latencies per (model, endpoint); when the primary's percentile latency
+breaks the endpoint's SLO, calls move to the next faster tier for a
+while, then the primary is tried again with a fresh window.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.ai.circuit_breaker import percentile
+
+STANDARD_TIER = "standard"
+FAST_TIER = "fast"
+# Slowest to fastest; a degraded tier falls back to the next one
+TIER_ORDER = (STANDARD_TIER, FAST_TIER)
+
+
+def default_tier_models() -> Dict[str, str]:
+    """Model name per tier from settings."""
+    return {STANDARD_TIER: settings.OPENAI_MODEL, FAST_TIER: settings.LLM_MODEL_FAST}
+
+
+def faster_tier(tier: str) -> Optional[str]:
+    """The next faster tier, or None for the fastest one."""
+    index = TIER_ORDER.index(tier) if tier in TIER_ORDER else len(TIER_ORDER) - 1
+    return TIER_ORDER[index + 1] if index + 1 < len(TIER_ORDER) else None
+
+
+class ModelRouter:
+    """Picks the model for an endpoint and watches its latency SLO."""
+
+    def __init__(
+        self,
+        tier_models: Optional[Dict[str, str]] = None,
+        window_size: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        recheck_seconds: Optional[float] = None,
+    ):
+        self._tier_models = tier_models or default_tier_models()
+        self._window_size = (
+            settings.LLM_ROUTER_WINDOW if window_size is None else window_size
+        )
+        self._min_calls = (
+            settings.LLM_ROUTER_MIN_CALLS if min_calls is None else min_calls
+        )
+        self._recheck_seconds = (
+            settings.LLM_ROUTER_RECHECK_SECONDS
+            if recheck_seconds is None else recheck_seconds
+        )
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        # endpoint → (fallback tier, monotonic time the primary is retried)
+        self._degraded: Dict[str, Tuple[str, float]] = {}
+
+    def model_for(self, tier: str) -> str:
+        return self._tier_models.get(tier) or self._tier_models[STANDARD_TIER]
+
+    def route(self, endpoint: str, tier: str) -> str:
+        """Model to call for an endpoint whose primary tier is `tier`."""
+        degraded = self._degraded.get(endpoint)
+        if degraded is None:
+            return self.model_for(tier)
+        fallback, retry_at = degraded
+        if time.monotonic() >= retry_at:
+            del self._degraded[endpoint]
+            self._latencies.pop((self.model_for(tier), endpoint), None)
+            return self.model_for(tier)
+        return self.model_for(fallback)
+
+    def record(
+        self, model: str, endpoint: str, tier: str, latency_slo: float, latency: float
+    ) -> None:
+        """Add an upstream latency; degrade the endpoint if its primary breaks the SLO."""
+        window = self._latencies.get((model, endpoint))
+        if window is None:
+            window = deque(maxlen=self._window_size)
+            self._latencies[(model, endpoint)] = window
+        window.append(latency)
+
+        if (
+            latency_slo <= 0
+            or not settings.LLM_ROUTER_FALLBACK_ENABLED
+            or endpoint in self._degraded
+            or model != self.model_for(tier)
+            or len(window) < self._min_calls
+        ):
+            return
+        observed = percentile(list(window), settings.LLM_ROUTER_SLO_PERCENTILE)
+        fallback = faster_tier(tier)
+        if observed > latency_slo and fallback is not None:
+            self._degraded[endpoint] = (fallback, time.monotonic() + self._recheck_seconds)
+            logger.warning(
+                f"LLM route degraded: endpoint={endpoint}, model={model}, "
+                f"p{settings.LLM_ROUTER_SLO_PERCENTILE:g}={observed:.2f}s > "
+                f"SLO {latency_slo:.2f}s, using {fallback} tier"
+            )
+
+    def degraded_routes(self) -> List[str]:
+        """'endpoint→tier' for every endpoint currently on its fallback tier."""
+        now = time.monotonic()
+        return [
+            f"{endpoint}→{fallback}"
+            for endpoint, (fallback, retry_at) in self._degraded.items()
+            if retry_at > now
+        ]
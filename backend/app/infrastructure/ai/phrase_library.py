@@ -0,0 +1,99 @@
+"""
+YuBu's fixed phrases for speech splicing.
+Replies often open or close with one of YuBu's catchphrases or the hint
+encouragement lines. Those phrases are voiced once per emotion and kept
+in the audio cache; when an utterance starts or ends with one, only the
+remaining text is sent to ElevenLabs and the clips are spliced together.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app.infrastructure.ai.prompts import DEFAULT_HINT_ENCOURAGEMENT, HINT_ENCOURAGEMENTS
+from app.infrastructure.ai.yubu_prompts import YUBU_CHARACTER
+
+# Sentence-final punctuation, optionally followed by quotes or emoji
+_SENTENCE_END = re.compile(r"[.!?…]\W*$")
+
+
+def default_phrases() -> List[str]:
+    """Catchphrases plus the hint encouragement lines."""
+    return [
+        *YUBU_CHARACTER["personality"]["catchphrases"],
+        *HINT_ENCOURAGEMENTS.values(),
+        DEFAULT_HINT_ENCOURAGEMENT,
+    ]
+
+
+class PhraseLibrary:
+    """Finds known phrases at the start and end of an utterance."""
+
+    def __init__(self, phrases: Iterable[str]):
+        self._phrases = list(dict.fromkeys(phrases))
+        # emotion → prepared phrases, longest first
+        self._prepared: Dict[str, List[str]] = {}
+
+    @property
+    def phrases(self) -> List[str]:
+        return list(self._phrases)
+
+    def _for(self, emotion: str, prepare: Callable[[str, str], str]) -> List[str]:
+        prepared = self._prepared.get(emotion)
+        if prepared is None:
+            cleaned = {prepare(phrase, emotion) for phrase in self._phrases}
+            # Only whole sentences can be spliced without breaking prosody
+            prepared = sorted(
+                (p for p in cleaned if _SENTENCE_END.search(p)), key=len, reverse=True
+            )
+            self._prepared[emotion] = prepared
+        return prepared
+
+    def split(
+        self,
+        text: str,
+        emotion: str,
+        prepare: Callable[[str, str], str],
+    ) -> Tuple[List[str], str, List[str]]:
+        """
+        Peel known phrases off both ends of prepared text.
+
+        Args:
+            text: Text already prepared for TTS with the same emotion
+            emotion: Emotion the phrases are voiced with
+            prepare: The TTS text preparation, applied to each phrase
+
+        Returns:
+            (leading phrases, remainder, trailing phrases); a phrase only
+            matches as a whole sentence, never inside a longer one.
+        """
+        phrases = self._for(emotion, prepare)
+        leading: List[str] = []
+        trailing: List[str] = []
+        rest = text
+
+        matched = True
+        while matched and rest:
+            matched = False
+            for phrase in phrases:
+                if rest == phrase or (rest.startswith(phrase) and rest[len(phrase)].isspace()):
+                    leading.append(phrase)
+                    rest = rest[len(phrase):].lstrip()
+                    matched = True
+                    break
+
+        matched = True
+        while matched and rest:
+            matched = False
+            for phrase in phrases:
+                head = rest[:-len(phrase)]
+                if (
+                    rest.endswith(phrase)
+                    and head[-1:].isspace()
+                    and _SENTENCE_END.search(head.rstrip())
+                ):
+                    trailing.insert(0, phrase)
+                    rest = rest[:-len(phrase)].rstrip()
+                    matched = True
+                    break
+
+        return leading, rest, trailing
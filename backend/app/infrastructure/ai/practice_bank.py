@@ -0,0 +1,280 @@
+"""
+Shared practice-problem bank.
+Generated problems are stored once per (learning difficulty, skill, age
+band, difficulty) bucket, deduplicated by normalized question text, and
+sampled for every student who needs that skill. Each student's seen
+problems are tracked in Redis so sets do not repeat, and thin buckets are
+topped up by a background LLM call, so token spend follows the curriculum
+rather than the number of students.
+"""
+
+import hashlib
+import uuid
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.application.dtos.ai_activity_dtos import PersonalizedPracticeResponse
+from app.config import settings
+from app.domain.entities.enums import LearningDifficulty
+from app.domain.entities.practice_problem import PracticeProblem
+from app.domain.repositories.practice_problem_repository import PracticeProblemRepository
+from app.infrastructure.ai.activity_prompts import PERSONALIZED_PRACTICE_PROMPT
+from app.infrastructure.ai.errors import LLM_ERRORS
+from app.infrastructure.ai.llm_gateway import LLMGateway, llm_gateway
+from app.infrastructure.ai.response_cache import normalize_turkish
+from app.infrastructure.ai.structured_output import parse_structured, response_format_for
+from app.infrastructure.ai.token_budget import UsageScope
+from app.infrastructure.background import spawn
+from app.infrastructure.cache.redis_cache import RedisCache, redis_cache
+from app.infrastructure.database.practice_problem_repository_impl import (
+    SQLAlchemyPracticeProblemRepository,
+)
+from app.infrastructure.database.session import async_session_factory
+
+DIFFICULTY_ORDER = ["easy", "medium", "hard"]
+
+
+def age_band(age: int) -> str:
+    """Two-year age band used to index the bank."""
+    if age <= 6:
+        return "5-6"
+    if age >= 11:
+        return "11+"
+    start = age if age % 2 else age - 1
+    return f"{start}-{start + 1}"
+
+
+def difficulties_for_level(level: int) -> List[str]:
+    """Problem difficulties that suit a student's current level."""
+    if level <= 1:
+        return ["easy", "medium"]
+    if level >= 4:
+        return ["medium", "hard"]
+    return DIFFICULTY_ORDER
+
+
+def question_key(question: str) -> str:
+    """Dedup key: hash of the case- and whitespace-normalized question."""
+    return hashlib.sha256(normalize_turkish(question).encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class PracticeBucket:
+    """One index cell of the bank."""
+
+    learning_difficulty: LearningDifficulty
+    skill: str
+    age_band: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.learning_difficulty.value}:{self.skill}:{self.age_band}"
+
+
+def to_problems(bucket: PracticeBucket, items: List[Any]) -> List[PracticeProblem]:
+    """Turn LLM JSON items into bank entities, dropping unusable ones."""
+    problems = []
+    for item in items:
+        if not isinstance(item, dict) or not str(item.get("question", "")).strip():
+            continue
+        question = str(item["question"]).strip()
+        difficulty = str(item.get("difficulty", "easy")).lower()
+        problems.append(PracticeProblem(
+            learning_difficulty=bucket.learning_difficulty,
+            skill=bucket.skill,
+            age_band=bucket.age_band,
+            difficulty=difficulty if difficulty in DIFFICULTY_ORDER else "medium",
+            question=question,
+            question_key=question_key(question),
+            correct_answer=str(item.get("correct_answer", "")),
+            options=[str(o) for o in item.get("options") or []],
+            hint=str(item.get("hint", "")),
+            skill_focus=str(item.get("skill_focus", bucket.skill)),
+        ))
+    return problems
+
+
+def to_payload(problems: List[PracticeProblem]) -> List[Dict[str, Any]]:
+    """Response dicts in the shape the LLM used to return, easiest first."""
+    ordered = sorted(problems, key=lambda p: DIFFICULTY_ORDER.index(p.difficulty))
+    return [
+        {
+            "id": i + 1,
+            "problem_id": str(p.id),
+            "question": p.question,
+            "correct_answer": p.correct_answer,
+            "options": p.options,
+            "hint": p.hint,
+            "difficulty": p.difficulty,
+            "skill_focus": p.skill_focus,
+        }
+        for i, p in enumerate(ordered)
+    ]
+
+
+class PracticeBankGenerator:
+    """Generates problems with the LLM and stores them in the bank."""
+
+    def __init__(
+        self,
+        llm: LLMGateway,
+        cache: RedisCache,
+        session_factory: async_sessionmaker[AsyncSession],
+    ):
+        self._llm = llm
+        self._cache = cache
+        self._session_factory = session_factory
+
+    async def generate(
+        self,
+        bucket: PracticeBucket,
+        age: int,
+        level: int,
+        count: int,
+        scope: Optional[UsageScope] = None,
+        avoid: Optional[List[str]] = None,
+        endpoint: str = "practice_bank",
+    ) -> List[PracticeProblem]:
+        """
+        One LLM call producing `count` problems for a bucket, avoiding `avoid`.
+        `endpoint` is practice_bank (background lane) for top-ups and
+        personalized_practice when a student is waiting on the result.
+        """
+        prompt = PERSONALIZED_PRACTICE_PROMPT.render(
+            learning_difficulty=bucket.learning_difficulty.value,
+            student_age=age,
+            student_level=level,
+            weak_skill=bucket.skill,
+            count=count,
+        )
+        request = f"{bucket.skill} alanı için {count} pratik problemi oluştur."
+        if avoid:
+            request += "\nBu sorulardan farklı olsun:\n" + "\n".join(f"- {q}" for q in avoid)
+        completion = await self._llm.complete(
+            endpoint,
+            [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": request},
+            ],
+            max_tokens=1024,
+            scope=scope,
+            response_format=response_format_for(PersonalizedPracticeResponse),
+            validate=partial(parse_structured, dto=PersonalizedPracticeResponse),
+        )
+        items = parse_structured(completion.text, PersonalizedPracticeResponse)["problems"]
+        return to_problems(bucket, items)
+
+    def schedule_top_up(self, bucket: PracticeBucket, age: int, level: int) -> None:
+        """Add a batch of new problems to a thin bucket in the background."""
+        spawn(self._top_up(bucket, age, level), name=f"practice-top-up:{bucket.key}")
+
+    async def _top_up(self, bucket: PracticeBucket, age: int, level: int) -> None:
+        lock_key = f"practice_bank:top_up:{bucket.key}"
+        token = uuid.uuid4().hex
+        if not await self._cache.acquire_lock(
+            lock_key, token, settings.PRACTICE_BANK_TOP_UP_LOCK_SECONDS
+        ):
+            return
+        try:
+            async with self._session_factory() as session:
+                existing = await SQLAlchemyPracticeProblemRepository(session).sample(
+                    bucket.learning_difficulty, bucket.skill, bucket.age_band,
+                    DIFFICULTY_ORDER, [], 20,
+                )
+            problems = await self.generate(
+                bucket, age, level, settings.PRACTICE_BANK_TOP_UP_BATCH,
+                avoid=[p.question for p in existing],
+            )
+            async with self._session_factory() as session:
+                added = await SQLAlchemyPracticeProblemRepository(session).add_many(problems)
+                await session.commit()
+            logger.info(f"Practice bank topped up: bucket={bucket.key}, added={len(added)}")
+        except LLM_ERRORS as e:
+            logger.warning(f"Practice bank top-up failed ({bucket.key}): {e}")
+        finally:
+            await self._cache.release_lock(lock_key, token)
+
+
+class PracticeBank:
+    """Draws unseen problems for a student and keeps buckets stocked."""
+
+    def __init__(
+        self,
+        repository: PracticeProblemRepository,
+        cache: RedisCache,
+        generator: PracticeBankGenerator,
+    ):
+        self._repository = repository
+        self._cache = cache
+        self._generator = generator
+
+    @staticmethod
+    def _seen_key(student_id: UUID, bucket: PracticeBucket) -> str:
+        return f"practice:seen:{student_id}:{bucket.key}"
+
+    async def draw(
+        self,
+        student_id: UUID,
+        bucket: PracticeBucket,
+        age: int,
+        level: int,
+        count: int,
+        scope: Optional[UsageScope] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        `count` problems for a student, unseen ones first. An empty bucket is
+        filled synchronously once; afterwards the LLM only runs in the
+        background when a bucket runs thin.
+        """
+        difficulties = difficulties_for_level(level)
+        seen_key = self._seen_key(student_id, bucket)
+        seen = {UUID(s) for s in await self._cache.smembers(seen_key)}
+
+        problems = await self._repository.sample(
+            bucket.learning_difficulty, bucket.skill, bucket.age_band,
+            difficulties, seen, count,
+        )
+        if len(problems) < count:
+            # Repeat older problems rather than make the child wait
+            problems += await self._repository.sample(
+                bucket.learning_difficulty, bucket.skill, bucket.age_band,
+                difficulties, [p.id for p in problems], count - len(problems),
+            )
+
+        if not problems:
+            # A student is waiting, so this fill must not queue behind reports
+            generated = await self._generator.generate(
+                bucket, age, level, count, scope, endpoint="personalized_practice"
+            )
+            # Only persisted rows have usable problem IDs; a concurrent fill
+            # may have stored the same questions first
+            problems = (await self._repository.add_many(generated))[:count] or (
+                await self._repository.sample(
+                    bucket.learning_difficulty, bucket.skill, bucket.age_band,
+                    difficulties, [], count,
+                )
+            )
+
+        stocked = await self._repository.count(
+            bucket.learning_difficulty, bucket.skill, bucket.age_band
+        )
+        if stocked < settings.PRACTICE_BANK_MIN_BUCKET or len(seen) + count > stocked:
+            self._generator.schedule_top_up(bucket, age, level)
+
+        await self._cache.sadd(
+            seen_key,
+            [str(p.id) for p in problems],
+            expire_seconds=settings.PRACTICE_SEEN_TTL_DAYS * 86400,
+        )
+        return to_payload(problems)
+
+
+# Singleton generator used for background top-ups
+practice_bank_generator = PracticeBankGenerator(
+    llm_gateway, redis_cache, async_session_factory
+)
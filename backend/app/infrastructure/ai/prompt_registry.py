@@ -0,0 +1,83 @@
+"""
+Precompiled prompt registry.
+Every prompt is split into a static part (persona, rules, response schema),
+built once at import time, and a small data part holding the per-call
+student/activity values. Rendering always puts the static part first so
+identical prefixes hit the provider-side prompt cache, and the registry
+reports token counts per prompt from the local tokenizer.
+"""
+
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from app.infrastructure.ai.tokens import count_tokens
+
+
+def _field_names(template: str) -> FrozenSet[str]:
+    return frozenset(
+        name for _, name, _, _ in Formatter().parse(template) if name
+    )
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt whose static prefix is fixed and whose data block comes last."""
+
+    name: str
+    static: str
+    data: str = ""
+    fields: FrozenSet[str] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "fields", _field_names(self.data))
+
+    def render(self, **values: Any) -> str:
+        """Static part followed by the filled-in data block."""
+        if not self.data:
+            return self.static
+        return f"{self.static}\n\n{self.data.format(**values)}"
+
+
+class PromptRegistry:
+    """Name → PromptTemplate lookup with token accounting."""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        """Add a template; names must be unique."""
+        if template.name in self._templates:
+            raise ValueError(f"Prompt already registered: {template.name}")
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        """Return a registered template (KeyError if unknown)."""
+        return self._templates[name]
+
+    def names(self) -> List[str]:
+        """Registered prompt names in registration order."""
+        return list(self._templates)
+
+    def token_report(self, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Token counts per prompt: the cacheable static prefix and the
+        unfilled data block (actual data adds its own tokens on top).
+        """
+        report = []
+        for template in self._templates.values():
+            static_tokens = count_tokens(template.static, model)
+            data_tokens = count_tokens(template.data, model)
+            report.append({
+                "name": template.name,
+                "static_tokens": static_tokens,
+                "data_tokens": data_tokens,
+                "total_tokens": static_tokens + data_tokens,
+                "fields": sorted(template.fields),
+            })
+        return report
+
+
+# Singleton registry; prompt modules register their templates on import
+prompt_registry = PromptRegistry()
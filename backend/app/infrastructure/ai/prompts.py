@@ -5,6 +5,7 @@ and educationally sound responses.
 """
 
 from app.domain.entities.enums import LearningDifficulty
+from app.infrastructure.ai.prompt_registry import PromptTemplate, prompt_registry
 
 # ═══════════════════════════════════════════════════════════════
 # BASE SYSTEM PROMPT (shared context)
@@ -410,6 +411,31 @@ Evde deneyebilecekleriniz:
 }
 
 
+def _compile_system_prompt(learning_difficulty: LearningDifficulty, role: str) -> str:
+    difficulty_prompt = DIFFICULTY_PROMPTS.get(learning_difficulty, {})
+    role_prompt = difficulty_prompt.get(role, difficulty_prompt.get("student", ""))
+
+    return f"""{BASE_SYSTEM_PROMPT}
+
+{role_prompt}
+
+BAĞLAM BİLGİSİ:
+- Öğrenme güçlüğü: {learning_difficulty.value}
+- Kullanıcı rolü: {role}
+"""
+
+
+# Precompiled once per (difficulty, role) — chat appends student data after it
+_SYSTEM_PROMPTS = {
+    (difficulty, role): prompt_registry.register(PromptTemplate(
+        name=f"system:{difficulty.value}:{role}",
+        static=_compile_system_prompt(difficulty, role),
+    ))
+    for difficulty, roles in DIFFICULTY_PROMPTS.items()
+    for role in roles
+}
+
+
 def get_system_prompt(
     learning_difficulty: LearningDifficulty,
     role: str = "student",
@@ -424,17 +450,44 @@ def get_system_prompt(
     Returns:
         Combined system prompt string
     """
-    difficulty_prompt = DIFFICULTY_PROMPTS.get(learning_difficulty, {})
-    role_prompt = difficulty_prompt.get(role, difficulty_prompt.get("student", ""))
+    compiled = _SYSTEM_PROMPTS.get((learning_difficulty, role))
+    if compiled is None:
+        return _compile_system_prompt(learning_difficulty, role)
+    return compiled.static
 
-    return f"""{BASE_SYSTEM_PROMPT}
 
-{role_prompt}
+_HINT_DESCRIPTIONS = {
+    1: "Çok ince bir ipucu ver. Cevabı söyleme, sadece doğru yöne yönlendir.",
+    2: "Net bir ipucu ver. Problemi çözmek için bir strateji öner.",
+    3: "Detaylı açıklama yap. Adım adım çözüme yaklaştır ama tam cevabı verme.",
+}
 
-BAĞLAM BİLGİSİ:
-- Öğrenme güçlüğü: {learning_difficulty.value}
-- Kullanıcı rolü: {role}
-"""
+_HINT_PROMPTS = {
+    level: prompt_registry.register(PromptTemplate(
+        name=f"hint:level{level}",
+        static=f"""{BASE_SYSTEM_PROMPT}
+
+İPUCU SEVİYESİ {level}/3:
+{description}
+
+İpucunu öğrenme güçlüğüne uygun şekilde ver.
+Cesaretlendirici ol.
+İpucunu Türkçe ver.""",
+        data="""Şu anda '{chapter_title}' bölümünde bir {activity_type} aktivitesi yapılıyor.
+Öğrenme güçlüğü: {learning_difficulty}""",
+    ))
+    for level, description in _HINT_DESCRIPTIONS.items()
+}
+
+
+# Encouragement line appended to every hint; YuBu's phrase library
+# prerenders these so TTS only voices the hint itself
+HINT_ENCOURAGEMENTS = {
+    LearningDifficulty.DYSLEXIA: "Her kelimeyi doğru okuduğunda daha da güçleniyorsun! 📚",
+    LearningDifficulty.DYSGRAPHIA: "Her harfi yazdığında daha da ustalaşıyorsun! ✍️",
+    LearningDifficulty.DYSCALCULIA: "Sayılar seninle dost, birlikte çözelim! 🔢",
+}
+DEFAULT_HINT_ENCOURAGEMENT = "Çok iyi gidiyorsun! 🌟"
 
 
 def get_hint_prompt(
@@ -452,23 +505,46 @@ def get_hint_prompt(
         activity_type: Type of activity
         hint_level: 1=subtle hint, 2=clear hint, 3=detailed explanation
     """
-    hint_descriptions = {
-        1: "Çok ince bir ipucu ver. Cevabı söyleme, sadece doğru yöne yönlendir.",
-        2: "Net bir ipucu ver. Problemi çözmek için bir strateji öner.",
-        3: "Detaylı açıklama yap. Adım adım çözüme yaklaştır ama tam cevabı verme.",
-    }
+    template = _HINT_PROMPTS.get(hint_level, _HINT_PROMPTS[1])
+    return template.render(
+        chapter_title=chapter_title,
+        activity_type=activity_type,
+        learning_difficulty=learning_difficulty.value,
+    )
 
-    return f"""{BASE_SYSTEM_PROMPT}
 
-Şu anda '{chapter_title}' bölümünde bir {activity_type} aktivitesi yapılıyor.
-Öğrenme güçlüğü: {learning_difficulty.value}
+ANALYSIS_PROMPT = prompt_registry.register(PromptTemplate(
+    name="analysis",
+    static=f"""{BASE_SYSTEM_PROMPT}
 
-İPUCU SEVİYESİ {hint_level}/3:
-{hint_descriptions.get(hint_level, hint_descriptions[1])}
+Sen bir eğitim uzmanısın. En sonda verilen öğrenci performans verilerini analiz et.
 
-İpucunu öğrenme güçlüğüne uygun şekilde ver.
-Cesaretlendirici ol.
-İpucunu Türkçe ver."""
+ANALİZ TALİMATLARI:
+1. Güçlü yönleri belirle (en az 3)
+2. Geliştirilmesi gereken alanları belirle (en az 2)
+3. Öğrenme güçlüğüne özgü öneriler sun (en az 3)
+4. Cesaretlendirici bir genel mesaj yaz
+
+YANIT FORMATINI JSON olarak ver:
+{{
+    "analysis": "Genel analiz metni",
+    "strengths": ["Güçlü yön 1", "Güçlü yön 2", "Güçlü yön 3"],
+    "areas_for_improvement": ["Alan 1", "Alan 2"],
+    "recommendations": ["Öneri 1", "Öneri 2", "Öneri 3"],
+    "encouragement_message": "Cesaretlendirici mesaj"
+}}""",
+    data="""ÖĞRENCİ PROFİLİ:
+- Öğrenme güçlüğü: {learning_difficulty}
+
+PERFORMANS VERİLERİ:
+- Denenen bölüm sayısı: {total_chapters_attempted}
+- Tamamlanan bölüm sayısı: {total_chapters_completed}
+- Tamamlanma oranı: %{completion_rate}
+- Ortalama puan: {average_score}
+- En yüksek puan: {best_score}
+- Toplam harcanan süre: {total_time_spent_minutes} dakika
+- Toplam deneme sayısı: {total_attempts}""",
+))
 
 
 def get_analysis_prompt(
@@ -482,33 +558,28 @@ def get_analysis_prompt(
         learning_difficulty: Student's learning difficulty type
         analytics_data: Student's progress analytics
     """
-    return f"""{BASE_SYSTEM_PROMPT}
+    return ANALYSIS_PROMPT.render(
+        learning_difficulty=learning_difficulty.value,
+        **{
+            field: analytics_data.get(field, 0)
+            for field in ANALYSIS_PROMPT.fields - {"learning_difficulty"}
+        },
+    )
 
-Sen bir eğitim uzmanısın. Aşağıdaki öğrenci performans verilerini analiz et.
 
-ÖĞRENCİ PROFİLİ:
-- Öğrenme güçlüğü: {learning_difficulty.value}
-
-PERFORMANS VERİLERİ:
-- Denenen bölüm sayısı: {analytics_data.get('total_chapters_attempted', 0)}
-- Tamamlanan bölüm sayısı: {analytics_data.get('total_chapters_completed', 0)}
-- Tamamlanma oranı: %{analytics_data.get('completion_rate', 0)}
-- Ortalama puan: {analytics_data.get('average_score', 0)}
-- En yüksek puan: {analytics_data.get('best_score', 0)}
-- Toplam harcanan süre: {analytics_data.get('total_time_spent_minutes', 0)} dakika
-- Toplam deneme sayısı: {analytics_data.get('total_attempts', 0)}
-
-ANALİZ TALİMATLARI:
-1. Güçlü yönleri belirle (en az 3)
-2. Geliştirilmesi gereken alanları belirle (en az 2)
-3. Öğrenme güçlüğüne özgü öneriler sun (en az 3)
-4. Cesaretlendirici bir genel mesaj yaz
+# ═══════════════════════════════════════════════════════════════
+# CONVERSATION SUMMARY PROMPT (rolling context)
+# ═══════════════════════════════════════════════════════════════
 
-YANIT FORMATINI JSON olarak ver:
-{{
-    "analysis": "Genel analiz metni",
-    "strengths": ["Güçlü yön 1", "Güçlü yön 2", "Güçlü yön 3"],
-    "areas_for_improvement": ["Alan 1", "Alan 2"],
-    "recommendations": ["Öneri 1", "Öneri 2", "Öneri 3"],
-    "encouragement_message": "Cesaretlendirici mesaj"
-}}"""
+CONTEXT_SUMMARY_PROMPT = prompt_registry.register(PromptTemplate(
+    name="context_summary",
+    static="""Bir eğitim asistanı ile kullanıcı arasındaki konuşmanın özetini güncelliyorsun.
+Mevcut özeti ve yeni konuşma turlarını birleştirerek TEK bir kısa özet yaz.
+
+KURALLAR:
+- Öğrencinin zorlandığı konuları, başarılarını ve tercihlerini koru
+- Açık kalan soruları ve verilen sözleri koru
+- Selamlaşma ve tekrarları at
+- Yalnızca özet metnini Türkçe yaz, başka açıklama ekleme""",
+    data="UZUNLUK: En fazla {max_words} kelime kullan.",
+))
@@ -0,0 +1,113 @@
+"""
+Prompt-response cache for deterministic AI endpoints.
+Two tiers: a bounded in-process LRU for sub-millisecond hits and Redis
+so every worker shares the same answers.
+"""
+
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.infrastructure.cache.redis_cache import RedisCache
+
+# Turkish dotted/dotless I do not survive str.lower(): "I" must become "ı"
+# and "İ" must become "i", otherwise "ARKADAŞIM" and "arkadaşım" differ.
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_turkish(text: str, casefold: bool = True) -> str:
+    """
+    Normalize text for cache keys.
+
+    Applies Unicode NFC, collapses whitespace and, when casefold is set,
+    lowercases with Turkish I/ı, İ/i rules.
+    """
+    text = unicodedata.normalize("NFC", text)
+    if casefold:
+        text = text.translate(_TURKISH_LOWER).lower()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_prompt_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    casefold: bool = True,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Hash model + normalized messages (+ output schema) into a stable cache key."""
+    payload = [model] + [
+        f"{m['role']}:{normalize_turkish(m['content'], casefold)}"
+        for m in messages
+    ]
+    if response_format is not None:
+        # A changed response DTO must not be answered with old-shaped JSON
+        payload.append(f"format:{json.dumps(response_format, sort_keys=True)}")
+    digest = hashlib.sha256("\x1f".join(payload).encode("utf-8")).hexdigest()
+    return f"llm:resp:{digest}"
+
+
+class LocalTTLCache:
+    """Bounded LRU dictionary whose entries expire after their own TTL."""
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PromptResponseCache:
+    """In-process + Redis cache for LLM completions keyed by prompt hash."""
+
+    def __init__(self, redis: RedisCache, max_local_entries: Optional[int] = None):
+        self._redis = redis
+        self._local = LocalTTLCache(
+            max_local_entries or settings.LLM_CACHE_LOCAL_MAX_ENTRIES
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached completion payload, promoting Redis hits locally."""
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        value = await self._redis.get(key)
+        if value is not None:
+            ttl = await self._redis.ttl(key)
+            if ttl > 0:
+                self._local.set(key, value, ttl)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: int) -> None:
+        """Store a completion payload in both tiers."""
+        self._local.set(key, value, ttl_seconds)
+        await self._redis.set(key, value, expire_seconds=ttl_seconds)
+
+    @staticmethod
+    def encode(text: str, model: str) -> Dict[str, Any]:
+        """Payload stored for a completion."""
+        return {"text": text, "model": model}
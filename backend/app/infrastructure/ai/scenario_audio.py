@@ -0,0 +1,154 @@
+"""
+Prerendered YuBu scenario clips.
+YUBU_SCENARIOS texts are fixed, so each one is synthesized once at build
+time (python -m app.prerender_scenarios) into a versioned file named after
+the hash of its cleaned text, emotion, voice and model. A manifest maps
+scenario keys to those files; a scenario is re-rendered only when its hash
+changes, and the route serves the files with their ETag and immutable
+caching instead of calling ElevenLabs.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.ai.tts_service import YuBuVoice
+from app.infrastructure.ai.yubu_prompts import YUBU_SCENARIOS
+
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class ScenarioClip:
+    """One prerendered scenario file."""
+    file: str
+    text_hash: str
+    etag: str
+    emotion: str
+    bytes: int
+
+
+class ScenarioAudioLibrary:
+    """Reads and writes the prerendered scenario manifest."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self._dir = Path(directory or settings.TTS_SCENARIO_DIR)
+        self._clips: Optional[Dict[str, ScenarioClip]] = None
+        self._loaded_mtime: Optional[float] = None
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def clips(self) -> Dict[str, ScenarioClip]:
+        """Manifest entries, reloaded when the manifest file changes."""
+        manifest = self._dir / MANIFEST_NAME
+        try:
+            mtime = manifest.stat().st_mtime
+        except FileNotFoundError:
+            self._clips, self._loaded_mtime = {}, None
+            return self._clips
+        if self._clips is None or mtime != self._loaded_mtime:
+            try:
+                data = json.loads(manifest.read_text(encoding="utf-8"))
+                self._clips = {
+                    key: ScenarioClip(**entry)
+                    for key, entry in data.get("scenarios", {}).items()
+                }
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Scenario manifest unreadable, serving live TTS: {e}")
+                self._clips = {}
+            self._loaded_mtime = mtime
+        return self._clips
+
+    def current(self, scenario_key: str, voice: YuBuVoice) -> Optional[ScenarioClip]:
+        """Clip for a scenario if present and rendered from its current text."""
+        scenario = YUBU_SCENARIOS.get(scenario_key)
+        clip = self.clips().get(scenario_key)
+        if scenario is None or clip is None:
+            return None
+        if clip.text_hash != voice.clip_hash(scenario["text"], scenario["emotion"]):
+            return None
+        return clip if (self._dir / clip.file).is_file() else None
+
+    def by_file(self, filename: str) -> Optional[ScenarioClip]:
+        """Clip for a versioned file name from the manifest."""
+        for clip in self.clips().values():
+            if clip.file == filename:
+                return clip if (self._dir / clip.file).is_file() else None
+        return None
+
+    def path(self, clip: ScenarioClip) -> Path:
+        return self._dir / clip.file
+
+    async def prerender(self, voice: YuBuVoice, force: bool = False) -> Dict[str, int]:
+        """
+        Synthesize every scenario whose text hash changed and rewrite the manifest.
+
+        Returns:
+            {"rendered": n, "skipped": n, "removed": n}
+        """
+        self._dir.mkdir(parents=True, exist_ok=True)
+        current = {} if force else self.clips()
+        clips: Dict[str, ScenarioClip] = {}
+        rendered = skipped = 0
+
+        for key, scenario in YUBU_SCENARIOS.items():
+            text_hash = voice.clip_hash(scenario["text"], scenario["emotion"])
+            existing = current.get(key)
+            if (
+                existing is not None
+                and existing.text_hash == text_hash
+                and (self._dir / existing.file).is_file()
+            ):
+                clips[key] = existing
+                skipped += 1
+                continue
+
+            audio = await voice.speak(scenario["text"], emotion=scenario["emotion"])
+            filename = f"{key}.{text_hash[:12]}.mp3"
+            _write_atomic(self._dir / filename, audio)
+            clips[key] = ScenarioClip(
+                file=filename,
+                text_hash=text_hash,
+                etag=hashlib.sha256(audio).hexdigest()[:32],
+                emotion=scenario["emotion"],
+                bytes=len(audio),
+            )
+            rendered += 1
+
+        manifest = {
+            "scenarios": {key: asdict(clip) for key, clip in clips.items()},
+        }
+        _write_atomic(
+            self._dir / MANIFEST_NAME,
+            json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+        )
+
+        # Drop files of old versions and removed scenarios
+        keep = {clip.file for clip in clips.values()} | {MANIFEST_NAME}
+        removed = 0
+        for path in self._dir.glob("*.mp3"):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+                removed += 1
+
+        self._clips = None
+        return {"rendered": rendered, "skipped": skipped, "removed": removed}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+# Singleton scenario library
+scenario_audio = ScenarioAudioLibrary()
@@ -0,0 +1,154 @@
+"""
+Priority scheduler for upstream LLM calls.
+Calls are grouped into lanes by who is waiting on them: interactive
+(a child mid-activity), standard, and background (reports, story ideas,
+offline bank fills). Each lane has its own concurrency limit and a
+bounded wait queue under one process-wide cap, and a freed slot always
+goes to the highest-priority lane with a waiter, so in-activity calls
+never queue behind a 1024-token analysis report.
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from app.config import settings
+from app.infrastructure.ai.errors import LaneSaturatedError
+
+INTERACTIVE = "interactive"
+STANDARD = "standard"
+BACKGROUND = "background"
+LANE_PRIORITY = (INTERACTIVE, STANDARD, BACKGROUND)
+
+
+@dataclass(frozen=True)
+class LaneLimits:
+    """Concurrency and queue bounds for one lane."""
+
+    concurrency: int
+    max_queue: int
+
+
+def default_lanes() -> Dict[str, LaneLimits]:
+    """Lane limits from settings."""
+    return {
+        INTERACTIVE: LaneLimits(
+            settings.LLM_LANE_INTERACTIVE_CONCURRENCY, settings.LLM_LANE_INTERACTIVE_QUEUE
+        ),
+        STANDARD: LaneLimits(
+            settings.LLM_LANE_STANDARD_CONCURRENCY, settings.LLM_LANE_STANDARD_QUEUE
+        ),
+        BACKGROUND: LaneLimits(
+            settings.LLM_LANE_BACKGROUND_CONCURRENCY, settings.LLM_LANE_BACKGROUND_QUEUE
+        ),
+    }
+
+
+class _Lane:
+    def __init__(self, limits: LaneLimits):
+        self.limits = limits
+        self.active = 0
+        self.rejected = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class LLMScheduler:
+    """Hands out upstream call slots by lane priority."""
+
+    def __init__(
+        self,
+        total: Optional[int] = None,
+        lanes: Optional[Dict[str, LaneLimits]] = None,
+    ):
+        self._total = total if total is not None else settings.OPENAI_MAX_CONCURRENCY
+        self._lanes = {
+            name: _Lane(limits) for name, limits in (lanes or default_lanes()).items()
+        }
+        self._active = 0
+
+    def _lane(self, name: str) -> _Lane:
+        return self._lanes.get(name) or self._lanes[STANDARD]
+
+    def _can_start(self, lane: _Lane) -> bool:
+        return lane.active < lane.limits.concurrency and self._active < self._total
+
+    def _start(self, lane: _Lane) -> None:
+        lane.active += 1
+        self._active += 1
+
+    def _release(self, lane: _Lane) -> None:
+        lane.active -= 1
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiters, highest-priority lane first."""
+        for name in LANE_PRIORITY:
+            lane = self._lanes.get(name)
+            while lane is not None and lane.waiters and self._can_start(lane):
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    continue  # abandoned while queued
+                self._start(lane)
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(
+        self, lane_name: str, wait_timeout: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold one upstream slot in a lane. Raises LaneSaturatedError when the
+        lane's queue is full or no slot frees up within `wait_timeout`.
+        """
+        lane = self._lane(lane_name)
+        await self._acquire(lane_name, lane, wait_timeout)
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    async def _acquire(
+        self, name: str, lane: _Lane, wait_timeout: Optional[float]
+    ) -> None:
+        # Waiters only exist while their lane or the global cap is full, so
+        # an empty queue plus a free slot means nobody is being overtaken
+        if not lane.waiters and self._can_start(lane):
+            self._start(lane)
+            return
+        if len(lane.waiters) >= lane.limits.max_queue:
+            lane.rejected += 1
+            raise LaneSaturatedError(name, f"{len(lane.waiters)} calls already queued")
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=wait_timeout)
+        except asyncio.CancelledError:
+            self._abandon(lane, waiter)
+            raise
+        if not done:
+            self._abandon(lane, waiter)
+            lane.rejected += 1
+            raise LaneSaturatedError(name, f"no slot within {wait_timeout:.1f}s")
+
+    def _abandon(self, lane: _Lane, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # The slot was granted just as the caller gave up; pass it on
+            self._release(lane)
+        else:
+            lane.waiters.remove(waiter)
+            waiter.cancel()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Per-lane counters for health reporting."""
+        return {
+            name: {
+                "active": lane.active,
+                "queued": len(lane.waiters),
+                "concurrency": lane.limits.concurrency,
+                "rejected": lane.rejected,
+            }
+            for name, lane in self._lanes.items()
+        }
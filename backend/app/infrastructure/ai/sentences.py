@@ -0,0 +1,83 @@
+"""
+Turkish sentence splitting for speech synthesis.
+Long texts are voiced sentence by sentence so the first sentence can play
+while the rest is synthesized, and so sentences shared between texts hit
+the audio cache. A boundary is sentence-final punctuation followed by
+whitespace and a capital letter, digit or opening quote; common Turkish
+abbreviations ("Dr.", "vb.", "örn.") and ordinal numbers ("3. sınıf")
+do not end a sentence. SentenceBuffer applies the same rule to streamed
+completions so speech can start before the answer is finished.
+"""
+
+import re
+from typing import List
+
+_BOUNDARY = re.compile(r"(?<=[.!?…])[\"')»”’]*\s+(?=[\"'(«“‘]?[A-ZÇĞİÖŞÜ0-9])")
+
+_ABBREVIATIONS = {
+    "dr", "prof", "doç", "av", "sn", "bkz", "vb", "vs", "örn", "yy", "no",
+    "s", "sf", "vd", "bl", "st", "ltd", "şti", "mah", "cad", "sok",
+}
+
+_LAST_WORD = re.compile(r"(\S+)\.$")
+
+
+def _ends_sentence(head: str) -> bool:
+    """False when the text before a candidate boundary ends in an abbreviation or ordinal."""
+    match = _LAST_WORD.search(head)
+    if match is None:
+        return True  # ! ? … always end a sentence
+    word = match.group(1).lstrip("\"'(«“‘")
+    if word.isdigit():
+        return False
+    return word.lower() not in _ABBREVIATIONS
+
+
+def _boundaries(text: str) -> List[int]:
+    """Offsets where a new sentence starts."""
+    offsets: List[int] = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        head = text[start:match.start()].rstrip("\"')»”’")
+        if _ends_sentence(head):
+            offsets.append(match.end())
+            start = match.end()
+    return offsets
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split cleaned text into sentences, keeping their punctuation."""
+    sentences: List[str] = []
+    start = 0
+    for end in _boundaries(text) + [len(text)]:
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    return sentences
+
+
+class SentenceBuffer:
+    """Collects streamed text and hands out sentences once they are complete."""
+
+    def __init__(self):
+        self._text = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Add a delta; return the sentences it completed.
+        A sentence counts as complete once the next one has started, since
+        only then can an abbreviation be told apart from a sentence end.
+        """
+        self._text += delta
+        offsets = _boundaries(self._text)
+        if not offsets:
+            return []
+        done = split_sentences(self._text[:offsets[-1]])
+        self._text = self._text[offsets[-1]:]
+        return done
+
+    def flush(self) -> List[str]:
+        """Whatever is left once the stream has ended."""
+        rest, self._text = self._text, ""
+        return split_sentences(rest)
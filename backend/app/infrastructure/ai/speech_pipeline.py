@@ -0,0 +1,118 @@
+"""
+Chat-to-speech pipeline.
+Voicing a chat answer used to take two sequential upstream calls: the
+whole completion, then the whole synthesis. Here completion deltas are
+passed through as they arrive, each sentence is handed to TTS as soon as
+the next one starts, and the clips are emitted in order between the text
+deltas, so the first sentence can play while the rest is still being
+generated.
+"""
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Optional, Tuple, TypeVar, Union
+
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.ai.sentences import SentenceBuffer
+from app.infrastructure.ai.tts_service import EmotionType, YuBuVoice
+
+T = TypeVar("T")
+
+
+@dataclass
+class SpeechChunk:
+    """Audio for one sentence of the answer."""
+
+    seq: int
+    text: str
+    audio: bytes
+
+
+async def speak_while_generating(
+    items: AsyncIterator[Union[str, T]],
+    voice: YuBuVoice,
+    emotion: EmotionType = "neutral",
+) -> AsyncIterator[Union[str, T, SpeechChunk]]:
+    """
+    Interleave a text stream with speech for its sentences.
+
+    Args:
+        items: Text deltas followed by any final non-text item (e.g. the
+            saved AIConversation from AIService.chat_stream)
+        voice: TTS service; sentences go through its audio cache
+        emotion: Voice emotion for every sentence
+
+    Yields:
+        Text deltas as they arrive, SpeechChunk objects in sentence order
+        as soon as each clip is ready, and the non-text items last.
+    """
+    limit = asyncio.Semaphore(max(1, settings.TTS_CHUNK_CONCURRENCY))
+    sentences = SentenceBuffer()
+    pending: Deque[Tuple[str, "asyncio.Task[bytes]"]] = deque()
+    finals = []
+    seq = 0
+
+    async def voice_sentence(sentence: str) -> bytes:
+        async with limit:
+            return await voice.speak(sentence, emotion=emotion)
+
+    def schedule(texts) -> None:
+        for text in texts:
+            pending.append((text, asyncio.ensure_future(voice_sentence(text))))
+
+    iterator = items.__aiter__()
+    next_item: Optional[asyncio.Future] = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while next_item is not None or pending:
+            waiting = {next_item} if next_item is not None else set()
+            if pending:
+                waiting.add(pending[0][1])
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            # Clips go out strictly in sentence order
+            while pending and pending[0][1].done():
+                text, task = pending.popleft()
+                try:
+                    audio = task.result()
+                except Exception as e:
+                    logger.warning(f"Chat speech skipped a sentence: {e}")
+                    continue
+                if not audio:
+                    continue  # nothing to voice (e.g. only an emotion tag)
+                yield SpeechChunk(seq=seq, text=text, audio=audio)
+                seq += 1
+
+            if next_item is None or not next_item.done():
+                continue
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                next_item = None
+                schedule(sentences.flush())
+                continue
+            next_item = asyncio.ensure_future(iterator.__anext__())
+            if isinstance(item, str):
+                schedule(sentences.feed(item))
+                yield item
+            else:
+                finals.append(item)
+    finally:
+        if next_item is not None and not next_item.done():
+            next_item.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await next_item
+        # Release the upstream stream (and its DB session) right away, not at GC
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+        for _, task in pending:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
+
+    for item in finals:
+        yield item
@@ -0,0 +1,88 @@
+"""
+Schema-validated structured output.
+JSON-returning endpoints ask the provider for JSON shaped like their
+response DTO and validate the completion against that DTO. A malformed or
+off-schema answer raises StructuredOutputError, which services already
+treat as "AI unavailable", instead of being passed on as `raw_response`.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+from app.config import settings
+from app.infrastructure.ai.errors import StructuredOutputError
+
+
+@lru_cache(maxsize=None)
+def _schema_format(dto: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": dto.__name__,
+            "schema": dto.model_json_schema(),
+            # The DTOs have optional fields with defaults, which strict mode
+            # rejects; the completion is validated locally instead
+            "strict": False,
+        },
+    }
+
+
+def response_format_for(dto: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """`response_format` request parameter for a DTO, or None when disabled."""
+    if not settings.LLM_STRUCTURED_OUTPUT_ENABLED:
+        return None
+    return _schema_format(dto)
+
+
+def _list_field(dto: Type[BaseModel]) -> Optional[str]:
+    """Name of the DTO's only list field, used to wrap bare JSON arrays."""
+    names = [
+        name for name, field in dto.model_fields.items()
+        if getattr(field.annotation, "__origin__", None) is list
+    ]
+    return names[0] if len(names) == 1 else None
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def parse_structured(
+    text: str,
+    dto: Type[BaseModel],
+    defaults: Optional[Dict[str, Any]] = None,
+    overrides: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Validate a completion against `dto` and return it as a plain dict.
+
+    `defaults` fill fields the model left out; `overrides` replace fields
+    the caller owns (e.g. ids) whatever the model put there. A bare JSON array is accepted
+    for DTOs with a single list field (prompts that ask for an array).
+    Raises StructuredOutputError when the text is not JSON or does not fit.
+    """
+    schema = dto.__name__
+    try:
+        data = json.loads(_strip_fence(text))
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(schema, f"invalid JSON ({e.msg} at {e.pos})") from e
+
+    if isinstance(data, list) and _list_field(dto):
+        data = {_list_field(dto): data}
+    if not isinstance(data, dict):
+        raise StructuredOutputError(schema, f"expected an object, got {type(data).__name__}")
+
+    try:
+        return dto.model_validate(
+            {**(defaults or {}), **data, **(overrides or {})}
+        ).model_dump(mode="json")
+    except ValidationError as e:
+        raise StructuredOutputError(schema, f"{e.error_count()} invalid field(s)") from e
@@ -0,0 +1,154 @@
+"""
+Daily token budgets per user and per school.
+Counters live in Redis hashes keyed by UTC day, are incremented atomically
+after every upstream call and are checked before the next one.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from app.config import settings
+from app.domain.entities.student_profile import StudentProfile
+from app.domain.repositories.student_profile_repository import StudentProfileRepository
+from app.infrastructure.ai.errors import TokenBudgetExceeded
+from app.infrastructure.ai.response_cache import LocalTTLCache
+from app.infrastructure.cache.redis_cache import RedisCache, redis_cache
+
+# Field used for users without a school (parents, independent students)
+NO_SCHOOL = "none"
+
+
+@dataclass(frozen=True)
+class UsageScope:
+    """Who an LLM call is billed to."""
+
+    user_id: UUID
+    school_id: Optional[UUID] = None
+
+    @property
+    def school_field(self) -> str:
+        return str(self.school_id) if self.school_id else NO_SCHOOL
+
+    @classmethod
+    def of(cls, user_id: UUID, profile: Optional[StudentProfile]) -> "UsageScope":
+        """Scope for a user whose profile is already loaded."""
+        return cls(user_id=user_id, school_id=profile.school_id if profile else None)
+
+
+# user_id → UsageScope; school membership rarely changes, so a short
+# in-process memo spares a profile query on cache-served requests
+_scope_cache = LocalTTLCache(max_entries=4096)
+_SCOPE_TTL_SECONDS = 600
+
+
+async def usage_scope_for(
+    profile_repo: StudentProfileRepository, user_id: UUID
+) -> UsageScope:
+    """Resolve the billing scope of a user from their student profile."""
+    scope = _scope_cache.get(str(user_id))
+    if scope is None:
+        scope = UsageScope.of(user_id, await profile_repo.get_by_user_id(user_id))
+        _scope_cache.set(str(user_id), scope, _SCOPE_TTL_SECONDS)
+    return scope
+
+
+class TokenBudget:
+    """Checks and records token usage against daily limits (0 = unlimited)."""
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        user_daily_limit: Optional[int] = None,
+        school_daily_limit: Optional[int] = None,
+    ):
+        self._cache = cache
+        self._user_limit = (
+            settings.AI_USER_DAILY_TOKEN_BUDGET
+            if user_daily_limit is None else user_daily_limit
+        )
+        self._school_limit = (
+            settings.AI_SCHOOL_DAILY_TOKEN_BUDGET
+            if school_daily_limit is None else school_daily_limit
+        )
+
+    @staticmethod
+    def _day(day: Optional[date] = None) -> str:
+        return (day or datetime.now(timezone.utc).date()).strftime("%Y%m%d")
+
+    @staticmethod
+    def _key(day: str, kind: str) -> str:
+        return f"ai:usage:{day}:{kind}"
+
+    async def ensure_available(self, scope: UsageScope) -> None:
+        """Raise TokenBudgetExceeded if the user or their school is over budget."""
+        if not self._user_limit and not self._school_limit:
+            return
+        day = self._day()
+        if self._user_limit:
+            [used] = await self._cache.hget_ints(
+                self._key(day, "user_tokens"), [str(scope.user_id)]
+            )
+            if used >= self._user_limit:
+                raise TokenBudgetExceeded(f"user {scope.user_id}", used, self._user_limit)
+        if self._school_limit and scope.school_id:
+            [used] = await self._cache.hget_ints(
+                self._key(day, "school_tokens"), [scope.school_field]
+            )
+            if used >= self._school_limit:
+                raise TokenBudgetExceeded(
+                    f"school {scope.school_id}", used, self._school_limit
+                )
+
+    async def record(self, scope: UsageScope, tokens: int) -> None:
+        """Add one request's token usage to today's counters."""
+        if tokens <= 0:
+            return
+        day = self._day()
+        ok = await self._cache.hincrby_many(
+            [
+                (self._key(day, "user_tokens"), str(scope.user_id), tokens),
+                (self._key(day, "school_tokens"), scope.school_field, tokens),
+                (self._key(day, "school_requests"), scope.school_field, 1),
+            ],
+            expire_seconds=settings.AI_USAGE_RETENTION_DAYS * 86400,
+        )
+        if not ok:
+            logger.debug(f"Token usage not recorded (Redis unavailable): {scope}")
+
+    async def school_usage(self, days: int = 1) -> List[Dict[str, Any]]:
+        """
+        Per-school totals for the last `days` UTC days (today included),
+        read straight from the counters.
+        """
+        today = datetime.now(timezone.utc).date()
+        totals: Dict[str, Dict[str, Any]] = {}
+        for offset in range(days):
+            day = self._day(today - timedelta(days=offset))
+            tokens = await self._cache.hgetall_ints(self._key(day, "school_tokens"))
+            requests = await self._cache.hgetall_ints(self._key(day, "school_requests"))
+            for school, used in tokens.items():
+                entry = totals.setdefault(
+                    school, {"school_id": school, "tokens": 0, "requests": 0, "daily": {}}
+                )
+                entry["tokens"] += used
+                entry["requests"] += requests.get(school, 0)
+                entry["daily"][day] = used
+        return sorted(totals.values(), key=lambda e: e["tokens"], reverse=True)
+
+    async def top_users(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Today's heaviest users."""
+        usage = await self._cache.hgetall_ints(self._key(self._day(), "user_tokens"))
+        ranked = sorted(usage.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{"user_id": user, "tokens": tokens} for user, tokens in ranked]
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        return {"user_daily": self._user_limit, "school_daily": self._school_limit}
+
+
+# Singleton budget shared by the gateway and the usage API
+token_budget = TokenBudget(redis_cache)
@@ -0,0 +1,76 @@
+"""
+Local token counting for prompt budgeting.
+Counts with the model's tiktoken encoding (a required dependency). The
+character-based estimate tuned for Turkish text is only used when tiktoken
+is missing or its encoding file cannot be loaded: tiktoken downloads BPE
+ranks on first use, so air-gapped hosts must pre-seed TIKTOKEN_CACHE_DIR.
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - broken install
+    tiktoken = None
+
+from app.config import settings
+
+# Turkish averages roughly 3 characters per BPE token on GPT-4o-class
+# tokenizers (agglutinative suffixes split often), so estimate conservatively.
+_CHARS_PER_TOKEN = 3.0
+# Role/separator overhead the chat format adds per message
+_TOKENS_PER_MESSAGE = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding_for(model: str):
+    if tiktoken is None:
+        logger.warning("tiktoken is not installed; token counts are estimates")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # encoding download failed (offline host)
+        logger.error(f"tiktoken encoding for {model} unavailable, estimating tokens: {e}")
+        return None
+
+
+def tokenizer_name(model: Optional[str] = None) -> str:
+    """Encoding used for `model`, or "estimate" when counting falls back."""
+    encoding = _encoding_for(model or settings.OPENAI_MODEL)
+    return encoding.name if encoding is not None else "estimate"
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count (or estimate) the tokens in a piece of text."""
+    if not text:
+        return 0
+    encoding = _encoding_for(model or settings.OPENAI_MODEL)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def count_message_tokens(
+    messages: List[Dict[str, str]], model: Optional[str] = None
+) -> int:
+    """Count the prompt tokens of a chat message list."""
+    return sum(
+        count_tokens(m["content"], model) + _TOKENS_PER_MESSAGE for m in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut text down to at most max_tokens, keeping the beginning."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding_for(model or settings.OPENAI_MODEL)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:max_tokens]).rstrip() + "…"
+    return text[: int(max_tokens * _CHARS_PER_TOKEN)].rstrip() + "…"
@@ -5,13 +5,26 @@ Jessica voice — Playful, Bright, Warm, Cute.
 Supports emotion-based voice settings for a child-friendly experience.
 """
 
+import asyncio
+import hashlib
+import importlib.util
 import re
-from typing import Literal, Optional
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 
 import httpx
 from loguru import logger
 
 from app.config import settings
+from app.infrastructure.ai.audio_variants import (
+    VARIANTS,
+    AudioTranscoder,
+    audio_transcoder,
+    media_type_for,
+)
+from app.infrastructure.ai.phrase_library import PhraseLibrary, default_phrases
+from app.infrastructure.ai.sentences import split_sentences
+from app.infrastructure.cache.audio_cache import AudioCache, audio_cache
+from app.infrastructure.cache.single_flight import SingleFlight, single_flight
 
 # ─── ElevenLabs Defaults ──────────────────────────────
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
@@ -30,9 +43,21 @@ EMOTION_VOICE_SETTINGS = {
     "excited": {"stability": 0.25, "similarity_boost": 0.85, "style": 0.80, "use_speaker_boost": True},
 }
 
+_AUDIO_HEADERS = {"Content-Type": "application/json", "Accept": "audio/mpeg"}
+
 EmotionType = Literal["happy", "encouraging", "gentle", "neutral", "excited"]
 
 
+def strip_id3(audio: bytes) -> bytes:
+    """Leading ID3v2 etiketini at; ardışık MP3 parçaları tek dosyada birleşebilsin."""
+    if len(audio) < 10 or audio[:3] != b"ID3":
+        return audio
+    size = 10 + ((audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9])
+    if audio[5] & 0x10:  # footer present
+        size += 10
+    return audio[size:]
+
+
 class YuBuVoice:
     """
     YuBu karakterinin ses servisi.
@@ -40,11 +65,58 @@ class YuBuVoice:
     Jessica sesi — çocuk dostu, oyunsu, sıcak.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[AudioCache] = None,
+        flight: Optional[SingleFlight] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        transcoder: Optional[AudioTranscoder] = None,
+        phrases: Optional[PhraseLibrary] = None,
+    ):
+        self._cache = cache or audio_cache
+        self._phrases = phrases or PhraseLibrary(default_phrases())
+        self._flight = flight or single_flight
+        self._transcoder = transcoder or audio_transcoder
+        self._client = http_client
         self._api_key = settings.ELEVENLABS_API_KEY
         self._voice_id = getattr(settings, "ELEVENLABS_VOICE_ID", YUBU_VOICE_ID)
         self._model = getattr(settings, "ELEVENLABS_MODEL", ELEVENLABS_MODEL)
 
+    async def connect(self) -> None:
+        """Havuzlu ElevenLabs istemcisini oluştur. Uygulama açılışında çağrılır."""
+        if self._client is not None:
+            return
+        # HTTP/2 yalnızca h2 paketi kuruluysa (httpx[http2])
+        http2 = settings.TTS_HTTP2 and importlib.util.find_spec("h2") is not None
+        self._client = httpx.AsyncClient(
+            base_url=settings.ELEVENLABS_BASE_URL or ELEVENLABS_API_URL,
+            timeout=settings.TTS_TIMEOUT_SECONDS,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.TTS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TTS_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.TTS_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            headers={"xi-api-key": self._api_key},
+        )
+        logger.info(
+            f"YuBu TTS client ready (max_connections={settings.TTS_MAX_CONNECTIONS}, "
+            f"http2={http2})"
+        )
+
+    async def disconnect(self) -> None:
+        """Havuzdaki bağlantıları kapat."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("YuBu TTS client closed")
+
+    async def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # Betikler ve testler uygulama yaşam döngüsü olmadan çalışabilir
+            await self.connect()
+        return self._client
+
     async def speak(
         self,
         text: str,
@@ -63,37 +135,223 @@ class YuBuVoice:
             MP3 formatında ses verisi (bytes)
         """
         clean_text = self._prepare_text(text, emotion)
+        if not clean_text:
+            return b""
+        segments = self._segments(clean_text, emotion)
+        if len(segments) > 1:
+            parts = [audio async for audio in self._speak_segments(segments, emotion)]
+            return b"".join(parts)
+        return await self._speak_clean(clean_text, emotion)
+
+    async def speak_variant(
+        self,
+        text: str,
+        emotion: EmotionType = "neutral",
+        variant: Optional[str] = None,
+    ) -> Tuple[bytes, str]:
+        """
+        Metni istenen ses biçiminde konuştur (ör. mobil için Opus).
+
+        Dönüştürülmüş biçim orijinal klibin yanında önbelleğe alınır;
+        dönüştürme süreç havuzunda çalışır. ffmpeg yoksa ya da dönüştürme
+        başarısız olursa orijinal MP3 döner.
+
+        Returns:
+            (ses verisi, medya tipi)
+        """
+        clean_text = self._prepare_text(text, emotion)
+        if variant not in VARIANTS or not clean_text or not self._transcoder.available:
+            return await self.speak(text, emotion=emotion), media_type_for(None)
+
+        # Dönüştürülmüş klip varsa orijinal MP3'e hiç dokunulmaz
+        spec = VARIANTS[variant]
+        key = self._audio_key(clean_text, emotion)
+        cached = await self._cache.get(key, variant, spec.extension)
+        if cached is not None:
+            return cached, spec.media_type
+
+        audio = await self.speak(text, emotion=emotion)
+
+        async def transcode() -> bytes:
+            encoded = await self._transcoder.transcode(audio, variant)
+            await self._cache.put(key, encoded, variant, spec.extension)
+            return encoded
+
+        try:
+            encoded, _ = await self._flight.do(f"{key}:{variant}", transcode)
+        except Exception as e:
+            logger.warning(f"TTS {variant} transcode failed, serving MP3: {e}")
+            return audio, media_type_for(None)
+        return encoded, spec.media_type
+
+    async def _speak_clean(self, clean_text: str, emotion: str) -> bytes:
+        """Hazırlanmış metni seslendir: önce önbellek, sonra tek ElevenLabs çağrısı."""
+        key = self._audio_key(clean_text, emotion)
+
+        # Daha önce seslendirilmiş metin (geri bildirim, yönerge) diskten gelir
+        cached = await self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Aynı anda gelen özdeş istekler (ör. tüm sınıfın aynı yönergeyi
+        # dinlemesi) tek bir ElevenLabs çağrısını paylaşır
+        audio_bytes, _ = await self._flight.do(
+            key, lambda: self._synthesize_and_store(key, clean_text, emotion)
+        )
+        return audio_bytes
+
+    def _segments(self, clean_text: str, emotion: str) -> List[str]:
+        """
+        Metni ayrı seslendirilecek parçalara ayır: baştaki/sondaki hazır
+        YuBu ifadeleri ve uzun metinlerde aradaki cümleler.
+        """
+        leading: List[str] = []
+        trailing: List[str] = []
+        rest = clean_text
+        if settings.TTS_PHRASE_LIBRARY_ENABLED:
+            leading, rest, trailing = self._phrases.split(
+                clean_text, emotion, self._prepare_text
+            )
+        middle = self._sentence_chunks(rest) if rest else []
+        return leading + middle + trailing
+
+    def _sentence_chunks(self, clean_text: str) -> List[str]:
+        """Uzun metni cümlelere böl; kısa metin tek parça kalır."""
+        if len(clean_text) < settings.TTS_CHUNK_MIN_CHARS:
+            return [clean_text]
+        return split_sentences(clean_text) or [clean_text]
+
+    async def _speak_segments(
+        self, segments: List[str], emotion: str
+    ) -> AsyncIterator[bytes]:
+        """
+        Parçaları sınırlı eşzamanlılıkla seslendir, sesleri sırayla döndür.
+
+        İlk parça hazır olur olmaz iletilir; her parça ayrı önbelleğe girer,
+        böylece metinler arasında ortak cümleler ve hazır ifadeler tekrar
+        seslendirilmez.
+        """
+        limit = asyncio.Semaphore(max(1, settings.TTS_CHUNK_CONCURRENCY))
+
+        async def voice_segment(segment: str) -> bytes:
+            async with limit:
+                return await self._speak_clean(segment, emotion)
+
+        tasks = [asyncio.ensure_future(voice_segment(s)) for s in segments]
+        try:
+            for index, task in enumerate(tasks):
+                audio = await task
+                yield audio if index == 0 else strip_id3(audio)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # retrieved; the first failure was raised above
+
+    async def prerender_phrases(self) -> int:
+        """
+        Hazır ifade kütüphanesini her emosyon için bir kez seslendir.
+        Klipler ses önbelleğine girer; sonraki konuşmalar yalnızca
+        değişen kısmı ElevenLabs'e gönderir.
+
+        Returns:
+            Hazırlanan klip sayısı
+        """
+        clips = 0
+        for emotion in EMOTION_VOICE_SETTINGS:
+            for phrase in self._phrases.phrases:
+                if await self.speak(phrase, emotion=emotion):
+                    clips += 1
+        return clips
+
+    def clip_hash(self, text: str, emotion: EmotionType = "neutral") -> str:
+        """Ham metnin seslendirme anahtarındaki içerik özeti (hex)."""
+        clean_text = self._prepare_text(text, emotion)
+        return self._audio_key(clean_text, emotion).split(":", 1)[1]
+
+    def _audio_key(self, clean_text: str, emotion: str) -> str:
+        """Seslendirme için içerik anahtarı (metin + emosyon + ses + model)."""
+        raw = "\x1f".join([clean_text, emotion, self._voice_id, self._model])
+        return "tts:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _synthesize_and_store(self, key: str, clean_text: str, emotion: str) -> bytes:
+        """Seslendir ve içerik anahtarıyla önbelleğe yaz."""
+        audio_bytes = await self._synthesize(clean_text, emotion)
+        await self._cache.put(key, audio_bytes)
+        return audio_bytes
+
+    async def stream(
+        self,
+        text: str,
+        emotion: EmotionType = "neutral",
+    ) -> AsyncIterator[bytes]:
+        """
+        Metni YuBu sesiyle parça parça seslendir.
+
+        ElevenLabs akışından gelen MP3 parçaları geldikçe iletilir; aynı
+        parçalar önbelleğe de yazılır ve klip tamamlanınca yayınlanır.
+        Önbellekte olan metin diskten parça parça okunur; uzun metinler
+        cümle cümle seslendirilip sırayla iletilir.
+        """
+        clean_text = self._prepare_text(text, emotion)
+        if not clean_text:
+            return
+        segments = self._segments(clean_text, emotion)
+        if len(segments) > 1:
+            async for audio in self._speak_segments(segments, emotion):
+                yield audio
+            return
+
+        key = self._audio_key(clean_text, emotion)
+        cached = await self._cache.open_stream(key)
+        if cached is not None:
+            async for chunk in cached:
+                yield chunk
+            return
+
+        writer = self._cache.writer(key)
+        try:
+            async for chunk in self._synthesize_stream(clean_text, emotion):
+                await writer.write(chunk)
+                yield chunk
+        except BaseException:
+            writer.abort()
+            raise
+        await writer.commit()
+
+    def _payload(self, clean_text: str, emotion: str) -> Dict[str, Any]:
+        """ElevenLabs istek gövdesi."""
         voice_settings = EMOTION_VOICE_SETTINGS.get(
             emotion, EMOTION_VOICE_SETTINGS["neutral"]
         )
-
         payload = {
             "text": clean_text,
             "model_id": self._model,
             "voice_settings": voice_settings,
         }
+        return payload
 
-        url = f"{ELEVENLABS_API_URL}/text-to-speech/{self._voice_id}"
-        headers = {
-            "xi-api-key": self._api_key,
-            "Content-Type": "application/json",
-            "Accept": "audio/mpeg",
-        }
-
+    async def _synthesize(self, clean_text: str, emotion: str) -> bytes:
+        """ElevenLabs API çağrısı yap, MP3 verisini döndür."""
+        client = await self._http()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
+            response = await client.post(
+                f"/text-to-speech/{self._voice_id}",
+                json=self._payload(clean_text, emotion),
+                headers=_AUDIO_HEADERS,
+            )
+            response.raise_for_status()
 
-                audio_bytes = response.content
+            audio_bytes = response.content
 
-                logger.info(
-                    f"YuBu TTS (ElevenLabs): {len(clean_text)} chars, "
-                    f"emotion={emotion}, voice={self._voice_id}, "
-                    f"audio_size={len(audio_bytes)} bytes"
-                )
+            logger.info(
+                f"YuBu TTS (ElevenLabs): {len(clean_text)} chars, "
+                f"emotion={emotion}, voice={self._voice_id}, "
+                f"audio_size={len(audio_bytes)} bytes"
+            )
 
-                return audio_bytes
+            return audio_bytes
 
         except httpx.HTTPStatusError as e:
             logger.error(f"ElevenLabs API error: {e.response.status_code} — {e.response.text[:200]}")
@@ -102,6 +360,36 @@ class YuBuVoice:
             logger.error(f"TTS error: {e}")
             raise
 
+    async def _synthesize_stream(self, clean_text: str, emotion: str) -> AsyncIterator[bytes]:
+        """ElevenLabs akış uç noktasından MP3 parçalarını geldikçe döndür."""
+        client = await self._http()
+        size = 0
+        try:
+            async with client.stream(
+                "POST",
+                f"/text-to-speech/{self._voice_id}/stream",
+                json=self._payload(clean_text, emotion),
+                headers=_AUDIO_HEADERS,
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    yield chunk
+
+            logger.info(
+                f"YuBu TTS stream (ElevenLabs): {len(clean_text)} chars, "
+                f"emotion={emotion}, voice={self._voice_id}, audio_size={size} bytes"
+            )
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"ElevenLabs API error: {e.response.status_code} — {e.response.text[:200]}")
+            raise
+        except Exception as e:
+            logger.error(f"TTS stream error: {e}")
+            raise
+
     def _prepare_text(self, text: str, emotion: EmotionType) -> str:
         """
         Metni TTS için hazırla.
@@ -130,3 +418,7 @@ class YuBuVoice:
             text=scenario["text"],
             emotion=scenario["emotion"],
         )
+
+
+# Singleton voice; its connection pool is shared by every request
+yubu_voice = YuBuVoice()
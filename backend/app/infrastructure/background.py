@@ -0,0 +1,46 @@
+"""
+Fire-and-forget background work.
+Keeps strong references to spawned tasks so they are not garbage collected
+mid-flight, logs their failures and lets the lifespan drain them on shutdown.
+"""
+
+import asyncio
+from typing import Coroutine, Optional, Set
+
+from loguru import logger
+
+_tasks: Set[asyncio.Task] = set()
+
+
+def _on_done(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error(f"Background task {task.get_name()} failed: {error}")
+
+
+def spawn(coro: Coroutine, name: Optional[str] = None) -> asyncio.Task:
+    """Run a coroutine in the background without awaiting it."""
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+async def drain_background_tasks(timeout: float = 5.0) -> None:
+    """Wait for running background tasks, cancelling whatever outlives the timeout."""
+    if not _tasks:
+        return
+    pending = list(_tasks)
+    _, still_running = await asyncio.wait(pending, timeout=timeout)
+    for task in still_running:
+        task.cancel()
+    if still_running:
+        logger.warning(f"Cancelled {len(still_running)} background tasks on shutdown")
+
+
+def background_task_count() -> int:
+    """Number of background tasks still running."""
+    return len(_tasks)
@@ -0,0 +1,272 @@
+"""
+Content-addressed store for synthesized speech.
+Clips are keyed by a hash of (cleaned text, emotion, voice, model), so the
+same sentence is synthesized once and then served from local disk. Blobs
+live in a directory bounded by TTS_CACHE_MAX_BYTES; last-access times are
+kept in a Redis sorted set so every worker sharing the directory agrees on
+which clips are coldest. Without Redis, file mtimes order the eviction.
+Transcoded variants (e.g. Opus) are stored next to the original clip and
+evicted independently.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.cache.redis_cache import RedisCache, redis_cache
+
+_INDEX_KEY = "tts:audio:lru"
+_READ_CHUNK = 16384
+
+
+class AudioCache:
+    """On-disk LRU of audio blobs with a shared Redis access index."""
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        directory: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self._cache = cache
+        self._dir = Path(directory or settings.TTS_CACHE_DIR)
+        self._max_bytes = settings.TTS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        # Bytes on disk as of the last scan plus what this worker wrote since
+        self._bytes: Optional[int] = None
+        self._evicting = asyncio.Lock()
+
+    def _path(self, key: str, variant: Optional[str] = None, extension: str = "mp3") -> Path:
+        digest = key.split(":", 1)[-1]
+        name = f"{digest}.{variant}.{extension}" if variant else f"{digest}.{extension}"
+        return self._dir / digest[:2] / name
+
+    @staticmethod
+    def _member(path: Path) -> str:
+        return path.name
+
+    async def get(
+        self, key: str, variant: Optional[str] = None, extension: str = "mp3"
+    ) -> Optional[bytes]:
+        """Stored audio for a key (or one of its variants), or None. A hit refreshes its LRU position."""
+        if not settings.TTS_CACHE_ENABLED:
+            return None
+        path = self._path(key, variant, extension)
+        try:
+            data = await asyncio.to_thread(_read_and_touch, path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"TTS cache read failed for {path.name}: {e}")
+            return None
+        await self._touch(path)
+        return data
+
+    async def put(
+        self, key: str, data: bytes, variant: Optional[str] = None, extension: str = "mp3"
+    ) -> None:
+        """Store audio for a key (or one of its variants), evicting the coldest clips if over the limit."""
+        if not settings.TTS_CACHE_ENABLED or not data:
+            return
+        path = self._path(key, variant, extension)
+        try:
+            await asyncio.to_thread(_write_atomic, path, data)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for {path.name}: {e}")
+            return
+        await self._stored(path, len(data))
+
+    async def open_stream(self, key: str) -> Optional[AsyncIterator[bytes]]:
+        """Stored audio for a key as chunks read off disk, or None on a miss."""
+        if not settings.TTS_CACHE_ENABLED:
+            return None
+        path = self._path(key)
+        try:
+            handle = await asyncio.to_thread(_open_and_touch, path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"TTS cache read failed for {path.name}: {e}")
+            return None
+        await self._touch(path)
+        return _read_chunks(handle)
+
+    def writer(self, key: str) -> "AudioCacheWriter":
+        """Incremental writer that stores a clip once it is complete."""
+        return AudioCacheWriter(self, self._path(key))
+
+    async def _stored(self, path: Path, size: int) -> None:
+        await self._touch(path)
+        if self._bytes is not None:
+            self._bytes += size
+        if self._bytes is None or self._bytes > self._max_bytes:
+            await self.evict()
+
+    async def evict(self) -> int:
+        """Delete least recently used clips until under the size limit; returns how many."""
+        async with self._evicting:
+            files = await asyncio.to_thread(_scan, self._dir)
+            total = sum(size for _, size, _ in files)
+            self._bytes = total
+            if total <= self._max_bytes:
+                return 0
+
+            members = [self._member(path) for path, _, _ in files]
+            if self._cache.is_connected:
+                scores = await self._cache.zmscore(_INDEX_KEY, members)
+            else:
+                scores = [None] * len(members)
+            ordered = sorted(
+                zip(files, scores),
+                key=lambda item: item[1] if item[1] is not None else item[0][2],
+            )
+            # Evict to 90% so a busy cache does not rescan on every write
+            target = int(self._max_bytes * 0.9)
+            removed: List[str] = []
+            for (path, size, _), _ in ordered:
+                if total <= target:
+                    break
+                try:
+                    await asyncio.to_thread(path.unlink)
+                except FileNotFoundError:
+                    pass  # another worker evicted it first
+                except OSError as e:
+                    logger.warning(f"TTS cache evict failed for {path.name}: {e}")
+                    continue
+                total -= size
+                removed.append(self._member(path))
+
+            if self._cache.is_connected:
+                await self._cache.zrem(_INDEX_KEY, removed)
+            self._bytes = total
+            logger.info(f"TTS cache evicted {len(removed)} clips, {total} bytes left")
+            return len(removed)
+
+    async def _touch(self, path: Path) -> None:
+        if self._cache.is_connected:
+            await self._cache.zadd(_INDEX_KEY, {self._member(path): time.time()})
+
+    @property
+    def size_bytes(self) -> Optional[int]:
+        """Bytes on disk as last seen by this worker (None before the first scan)."""
+        return self._bytes
+
+
+class AudioCacheWriter:
+    """
+    Tees a streamed clip to a temporary file and publishes it on commit,
+    so memory stays flat and readers never see a partial clip.
+    """
+
+    def __init__(self, cache: AudioCache, path: Path):
+        self._cache = cache
+        self._path = path
+        self._tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._failed = not settings.TTS_CACHE_ENABLED
+
+    async def write(self, chunk: bytes) -> None:
+        if self._failed or not chunk:
+            return
+        try:
+            if self._file is None:
+                self._file = await asyncio.to_thread(_open_for_write, self._tmp)
+            await asyncio.to_thread(self._file.write, chunk)
+            self._size += len(chunk)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for {self._path.name}: {e}")
+            self.abort()
+
+    async def commit(self) -> None:
+        """Publish the clip under its content key."""
+        if self._failed or self._file is None:
+            self.abort()
+            return
+        try:
+            await asyncio.to_thread(_close_and_replace, self._file, self._tmp, self._path)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for {self._path.name}: {e}")
+            self.abort()
+            return
+        self._file = None
+        await self._cache._stored(self._path, self._size)
+
+    def abort(self) -> None:
+        """Drop the partial clip (upstream error or client went away)."""
+        self._failed = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._tmp.unlink(missing_ok=True)
+
+
+def _read_and_touch(path: Path) -> bytes:
+    data = path.read_bytes()
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def _open_and_touch(path: Path) -> BinaryIO:
+    handle = path.open("rb")
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return handle
+
+
+async def _read_chunks(handle: BinaryIO) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = await asyncio.to_thread(handle.read, _READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        handle.close()
+
+
+def _open_for_write(path: Path) -> BinaryIO:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.open("wb")
+
+
+def _close_and_replace(handle: BinaryIO, tmp: Path, path: Path) -> None:
+    handle.close()
+    os.replace(tmp, path)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _scan(directory: Path) -> List[Tuple[Path, int, float]]:
+    """(path, size, mtime) of every stored clip."""
+    files = []
+    if not directory.exists():
+        return files
+    for path in directory.glob("*/*"):
+        if path.name.startswith("."):
+            continue  # in-progress write
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((path, stat.st_size, stat.st_mtime))
+    return files
+
+
+# Singleton audio cache instance
+audio_cache = AudioCache(redis_cache)
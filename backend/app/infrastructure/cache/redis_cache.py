@@ -3,7 +3,7 @@ Redis cache service for caching frequently accessed data.
 """
 
 import json
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import redis.asyncio as aioredis
 from loguru import logger
@@ -11,6 +11,15 @@ from loguru import logger
 from app.config import settings
 
 
+# Delete a lock only if it is still held by the caller's token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
 class RedisCache:
     """Async Redis cache wrapper with JSON serialization."""
 
@@ -75,6 +84,154 @@ class RedisCache:
             logger.warning(f"Redis DELETE error for key '{key}': {e}")
             return False
 
+    async def ttl(self, key: str) -> int:
+        """Get the remaining TTL of a key in seconds (-2 if missing)."""
+        if not self._redis:
+            return -2
+        try:
+            return await self._redis.ttl(key)
+        except Exception as e:
+            logger.warning(f"Redis TTL error for key '{key}': {e}")
+            return -2
+
+    async def exists(self, key: str) -> bool:
+        """Check whether a key exists."""
+        if not self._redis:
+            return False
+        try:
+            return bool(await self._redis.exists(key))
+        except Exception as e:
+            logger.warning(f"Redis EXISTS error for key '{key}': {e}")
+            return False
+
+    async def acquire_lock(self, key: str, token: str, expire_seconds: int) -> bool:
+        """Take a short-lived lease (SET NX EX). True if this caller owns it."""
+        if not self._redis:
+            return False
+        try:
+            return bool(await self._redis.set(key, token, nx=True, ex=expire_seconds))
+        except Exception as e:
+            logger.warning(f"Redis lock error for key '{key}': {e}")
+            return False
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release a lease previously taken with the same token."""
+        if not self._redis:
+            return False
+        try:
+            return bool(await self._redis.eval(_RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.warning(f"Redis unlock error for key '{key}': {e}")
+            return False
+
+    async def incr(self, key: str, expire_seconds: int) -> Optional[int]:
+        """Increment a counter and refresh its TTL. None if Redis is unavailable."""
+        if not self._redis:
+            return None
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, expire_seconds)
+                value, _ = await pipe.execute()
+            return int(value)
+        except Exception as e:
+            logger.warning(f"Redis INCR error for key '{key}': {e}")
+            return None
+
+    async def sadd(self, key: str, members: List[str], expire_seconds: int) -> bool:
+        """Add members to a set and refresh its TTL."""
+        if not self._redis or not members:
+            return False
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.sadd(key, *members)
+                pipe.expire(key, expire_seconds)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Redis SADD error for key '{key}': {e}")
+            return False
+
+    async def smembers(self, key: str) -> Set[str]:
+        """Read all members of a set."""
+        if not self._redis:
+            return set()
+        try:
+            return set(await self._redis.smembers(key))
+        except Exception as e:
+            logger.warning(f"Redis SMEMBERS error for key '{key}': {e}")
+            return set()
+
+    async def zadd(self, key: str, scores: Dict[str, float]) -> bool:
+        """Set the scores of sorted-set members."""
+        if not self._redis or not scores:
+            return False
+        try:
+            await self._redis.zadd(key, scores)
+            return True
+        except Exception as e:
+            logger.warning(f"Redis ZADD error for key '{key}': {e}")
+            return False
+
+    async def zmscore(self, key: str, members: List[str]) -> List[Optional[float]]:
+        """Scores of several sorted-set members (None where missing)."""
+        if not self._redis or not members:
+            return [None] * len(members)
+        try:
+            return list(await self._redis.zmscore(key, members))
+        except Exception as e:
+            logger.warning(f"Redis ZMSCORE error for key '{key}': {e}")
+            return [None] * len(members)
+
+    async def zrem(self, key: str, members: List[str]) -> int:
+        """Remove members from a sorted set."""
+        if not self._redis or not members:
+            return 0
+        try:
+            return int(await self._redis.zrem(key, *members))
+        except Exception as e:
+            logger.warning(f"Redis ZREM error for key '{key}': {e}")
+            return 0
+
+    async def hincrby_many(
+        self, increments: List[Tuple[str, str, int]], expire_seconds: int
+    ) -> bool:
+        """Atomically add to several hash fields (one MULTI) and refresh their TTL."""
+        if not self._redis:
+            return False
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                for key, field, amount in increments:
+                    pipe.hincrby(key, field, amount)
+                for key in {key for key, _, _ in increments}:
+                    pipe.expire(key, expire_seconds)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Redis HINCRBY error: {e}")
+            return False
+
+    async def hget_ints(self, key: str, fields: List[str]) -> List[int]:
+        """Read integer hash fields (missing fields read as 0)."""
+        if not self._redis:
+            return [0] * len(fields)
+        try:
+            values = await self._redis.hmget(key, fields)
+            return [int(v) if v is not None else 0 for v in values]
+        except Exception as e:
+            logger.warning(f"Redis HMGET error for key '{key}': {e}")
+            return [0] * len(fields)
+
+    async def hgetall_ints(self, key: str) -> Dict[str, int]:
+        """Read a whole hash of integer counters."""
+        if not self._redis:
+            return {}
+        try:
+            return {k: int(v) for k, v in (await self._redis.hgetall(key)).items()}
+        except Exception as e:
+            logger.warning(f"Redis HGETALL error for key '{key}': {e}")
+            return {}
+
     async def delete_pattern(self, pattern: str) -> int:
         """Delete all keys matching a pattern."""
         if not self._redis:
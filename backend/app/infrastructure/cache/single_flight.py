@@ -0,0 +1,109 @@
+"""
+Single-flight request coalescing.
+Concurrent callers with the same key share one in-flight execution inside a
+worker; an optional short Redis lease extends this across workers.
+"""
+
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from loguru import logger
+
+from app.config import settings
+from app.infrastructure.cache.redis_cache import RedisCache, redis_cache
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one upstream request."""
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        lease_seconds: Optional[int] = None,
+        poll_interval: float = 0.1,
+    ):
+        self._cache = cache
+        self._lease_seconds = lease_seconds or settings.SINGLE_FLIGHT_LEASE_SECONDS
+        self._poll_interval = poll_interval
+        self._inflight: Dict[str, "asyncio.Task"] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        lookup: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+    ) -> Tuple[T, bool]:
+        """
+        Run fn once per key and share its result with concurrent callers.
+
+        Args:
+            key: Coalescing key (use the same key as the result cache)
+            fn: Produces the value (e.g. an OpenAI or ElevenLabs call)
+            lookup: Reads the value another worker stored. When given, a
+                Redis lease coordinates workers; without it coalescing is
+                limited to this process.
+
+        Returns:
+            (value, leader) — leader is True for the caller whose fn ran.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), False
+
+        task = asyncio.ensure_future(self._run(key, fn, lookup))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        # Shielded so a disconnecting first caller does not cancel the
+        # request everyone else is waiting on
+        return await asyncio.shield(task), True
+
+    def _finish(self, key: str, task: "asyncio.Task") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter left
+            task.exception()
+
+    async def _run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        lookup: Optional[Callable[[], Awaitable[Optional[T]]]],
+    ) -> T:
+        if lookup is None or not self._cache.is_connected:
+            return await fn()
+
+        lease_key = f"sf:lease:{key}"
+        token = uuid.uuid4().hex
+        if await self._cache.acquire_lock(lease_key, token, self._lease_seconds):
+            try:
+                return await fn()
+            finally:
+                await self._cache.release_lock(lease_key, token)
+
+        # Another worker holds the lease: wait for its result
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._lease_seconds
+        while loop.time() < deadline:
+            await asyncio.sleep(self._poll_interval)
+            value = await lookup()
+            if value is not None:
+                return value
+            if not await self._cache.exists(lease_key):
+                # Lease released without a stored result (upstream failed)
+                break
+
+        logger.debug(f"Single-flight lease wait gave up: {key}")
+        return await fn()
+
+    @property
+    def inflight_count(self) -> int:
+        """Number of keys currently being computed in this worker."""
+        return len(self._inflight)
+
+
+# Singleton single-flight instance
+single_flight = SingleFlight(redis_cache)
@@ -2,10 +2,11 @@
 SQLAlchemy implementation of AIConversationRepository.
 """
 
+from datetime import timezone
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.entities.ai_conversation import AIConversation
@@ -52,6 +53,28 @@ class SQLAlchemyAIConversationRepository(AIConversationRepository):
         await self._session.refresh(model)
         return self._to_entity(model)
 
+    async def create_many(self, conversations: List[AIConversation]) -> None:
+        """Insert many conversation records in a single multi-row statement."""
+        if not conversations:
+            return
+        rows = [
+            {
+                "id": c.id,
+                "user_id": c.user_id,
+                "message": c.message,
+                "response": c.response,
+                "context": c.context,
+                "role_context": c.role_context,
+                "tokens_used": c.tokens_used,
+                "timestamp": (
+                    c.timestamp.replace(tzinfo=timezone.utc)
+                    if c.timestamp.tzinfo is None else c.timestamp
+                ),
+            }
+            for c in conversations
+        ]
+        await self._session.execute(insert(AIConversationModel), rows)
+
     async def get_by_id(self, conversation_id: UUID) -> Optional[AIConversation]:
         """Get a conversation by ID."""
         stmt = select(AIConversationModel).where(
@@ -77,15 +100,13 @@ class SQLAlchemyAIConversationRepository(AIConversationRepository):
         return [self._to_entity(m) for m in models]
 
     async def get_recent_context(
-        self, user_id: UUID, limit: int = 10
+        self, user_id: UUID, limit: int = 10, role_context: Optional[str] = None
     ) -> List[AIConversation]:
-        """Get recent conversation context for AI continuity."""
-        stmt = (
-            select(AIConversationModel)
-            .where(AIConversationModel.user_id == user_id)
-            .order_by(AIConversationModel.timestamp.desc())
-            .limit(limit)
-        )
+        """Get recent conversation context for AI continuity, optionally for one role."""
+        stmt = select(AIConversationModel).where(AIConversationModel.user_id == user_id)
+        if role_context is not None:
+            stmt = stmt.where(AIConversationModel.role_context == role_context)
+        stmt = stmt.order_by(AIConversationModel.timestamp.desc()).limit(limit)
         result = await self._session.execute(stmt)
         models = result.scalars().all()
         # Return in chronological order
@@ -0,0 +1,178 @@
+"""
+Write-behind persistence for AI conversation records.
+AI responses are returned as soon as the LLM answers; the conversation rows
+are buffered in memory and bulk-inserted in the background.
+"""
+
+import asyncio
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.domain.entities.ai_conversation import AIConversation
+from app.domain.repositories.ai_conversation_repository import AIConversationRepository
+from app.infrastructure.database.ai_conversation_repository_impl import (
+    SQLAlchemyAIConversationRepository,
+)
+from app.infrastructure.database.session import async_session_factory
+
+
+class ConversationWriteBehind:
+    """
+    Bounded buffer that flushes AIConversation entities every
+    `flush_interval_ms` or `batch_size` rows, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self._batch_size = batch_size or settings.AI_CONVERSATION_BATCH_SIZE
+        self._flush_interval = (
+            flush_interval_ms or settings.AI_CONVERSATION_FLUSH_INTERVAL_MS
+        ) / 1000
+        self._max_pending = max_pending or settings.AI_CONVERSATION_MAX_PENDING
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Rows the flusher had dequeued when it was cancelled
+        self._unflushed: List[AIConversation] = []
+
+    async def start(self) -> None:
+        """Start the background flusher. Called from the app lifespan."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Conversation write-behind started (batch={self._batch_size}, "
+            f"interval={int(self._flush_interval * 1000)}ms)"
+        )
+
+    async def stop(self) -> None:
+        """Flush everything still buffered and stop the flusher."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        remaining, self._unflushed = self._unflushed, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), self._batch_size):
+            await self._flush(remaining[start:start + self._batch_size])
+        logger.info(f"Conversation write-behind stopped ({len(remaining)} rows flushed)")
+
+    async def submit(self, conversation: AIConversation) -> None:
+        """
+        Queue a conversation for persistence.
+        Waits only when the buffer is full (backpressure keeps memory bounded);
+        writes immediately when the flusher is not running (scripts, tests).
+        """
+        if self._task is None:
+            await self._flush([conversation])
+            return
+        await self._queue.put(conversation)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[AIConversation] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self._flush_interval
+                while len(batch) < self._batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._flush(batch)
+            except asyncio.CancelledError:
+                # Shutting down mid-collect or mid-flush: hand the batch back to stop()
+                self._unflushed.extend(batch)
+                raise
+
+    async def _flush(self, batch: List[AIConversation]) -> None:
+        """Bulk insert a batch; fall back to row-by-row if the batch fails."""
+        if not batch:
+            return
+        try:
+            async with self._session_factory() as session:
+                await SQLAlchemyAIConversationRepository(session).create_many(batch)
+                await session.commit()
+            logger.debug(f"Flushed {len(batch)} AI conversations")
+        except Exception as e:
+            logger.warning(f"AI conversation batch insert failed ({len(batch)} rows): {e}")
+            for conversation in batch:
+                try:
+                    async with self._session_factory() as session:
+                        await SQLAlchemyAIConversationRepository(session).create_many(
+                            [conversation]
+                        )
+                        await session.commit()
+                except Exception as row_error:
+                    logger.error(
+                        f"Dropping AI conversation {conversation.id}: {row_error}"
+                    )
+
+    @property
+    def pending_count(self) -> int:
+        """Rows waiting to be flushed."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+class BufferedAIConversationRepository(AIConversationRepository):
+    """
+    AIConversationRepository whose writes go through the write-behind buffer.
+    Reads are delegated to the wrapped repository.
+    """
+
+    def __init__(
+        self,
+        repository: AIConversationRepository,
+        writer: ConversationWriteBehind,
+    ):
+        self._repository = repository
+        self._writer = writer
+
+    async def create(self, conversation: AIConversation) -> AIConversation:
+        """Queue the record and return it immediately (id/timestamp are set client-side)."""
+        await self._writer.submit(conversation)
+        return conversation
+
+    async def create_many(self, conversations: List[AIConversation]) -> None:
+        """Queue many records."""
+        for conversation in conversations:
+            await self._writer.submit(conversation)
+
+    async def get_by_id(self, conversation_id):
+        return await self._repository.get_by_id(conversation_id)
+
+    async def list_by_user(self, user_id, skip: int = 0, limit: int = 50):
+        return await self._repository.list_by_user(user_id, skip, limit)
+
+    async def get_recent_context(self, user_id, limit: int = 10, role_context=None):
+        return await self._repository.get_recent_context(user_id, limit, role_context)
+
+
+# Singleton write-behind buffer
+conversation_writer = ConversationWriteBehind(async_session_factory)
+
+
+def buffered_conversation_repository(session: AsyncSession) -> AIConversationRepository:
+    """SQLAlchemy conversation repository with writes routed through the buffer."""
+    return BufferedAIConversationRepository(
+        SQLAlchemyAIConversationRepository(session), conversation_writer
+    )
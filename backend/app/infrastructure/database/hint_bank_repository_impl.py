@@ -0,0 +1,101 @@
+"""
+SQLAlchemy implementation of HintBankRepository.
+"""
+
+from typing import Dict, List, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete as sa_delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.entities.enums import LearningDifficulty
+from app.domain.entities.hint_bank import HintBankEntry
+from app.domain.repositories.hint_bank_repository import HintBankRepository
+from app.infrastructure.database.models import HintBankModel
+
+
+class SQLAlchemyHintBankRepository(HintBankRepository):
+    """Concrete implementation of HintBankRepository using SQLAlchemy."""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    def _to_entity(self, model: HintBankModel) -> HintBankEntry:
+        """Convert SQLAlchemy model to domain entity."""
+        return HintBankEntry(
+            id=model.id,
+            chapter_id=model.chapter_id,
+            learning_difficulty=model.learning_difficulty,
+            hint_level=model.hint_level,
+            variant=model.variant,
+            hint=model.hint,
+            fingerprint=model.fingerprint,
+            created_at=model.created_at,
+        )
+
+    async def list_variants(
+        self,
+        chapter_id: UUID,
+        learning_difficulty: LearningDifficulty,
+        hint_level: int,
+    ) -> List[HintBankEntry]:
+        """List the hint variants of one bucket, ordered by variant."""
+        stmt = (
+            select(HintBankModel)
+            .where(
+                HintBankModel.chapter_id == chapter_id,
+                HintBankModel.learning_difficulty == learning_difficulty,
+                HintBankModel.hint_level == hint_level,
+            )
+            .order_by(HintBankModel.variant.asc())
+        )
+        result = await self._session.execute(stmt)
+        return [self._to_entity(m) for m in result.scalars().all()]
+
+    async def fingerprints(
+        self, chapter_id: UUID
+    ) -> Dict[Tuple[LearningDifficulty, int], str]:
+        """Fingerprint of every generated bucket of a chapter."""
+        stmt = (
+            select(
+                HintBankModel.learning_difficulty,
+                HintBankModel.hint_level,
+                HintBankModel.fingerprint,
+            )
+            .where(HintBankModel.chapter_id == chapter_id)
+            .distinct()
+        )
+        result = await self._session.execute(stmt)
+        return {(row[0], row[1]): row[2] for row in result.all()}
+
+    async def replace_variants(
+        self,
+        chapter_id: UUID,
+        learning_difficulty: LearningDifficulty,
+        hint_level: int,
+        hints: List[str],
+        fingerprint: str,
+    ) -> None:
+        """Replace all variants of one bucket."""
+        await self._session.execute(
+            sa_delete(HintBankModel).where(
+                HintBankModel.chapter_id == chapter_id,
+                HintBankModel.learning_difficulty == learning_difficulty,
+                HintBankModel.hint_level == hint_level,
+            )
+        )
+        if not hints:
+            return
+        rows = [
+            {
+                "id": uuid4(),
+                "chapter_id": chapter_id,
+                "learning_difficulty": learning_difficulty,
+                "hint_level": hint_level,
+                "variant": variant,
+                "hint": hint,
+                "fingerprint": fingerprint,
+            }
+            for variant, hint in enumerate(hints)
+        ]
+        await self._session.execute(insert(HintBankModel), rows)
@@ -317,6 +317,96 @@ class AIConversationModel(Base):
         return f"<AIConversation(id={self.id}, user={self.user_id})>"
 
 
+class HintBankModel(Base):
+    """SQLAlchemy model for pregenerated chapter hints (HintBankEntry)."""
+
+    __tablename__ = "hint_bank"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, default=uuid.uuid4
+    )
+    chapter_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid,
+        ForeignKey("chapters.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    learning_difficulty: Mapped[LearningDifficulty] = mapped_column(
+        SAEnum(LearningDifficulty, name="learning_difficulty_enum", create_type=False),
+        nullable=False,
+    )
+    hint_level: Mapped[int] = mapped_column(Integer, nullable=False)
+    variant: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    hint: Mapped[str] = mapped_column(Text, nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_hint_bank_bucket",
+            "chapter_id",
+            "learning_difficulty",
+            "hint_level",
+            "variant",
+            unique=True,
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<HintBank(chapter={self.chapter_id}, "
+            f"difficulty={self.learning_difficulty}, level={self.hint_level})>"
+        )
+
+
+class PracticeProblemModel(Base):
+    """SQLAlchemy model for the shared practice-problem bank."""
+
+    __tablename__ = "practice_problems"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, default=uuid.uuid4
+    )
+    learning_difficulty: Mapped[LearningDifficulty] = mapped_column(
+        SAEnum(LearningDifficulty, name="learning_difficulty_enum", create_type=False),
+        nullable=False,
+    )
+    skill: Mapped[str] = mapped_column(String(100), nullable=False)
+    age_band: Mapped[str] = mapped_column(String(10), nullable=False)
+    difficulty: Mapped[str] = mapped_column(String(20), nullable=False, default="easy")
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    question_key: Mapped[str] = mapped_column(String(64), nullable=False)
+    correct_answer: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    options: Mapped[List[str]] = mapped_column(JSON, nullable=False, default=list)
+    hint: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    skill_focus: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_practice_problems_bucket",
+            "learning_difficulty",
+            "skill",
+            "age_band",
+            "difficulty",
+        ),
+        Index(
+            "ix_practice_problems_question",
+            "learning_difficulty",
+            "skill",
+            "age_band",
+            "question_key",
+            unique=True,
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<PracticeProblem(id={self.id}, skill={self.skill})>"
+
+
 class BadgeModel(Base):
     """SQLAlchemy model for Badge entity."""
 
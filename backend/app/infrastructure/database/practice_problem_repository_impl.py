@@ -0,0 +1,108 @@
+"""
+SQLAlchemy implementation of PracticeProblemRepository.
+"""
+
+from typing import Collection, List
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.entities.enums import LearningDifficulty
+from app.domain.entities.practice_problem import PracticeProblem
+from app.domain.repositories.practice_problem_repository import PracticeProblemRepository
+from app.infrastructure.database.models import PracticeProblemModel
+
+
+class SQLAlchemyPracticeProblemRepository(PracticeProblemRepository):
+    """Concrete implementation of PracticeProblemRepository using SQLAlchemy."""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    def _to_entity(self, model: PracticeProblemModel) -> PracticeProblem:
+        """Convert SQLAlchemy model to domain entity."""
+        return PracticeProblem(
+            id=model.id,
+            learning_difficulty=model.learning_difficulty,
+            skill=model.skill,
+            age_band=model.age_band,
+            difficulty=model.difficulty,
+            question=model.question,
+            question_key=model.question_key,
+            correct_answer=model.correct_answer,
+            options=model.options or [],
+            hint=model.hint,
+            skill_focus=model.skill_focus,
+            created_at=model.created_at,
+        )
+
+    async def sample(
+        self,
+        learning_difficulty: LearningDifficulty,
+        skill: str,
+        age_band: str,
+        difficulties: Collection[str],
+        exclude_ids: Collection[UUID],
+        limit: int,
+    ) -> List[PracticeProblem]:
+        """Random problems from a bucket, skipping the excluded IDs."""
+        stmt = select(PracticeProblemModel).where(
+            PracticeProblemModel.learning_difficulty == learning_difficulty,
+            PracticeProblemModel.skill == skill,
+            PracticeProblemModel.age_band == age_band,
+            PracticeProblemModel.difficulty.in_(list(difficulties)),
+        )
+        if exclude_ids:
+            stmt = stmt.where(PracticeProblemModel.id.not_in(list(exclude_ids)))
+        stmt = stmt.order_by(func.random()).limit(limit)
+        result = await self._session.execute(stmt)
+        return [self._to_entity(m) for m in result.scalars().all()]
+
+    async def count(
+        self, learning_difficulty: LearningDifficulty, skill: str, age_band: str
+    ) -> int:
+        """Number of problems in a bucket (all difficulties)."""
+        stmt = select(func.count(PracticeProblemModel.id)).where(
+            PracticeProblemModel.learning_difficulty == learning_difficulty,
+            PracticeProblemModel.skill == skill,
+            PracticeProblemModel.age_band == age_band,
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar() or 0
+
+    async def add_many(self, problems: List[PracticeProblem]) -> List[PracticeProblem]:
+        """Insert problems, skipping duplicate questions. Returns the ones stored."""
+        if not problems:
+            return []
+        rows = [
+            {
+                "id": p.id,
+                "learning_difficulty": p.learning_difficulty,
+                "skill": p.skill,
+                "age_band": p.age_band,
+                "difficulty": p.difficulty,
+                "question": p.question,
+                "question_key": p.question_key,
+                "correct_answer": p.correct_answer,
+                "options": p.options,
+                "hint": p.hint,
+                "skill_focus": p.skill_focus,
+            }
+            for p in problems
+        ]
+        dialect = self._session.get_bind().dialect.name
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = (
+            insert(PracticeProblemModel)
+            .values(rows)
+            .on_conflict_do_nothing(
+                index_elements=["learning_difficulty", "skill", "age_band", "question_key"]
+            )
+            .returning(PracticeProblemModel.id)
+        )
+        result = await self._session.execute(stmt)
+        stored = set(result.scalars().all())
+        return [p for p in problems if p.id in stored]
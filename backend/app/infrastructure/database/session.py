@@ -52,6 +52,15 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def get_stream_db() -> AsyncSession:
+    """
+    Dependency that provides a session owned by a streaming response.
+    FastAPI closes yield-dependencies before a StreamingResponse body is
+    sent, so the stream itself must commit and close this session.
+    """
+    return async_session_factory()
+
+
 async def init_db() -> None:
     """Initialize database tables. Use only for development/testing."""
     async with engine.begin() as conn:
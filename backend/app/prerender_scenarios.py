@@ -0,0 +1,42 @@
+"""
+Build step: synthesize every YUBU_SCENARIOS clip into versioned files plus a
+manifest under TTS_SCENARIO_DIR. Scenarios whose text hash is unchanged
+are skipped; files of old versions are removed. Also voices YuBu's phrase
+library (catchphrases, hint encouragements) into the audio cache.
+Run with: python -m app.prerender_scenarios [--force] [--dir PATH]
+"""
+
+import argparse
+import asyncio
+
+from loguru import logger
+
+from app.infrastructure.ai.scenario_audio import ScenarioAudioLibrary
+from app.infrastructure.ai.tts_service import yubu_voice
+from app.infrastructure.cache.redis_cache import redis_cache
+
+
+async def prerender_scenarios(force: bool = False, directory: str = "") -> None:
+    """Render missing or stale scenario clips and rewrite the manifest."""
+    await redis_cache.connect()
+    library = ScenarioAudioLibrary(directory or None)
+    try:
+        logger.info(f"🔊 Prerendering YuBu scenarios into {library.directory}...")
+        counts = await library.prerender(yubu_voice, force=force)
+        logger.info(
+            f"✅ Scenarios ready: {counts['rendered']} rendered, "
+            f"{counts['skipped']} unchanged, {counts['removed']} stale files removed"
+        )
+        clips = await yubu_voice.prerender_phrases()
+        logger.info(f"✅ Phrase library ready: {clips} clips")
+    finally:
+        await yubu_voice.disconnect()
+        await redis_cache.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="re-render every scenario")
+    parser.add_argument("--dir", default="", help="output directory")
+    args = parser.parse_args()
+    asyncio.run(prerender_scenarios(force=args.force, directory=args.dir))
@@ -0,0 +1,35 @@
+"""
+Prompt token report: static (cacheable) vs data tokens for every registered prompt.
+Run with: python -m app.prompt_report [model]
+"""
+
+import sys
+
+# Importing the prompt modules registers their templates
+import app.infrastructure.ai.activity_prompts  # noqa: F401
+import app.infrastructure.ai.dysgraphia_prompts  # noqa: F401
+import app.infrastructure.ai.prompts  # noqa: F401
+from app.config import settings
+from app.infrastructure.ai.prompt_registry import prompt_registry
+from app.infrastructure.ai.tokens import tokenizer_name
+
+
+def print_report(model: str) -> None:
+    """Print one line per prompt, largest first."""
+    report = sorted(
+        prompt_registry.token_report(model),
+        key=lambda row: row["total_tokens"],
+        reverse=True,
+    )
+    print(f"Model: {model} ({tokenizer_name(model)})")
+    print(f"{'prompt':<36} {'static':>7} {'data':>6} {'total':>7}")
+    for row in report:
+        print(
+            f"{row['name']:<36} {row['static_tokens']:>7} "
+            f"{row['data_tokens']:>6} {row['total_tokens']:>7}"
+        )
+    print(f"{'TOTAL':<36} {sum(r['static_tokens'] for r in report):>7}")
+
+
+if __name__ == "__main__":
+    print_report(sys.argv[1] if len(sys.argv) > 1 else settings.OPENAI_MODEL)
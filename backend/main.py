@@ -20,7 +20,12 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
 from app.config import settings
+from app.infrastructure.ai.audio_variants import audio_transcoder
+from app.infrastructure.ai.llm_gateway import llm_gateway
+from app.infrastructure.ai.tts_service import yubu_voice
+from app.infrastructure.background import drain_background_tasks
 from app.infrastructure.cache.redis_cache import redis_cache
+from app.infrastructure.database.conversation_writer import conversation_writer
 from app.infrastructure.database.session import close_db, init_db
 
 # ─── Logging Configuration ──────────────────────────────────
@@ -77,12 +82,30 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️ Redis connection failed (caching disabled): {e}")
 
+    # Open the shared LLM connection pool
+    try:
+        await llm_gateway.connect()
+        logger.info("✅ LLM gateway ready")
+    except Exception as e:
+        logger.warning(f"⚠️ LLM gateway unavailable (AI features disabled): {e}")
+
+    # Open the shared ElevenLabs connection pool
+    await yubu_voice.connect()
+
+    # Start batched AI conversation persistence
+    await conversation_writer.start()
+
     logger.info("✅ YuBuBu Platform is ready!")
 
     yield
 
     # Shutdown
     logger.info("🔄 Shutting down YuBuBu Platform...")
+    await drain_background_tasks()
+    await llm_gateway.disconnect()
+    await yubu_voice.disconnect()
+    audio_transcoder.shutdown()
+    await conversation_writer.stop()
     await redis_cache.disconnect()
     await close_db()
     logger.info("👋 YuBuBu Platform stopped")
@@ -211,6 +234,9 @@ async def health_check():
         "version": settings.APP_VERSION,
         "environment": settings.ENVIRONMENT,
         "redis_connected": redis_cache.is_connected,
+        "llm_open_circuits": llm_gateway.open_circuits(),
+        "llm_lanes": llm_gateway.lane_stats(),
+        "llm_degraded_routes": llm_gateway.degraded_routes(),
     }
 
 
@@ -0,0 +1,1921 @@
+"""Tests for AI infrastructure components (gateway, caching, scheduling)."""
+
+import asyncio
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import httpx
+import openai
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.domain.entities.ai_conversation import AIConversation
+from app.domain.entities.enums import LearningDifficulty
+from app.infrastructure.ai.activity_prompts import EVALUATE_WORK_PROMPT
+from app.infrastructure.ai.activity_ai_service import ActivityAIService
+from app.infrastructure.ai.ai_service import AIService
+from app.infrastructure.ai.audio_variants import AudioTranscoder, choose_variant
+from app.infrastructure.ai.circuit_breaker import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+)
+from app.infrastructure.ai.conversation_context import ConversationContextManager
+from app.domain.entities.hint_bank import HintBankEntry
+from app.application.dtos.ai_activity_dtos import ActivityHintResponse, PersonalizedPracticeResponse
+from app.infrastructure.ai.difficulty_engine import decide, ewma, trend
+from app.infrastructure.ai.dysgraphia_service import DysgraphiaAIService
+from app.infrastructure.ai.errors import (
+    CircuitOpenError,
+    LaneSaturatedError,
+    StructuredOutputError,
+    TokenBudgetExceeded,
+)
+from app.fake_openai_server import FakeOpenAIConfig
+from app.fake_openai_server import create_app as create_fake_openai_app
+from app.infrastructure.ai.hint_prefetch import HintPrefetcher
+from app.infrastructure.ai.hint_bank import HintBank, hint_fingerprint, parse_hint_list
+from app.infrastructure.ai.json_stream import FieldDelta, JSONFieldStream
+from app.infrastructure.ai.llm_gateway import ENDPOINT_POLICIES, LLMGateway, LLMResult
+from app.infrastructure.ai.model_router import FAST_TIER, STANDARD_TIER, ModelRouter
+from app.infrastructure.ai.practice_bank import (
+    PracticeBank,
+    PracticeBucket,
+    age_band,
+    question_key,
+    to_problems,
+)
+from app.infrastructure.ai.prompt_registry import (
+    PromptRegistry,
+    PromptTemplate,
+    prompt_registry,
+)
+from app.infrastructure.ai.phrase_library import PhraseLibrary
+from app.infrastructure.ai.prompts import get_hint_prompt, get_system_prompt
+from app.infrastructure.ai.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    STANDARD,
+    LaneLimits,
+    LLMScheduler,
+)
+from app.infrastructure.ai.structured_output import parse_structured, response_format_for
+from app.infrastructure.ai.response_cache import (
+    PromptResponseCache,
+    make_prompt_key,
+    normalize_turkish,
+)
+from app.infrastructure.ai.token_budget import TokenBudget, UsageScope
+from app.infrastructure.ai.tokens import count_message_tokens, count_tokens
+from app.infrastructure.ai.scenario_audio import ScenarioAudioLibrary
+from app.infrastructure.ai.sentences import SentenceBuffer, split_sentences
+from app.infrastructure.ai.speech_pipeline import SpeechChunk, speak_while_generating
+from app.infrastructure.ai.tts_service import YuBuVoice, strip_id3
+from app.infrastructure.ai.yubu_prompts import YUBU_SCENARIOS
+from app.infrastructure.background import background_task_count, drain_background_tasks
+from app.infrastructure.cache.audio_cache import AudioCache
+from app.infrastructure.cache.single_flight import SingleFlight
+from app.infrastructure.database import conversation_writer as conversation_writer_module
+from app.infrastructure.database.conversation_writer import (
+    BufferedAIConversationRepository,
+    ConversationWriteBehind,
+)
+from app.infrastructure.database.models import PracticeProblemModel
+from app.infrastructure.database.practice_problem_repository_impl import (
+    SQLAlchemyPracticeProblemRepository,
+)
+
+
+def _fake_openai_client(text: str = "Merhaba!", tokens: int = 12) -> MagicMock:
+    """Build a stand-in for openai.AsyncOpenAI returning a fixed completion."""
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = text
+    response.usage.total_tokens = tokens
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=response)
+    client.with_options = MagicMock(return_value=client)
+    client.close = AsyncMock()
+    return client
+
+
+def _fake_stream_client(deltas, tokens: int = 30) -> MagicMock:
+    """Stand-in for openai.AsyncOpenAI returning a streamed completion."""
+    chunks = []
+    for delta in deltas:
+        chunk = MagicMock()
+        chunk.usage = None
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = delta
+        chunks.append(chunk)
+    usage_chunk = MagicMock()
+    usage_chunk.choices = []
+    usage_chunk.usage.total_tokens = tokens
+    chunks.append(usage_chunk)
+
+    async def _iterate():
+        for chunk in chunks:
+            yield chunk
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=_iterate())
+    client.with_options = MagicMock(return_value=client)
+    return client
+
+
+def _memory_redis() -> AsyncMock:
+    """RedisCache stand-in backed by a plain dict."""
+    store = {}
+    redis = AsyncMock()
+    redis.get.side_effect = lambda key: store.get(key)
+    redis.set.side_effect = lambda key, value, expire_seconds=300: store.__setitem__(key, value)
+    redis.ttl.return_value = 60
+    return redis
+
+
+def _gateway_with(client: MagicMock, **kwargs) -> LLMGateway:
+    gateway = LLMGateway(**kwargs)
+    gateway._client = client
+    return gateway
+
+
+# ═══════════════════════════════════════════════════════════════
+# LLM GATEWAY
+# ═══════════════════════════════════════════════════════════════
+
+class TestLLMGateway:
+    @pytest.mark.asyncio
+    async def test_complete_applies_endpoint_policy(self):
+        client = _fake_openai_client()
+        gateway = _gateway_with(client)
+
+        result = await gateway.complete(
+            "spelling_help",
+            [{"role": "user", "content": "arkadaş"}],
+            max_tokens=64,
+        )
+
+        assert result.text == "Merhaba!"
+        assert result.tokens == 12
+        policy = ENDPOINT_POLICIES["spelling_help"]
+        client.with_options.assert_called_once_with(
+            timeout=policy.timeout, max_retries=policy.max_retries
+        )
+
+    def test_unknown_endpoint_uses_default_policy(self):
+        gateway = LLMGateway()
+        policy = gateway.policy_for("does_not_exist")
+        assert policy.timeout > 0
+        assert policy.max_retries >= 0
+
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_client(self):
+        client = _fake_openai_client()
+        gateway = _gateway_with(client)
+
+        await gateway.disconnect()
+
+        client.close.assert_awaited_once()
+        assert gateway.is_connected is False
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_deltas_and_fills_result(self):
+        client = _fake_stream_client(["Mer", "haba", "!"], tokens=30)
+        gateway = _gateway_with(client)
+
+        stream = gateway.stream("chat", [{"role": "user", "content": "Selam"}], max_tokens=64)
+        deltas = [delta async for delta in stream]
+
+        assert deltas == ["Mer", "haba", "!"]
+        assert stream.result.text == "Merhaba!"
+        assert stream.result.tokens == 30
+        kwargs = client.chat.completions.create.call_args.kwargs
+        assert kwargs["stream"] is True
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMPT-RESPONSE CACHE
+# ═══════════════════════════════════════════════════════════════
+
+class TestPromptResponseCache:
+    def test_normalize_turkish_dotted_and_dotless_i(self):
+        assert normalize_turkish("ARKADAŞIM") == "arkadaşım"
+        assert normalize_turkish("İSTANBUL") == "istanbul"
+        assert normalize_turkish("  kedi \n  uyuyor ") == "kedi uyuyor"
+
+    def test_normalize_without_casefold_keeps_case(self):
+        assert normalize_turkish("Kedi  uyuyor", casefold=False) == "Kedi uyuyor"
+
+    def test_prompt_key_is_stable_across_spacing_and_case(self):
+        a = make_prompt_key("gpt-4o", [{"role": "user", "content": "ARKADAŞ"}])
+        b = make_prompt_key("gpt-4o", [{"role": "user", "content": " arkadaş "}])
+        c = make_prompt_key("gpt-4o-mini", [{"role": "user", "content": "arkadaş"}])
+        assert a == b
+        assert a != c
+
+    @pytest.mark.asyncio
+    async def test_second_identical_prompt_is_served_from_cache(self):
+        client = _fake_openai_client(text='{"hint": "ar-ka-daş"}', tokens=40)
+        gateway = _gateway_with(
+            client, response_cache=PromptResponseCache(_memory_redis())
+        )
+        messages = [{"role": "user", "content": "'arkadaş' kelimesini yazmak istiyorum."}]
+
+        first = await gateway.complete("spelling_help", messages, max_tokens=64)
+        second = await gateway.complete("spelling_help", messages, max_tokens=64)
+
+        assert first.cached is False and first.tokens == 40
+        assert second.cached is True and second.tokens == 0
+        assert second.text == first.text
+        assert client.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_spelling_help_keeps_capitalization_in_the_key(self):
+        client = _fake_openai_client(text='{"hint": "Özel isimler büyük harfle başlar."}')
+        gateway = _gateway_with(
+            client, response_cache=PromptResponseCache(_memory_redis())
+        )
+
+        for word in ("ankara", "Ankara"):
+            messages = [{"role": "user", "content": f"'{word}' doğru yazılmış mı?"}]
+            await gateway.complete("spelling_help", messages, max_tokens=64)
+
+        assert client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_uncached_endpoint_always_calls_upstream(self):
+        client = _fake_openai_client()
+        gateway = _gateway_with(
+            client, response_cache=PromptResponseCache(_memory_redis())
+        )
+        messages = [{"role": "user", "content": "Merhaba"}]
+
+        await gateway.complete("chat", messages, max_tokens=64)
+        await gateway.complete("chat", messages, max_tokens=64)
+
+        assert client.chat.completions.create.await_count == 2
+
+
+# ═══════════════════════════════════════════════════════════════
+# SINGLE-FLIGHT COALESCING
+# ═══════════════════════════════════════════════════════════════
+
+def _disconnected_redis() -> MagicMock:
+    redis = MagicMock()
+    redis.is_connected = False
+    return redis
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_execution(self):
+        calls = 0
+
+        async def produce():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "ipucu"
+
+        flight = SingleFlight(_disconnected_redis())
+        results = await asyncio.gather(*(flight.do("hint:1", produce) for _ in range(10)))
+
+        assert calls == 1
+        assert [value for value, _ in results] == ["ipucu"] * 10
+        assert sum(1 for _, leader in results if leader) == 1
+        assert flight.inflight_count == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_every_waiter(self):
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        flight = SingleFlight(_disconnected_redis())
+        results = await asyncio.gather(
+            *(flight.do("k", fail) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.inflight_count == 0
+
+    @pytest.mark.asyncio
+    async def test_follower_worker_waits_for_leader_result(self):
+        redis = MagicMock()
+        redis.is_connected = True
+        redis.acquire_lock = AsyncMock(return_value=False)  # another worker leads
+        redis.exists = AsyncMock(return_value=True)
+        lookup = AsyncMock(side_effect=[None, "ortak sonuç"])
+        produce = AsyncMock(return_value="kendi sonucum")
+
+        flight = SingleFlight(redis, lease_seconds=2, poll_interval=0.001)
+        value, leader = await flight.do("k", produce, lookup=lookup)
+
+        assert value == "ortak sonuç"
+        assert leader is True
+        produce.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_gateway_coalesces_identical_cache_misses(self):
+        client = _fake_openai_client(text="ipucu", tokens=20)
+        original_create = client.chat.completions.create
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.01)
+            return await original_create(**kwargs)
+
+        client.chat.completions.create = AsyncMock(side_effect=slow_create)
+        gateway = _gateway_with(
+            client,
+            response_cache=PromptResponseCache(_memory_redis()),
+            single_flight=SingleFlight(_disconnected_redis()),
+        )
+        messages = [{"role": "user", "content": "Toplama ipucu"}]
+
+        results = await asyncio.gather(
+            *(gateway.complete("hint", messages, max_tokens=64) for _ in range(5))
+        )
+
+        assert client.chat.completions.create.await_count == 1
+        assert sum(r.tokens for r in results) == 20
+
+
+# ═══════════════════════════════════════════════════════════════
+# WRITE-BEHIND CONVERSATION PERSISTENCE
+# ═══════════════════════════════════════════════════════════════
+
+def _conversation(message: str) -> AIConversation:
+    return AIConversation(user_id=uuid4(), message=message, response="Harika!")
+
+
+@pytest.fixture
+def flushed_batches(monkeypatch):
+    """Record the batches the writer hands to the SQLAlchemy repository."""
+    batches = []
+
+    class _RecordingRepository:
+        def __init__(self, session):
+            pass
+
+        async def create_many(self, conversations):
+            batches.append(list(conversations))
+
+    monkeypatch.setattr(
+        conversation_writer_module, "SQLAlchemyAIConversationRepository", _RecordingRepository
+    )
+    return batches
+
+
+def _session_factory() -> MagicMock:
+    session = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory
+
+
+class TestConversationWriteBehind:
+    @pytest.mark.asyncio
+    async def test_rows_are_flushed_in_batches(self, flushed_batches):
+        writer = ConversationWriteBehind(
+            _session_factory(), batch_size=3, flush_interval_ms=5000, max_pending=100
+        )
+        await writer.start()
+
+        for i in range(6):
+            await writer.submit(_conversation(f"soru {i}"))
+        for _ in range(50):  # a GC pause can delay the flusher past one tick
+            if len(flushed_batches) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        assert [len(batch) for batch in flushed_batches] == [3, 3]
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_pending_rows(self, flushed_batches):
+        writer = ConversationWriteBehind(
+            _session_factory(), batch_size=100, flush_interval_ms=5000, max_pending=100
+        )
+        await writer.start()
+
+        for i in range(4):
+            await writer.submit(_conversation(f"soru {i}"))
+        await writer.stop()
+
+        assert sum(len(batch) for batch in flushed_batches) == 4
+        assert writer.pending_count == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_mid_interval_keeps_collected_rows(self, flushed_batches):
+        writer = ConversationWriteBehind(
+            _session_factory(), batch_size=100, flush_interval_ms=5000, max_pending=100
+        )
+        await writer.start()
+
+        submitted = [_conversation(f"soru {i}") for i in range(3)]
+        for conversation in submitted:
+            await writer.submit(conversation)
+        await asyncio.sleep(0.05)  # flusher has dequeued them and waits for the interval
+        assert writer.pending_count == 0
+        await writer.stop()
+
+        assert [c for batch in flushed_batches for c in batch] == submitted
+
+    @pytest.mark.asyncio
+    async def test_buffered_repository_returns_entity_immediately(self, flushed_batches):
+        writer = ConversationWriteBehind(_session_factory(), batch_size=10)
+        repository = BufferedAIConversationRepository(AsyncMock(), writer)
+        conversation = _conversation("merhaba")
+
+        saved = await repository.create(conversation)
+
+        # Without a running flusher the row is written through directly
+        assert saved is conversation
+        assert flushed_batches == [[conversation]]
+
+
+# ═══════════════════════════════════════════════════════════════
+# TOKEN-BOUNDED CONVERSATION CONTEXT
+# ═══════════════════════════════════════════════════════════════
+
+def _turns(count: int, words: int = 20):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        AIConversation(
+            message=f"soru {i} " + "kelime " * words,
+            response=f"cevap {i} " + "yanıt " * words,
+            role_context="student",
+            timestamp=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def _context_manager(turns, summary=None, llm=None) -> ConversationContextManager:
+    repo = AsyncMock()
+    repo.get_recent_context.return_value = turns
+    cache = AsyncMock()
+    cache.get.return_value = summary
+    cache.acquire_lock.return_value = True
+    if llm is None:
+        llm = AsyncMock()
+        llm.complete.return_value = LLMResult(text="Özet", tokens=10, model="gpt-4o")
+    return ConversationContextManager(repo, cache, llm)
+
+
+class TestConversationContext:
+    @pytest.mark.asyncio
+    async def test_history_size_stays_flat_as_conversation_grows(self):
+        short = await _context_manager(_turns(4)).build_history(uuid4(), "student")
+        long = await _context_manager(_turns(20)).build_history(uuid4(), "student")
+        await drain_background_tasks()
+
+        budget = settings.AI_CONTEXT_VERBATIM_TOKEN_BUDGET
+        assert count_message_tokens(long) <= budget + 4 * len(long)
+        assert len(long) <= len(_turns(20)) * 2
+        assert long[-1]["content"].startswith("cevap 19")
+        assert len(short) == 8
+
+    @pytest.mark.asyncio
+    async def test_stored_summary_is_prepended(self):
+        turns = _turns(20)
+        summary = {"text": "Öğrenci kesirlerde zorlanıyor.", "through": turns[-1].timestamp.isoformat()}
+        history = await _context_manager(turns, summary).build_history(uuid4(), "student")
+
+        assert history[0]["role"] == "system"
+        assert "kesirlerde" in history[0]["content"]
+        assert background_task_count() == 0  # everything older is already summarized
+
+    @pytest.mark.asyncio
+    async def test_unsummarized_turns_refresh_summary_in_background(self):
+        llm = AsyncMock()
+        llm.complete.return_value = LLMResult(text="Yeni özet", tokens=50, model="gpt-4o")
+        manager = _context_manager(_turns(20), llm=llm)
+
+        await manager.build_history(uuid4(), "student")
+        await drain_background_tasks()
+
+        llm.complete.assert_awaited_once()
+        assert llm.complete.call_args.args[0] == "context_summary"
+        stored = manager._cache.set.call_args.args[1]
+        assert stored["text"] == "Yeni özet"
+        manager._cache.release_lock.assert_awaited_once()
+
+    def test_single_huge_turn_is_clipped_to_budget(self):
+        manager = _context_manager([])
+        huge = _turns(1, words=5000)
+
+        selected = manager._select_verbatim(huge)
+
+        assert len(selected) == 1
+        cost = count_tokens(selected[0].message) + count_tokens(selected[0].response)
+        assert cost <= settings.AI_CONTEXT_VERBATIM_TOKEN_BUDGET + 2
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROMPT REGISTRY
+# ═══════════════════════════════════════════════════════════════
+
+class TestPromptRegistry:
+    def test_static_part_comes_first_and_data_last(self):
+        prompt = EVALUATE_WORK_PROMPT.render(
+            learning_difficulty="dyscalculia",
+            student_age=8,
+            student_level=2,
+            work_type="math",
+            activity_description="toplama",
+            work_data="{'answer': 7}",
+        )
+        assert prompt.startswith(EVALUATE_WORK_PROMPT.static)
+        assert prompt.rstrip().endswith("Öğrenci verisi: {'answer': 7}")
+
+    def test_static_parts_hold_no_placeholders(self):
+        for name in prompt_registry.names():
+            template = prompt_registry.get(name)
+            assert not re.search(r"\{[a-z_]+\}", template.static), name
+
+    def test_system_prompt_is_precompiled_per_difficulty_and_role(self):
+        first = get_system_prompt(LearningDifficulty.DYSLEXIA, "teacher")
+        second = get_system_prompt(LearningDifficulty.DYSLEXIA, "teacher")
+        assert first is second
+        assert "system:dyslexia:teacher" in prompt_registry.names()
+
+    def test_hint_prompts_share_prefix_across_chapters(self):
+        a = get_hint_prompt(LearningDifficulty.DYSLEXIA, "Harfler", "matching", 2)
+        b = get_hint_prompt(LearningDifficulty.DYSCALCULIA, "Sayılar", "counting", 2)
+        prefix = prompt_registry.get("hint:level2").static
+        assert a.startswith(prefix) and b.startswith(prefix)
+
+    def test_token_report_covers_every_prompt(self):
+        report = prompt_registry.token_report()
+        assert {row["name"] for row in report} == set(prompt_registry.names())
+        assert all(row["static_tokens"] > 0 for row in report)
+
+    def test_duplicate_registration_is_rejected(self):
+        registry = PromptRegistry()
+        registry.register(PromptTemplate(name="x", static="a"))
+        with pytest.raises(ValueError):
+            registry.register(PromptTemplate(name="x", static="b"))
+
+
+# ═══════════════════════════════════════════════════════════════
+# TOKEN BUDGETS
+# ═══════════════════════════════════════════════════════════════
+
+def _budget_redis(user_used: int = 0, school_used: int = 0) -> AsyncMock:
+    redis = _memory_redis()
+    redis.hget_ints.side_effect = lambda key, fields: (
+        [user_used] if key.endswith("user_tokens") else [school_used]
+    )
+    redis.hincrby_many.return_value = True
+    return redis
+
+
+class TestTokenBudget:
+    @pytest.mark.asyncio
+    async def test_user_over_limit_is_rejected(self):
+        budget = TokenBudget(_budget_redis(user_used=1000), user_daily_limit=1000)
+
+        with pytest.raises(TokenBudgetExceeded):
+            await budget.ensure_available(UsageScope(user_id=uuid4()))
+
+    @pytest.mark.asyncio
+    async def test_school_limit_ignored_for_users_without_school(self):
+        budget = TokenBudget(
+            _budget_redis(school_used=10**9),
+            user_daily_limit=1000,
+            school_daily_limit=5000,
+        )
+
+        await budget.ensure_available(UsageScope(user_id=uuid4()))
+
+    @pytest.mark.asyncio
+    async def test_record_increments_user_and_school_counters(self):
+        redis = _budget_redis()
+        budget = TokenBudget(redis)
+        scope = UsageScope(user_id=uuid4(), school_id=uuid4())
+
+        await budget.record(scope, 42)
+
+        increments = redis.hincrby_many.call_args.args[0]
+        assert (increments[0][1], increments[0][2]) == (str(scope.user_id), 42)
+        assert (increments[1][1], increments[1][2]) == (str(scope.school_id), 42)
+        assert increments[2][2] == 1
+
+    @pytest.mark.asyncio
+    async def test_gateway_records_usage_and_blocks_when_exhausted(self):
+        redis = _budget_redis(user_used=10**9)
+        client = _fake_openai_client(tokens=12)
+        gateway = _gateway_with(client, budget=TokenBudget(redis, user_daily_limit=100))
+
+        with pytest.raises(TokenBudgetExceeded):
+            await gateway.complete(
+                "chat",
+                [{"role": "user", "content": "Selam"}],
+                max_tokens=64,
+                scope=UsageScope(user_id=uuid4()),
+            )
+        client.chat.completions.create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_cached_answer_served_over_budget(self):
+        redis = _budget_redis(user_used=10**9)
+        client = _fake_openai_client(tokens=12)
+        gateway = _gateway_with(
+            client,
+            response_cache=PromptResponseCache(_memory_redis()),
+            budget=TokenBudget(redis, user_daily_limit=100),
+        )
+        messages = [{"role": "user", "content": "Selam"}]
+        await gateway.complete("spelling_help", messages, max_tokens=64)
+
+        result = await gateway.complete(
+            "spelling_help", messages, max_tokens=64, scope=UsageScope(user_id=uuid4())
+        )
+
+        assert result.text == "Merhaba!"
+        client.chat.completions.create.assert_awaited_once()
+
+
+# ═══════════════════════════════════════════════════════════════
+# CIRCUIT BREAKER & HEDGING
+# ═══════════════════════════════════════════════════════════════
+
+def _connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(
+        request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    )
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    options = dict(
+        slow_call_seconds=1.0,
+        window_size=10,
+        min_calls=4,
+        error_rate_threshold=0.5,
+        open_seconds=30.0,
+    )
+    options.update(kwargs)
+    return CircuitBreaker("gpt-4o", "hint", **options)
+
+
+class TestCircuitBreaker:
+    def test_opens_on_error_rate_and_fails_fast(self):
+        breaker = _breaker()
+        for _ in range(2):
+            breaker.record_success(0.1)
+        for _ in range(2):
+            breaker.record_failure()
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_opens_when_p95_latency_is_too_slow(self):
+        breaker = _breaker()
+        for _ in range(4):
+            breaker.record_success(1.5)
+
+        assert breaker.state == OPEN
+
+    def test_half_open_probe_closes_on_success(self):
+        breaker = _breaker(open_seconds=0.0)
+        for _ in range(4):
+            breaker.record_failure()
+
+        breaker.before_call()  # the probe
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # only one probe at a time
+        breaker.record_success(0.1)
+
+        assert breaker.state == CLOSED
+
+    @pytest.mark.asyncio
+    async def test_gateway_open_circuit_skips_upstream(self):
+        client = _fake_openai_client()
+        client.chat.completions.create = AsyncMock(side_effect=_connection_error())
+        gateway = _gateway_with(client, breakers=CircuitBreakerRegistry())
+        messages = [{"role": "user", "content": "Selam"}]
+
+        for _ in range(settings.LLM_CIRCUIT_MIN_CALLS):
+            with pytest.raises(openai.APIConnectionError):
+                await gateway.complete("chat", messages, max_tokens=64)
+        with pytest.raises(CircuitOpenError):
+            await gateway.complete("chat", messages, max_tokens=64)
+
+        assert client.chat.completions.create.await_count == settings.LLM_CIRCUIT_MIN_CALLS
+        assert gateway.open_circuits() == [f"{settings.OPENAI_MODEL}/chat"]
+
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged_and_fast_one_wins(self, monkeypatch):
+        monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_MS", 10)
+        fast = _fake_openai_client(text="hızlı").chat.completions.create.return_value
+        calls = 0
+
+        async def create(**kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                await asyncio.sleep(5)
+            return fast
+
+        client = _fake_openai_client()
+        client.chat.completions.create = create
+        registry = CircuitBreakerRegistry()
+        gateway = _gateway_with(client, breakers=registry)
+        breaker = registry.get(settings.LLM_MODEL_FAST, "spelling_help", 10.0)
+        for _ in range(settings.LLM_CIRCUIT_MIN_CALLS):
+            breaker.record_success(0.02)
+
+        result = await asyncio.wait_for(
+            gateway.complete(
+                "spelling_help", [{"role": "user", "content": "kalem"}], max_tokens=64
+            ),
+            timeout=2,
+        )
+
+        assert result.text == "hızlı"
+        assert calls == 2
+
+
+# ═══════════════════════════════════════════════════════════════
+# OFFLINE HINT BANK
+# ═══════════════════════════════════════════════════════════════
+
+def _hint_bank(hints, fingerprint=None):
+    chapter_id = uuid4()
+    difficulty = LearningDifficulty.DYSLEXIA
+    fingerprint = fingerprint or hint_fingerprint(difficulty, "Harfler", "matching", 1)
+    repo = AsyncMock()
+    repo.list_variants.return_value = [
+        HintBankEntry(chapter_id=chapter_id, hint=hint, variant=i, fingerprint=fingerprint)
+        for i, hint in enumerate(hints)
+    ]
+    redis = _memory_redis()
+    counter = iter(range(1, 100))
+    redis.incr.side_effect = lambda key, expire_seconds: next(counter)
+    generator = MagicMock()
+    return HintBank(repo, redis, generator), repo, generator, chapter_id
+
+
+class TestHintBank:
+    def test_parse_hint_list_reads_json_or_lines(self):
+        assert parse_hint_list('Tabii: ["Bir", "İki"]') == ["Bir", "İki"]
+        assert parse_hint_list("1. Bir\n2) İki\n- Üç") == ["Bir", "İki", "Üç"]
+
+    @pytest.mark.asyncio
+    async def test_variants_are_served_round_robin_from_one_db_read(self):
+        bank, repo, generator, chapter_id = _hint_bank(["A", "B"])
+
+        picks = [
+            await bank.pick(chapter_id, LearningDifficulty.DYSLEXIA, "Harfler", "matching", 1)
+            for _ in range(3)
+        ]
+
+        assert picks == ["A", "B", "A"]
+        repo.list_variants.assert_awaited_once()
+        generator.schedule.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stale_bucket_falls_back_and_regenerates(self):
+        bank, _, generator, chapter_id = _hint_bank(["A"], fingerprint="old")
+
+        hint = await bank.pick(
+            chapter_id, LearningDifficulty.DYSLEXIA, "Harfler", "matching", 1
+        )
+
+        assert hint is None
+        generator.schedule.assert_called_once_with(chapter_id, "Harfler", "matching")
+
+
+# ═══════════════════════════════════════════════════════════════
+# SPECULATIVE HINT PREFETCH
+# ═══════════════════════════════════════════════════════════════
+
+def _prefetching_activity_service():
+    store = {}
+    redis = AsyncMock()
+    redis.get.side_effect = lambda key: store.get(key)
+    redis.set.side_effect = lambda key, value, expire_seconds=300: store.__setitem__(key, value)
+    redis.exists.side_effect = lambda key: key in store
+    redis.delete.side_effect = lambda key: store.pop(key, None) is not None
+
+    llm = MagicMock()
+    llm.complete = AsyncMock(
+        side_effect=lambda endpoint, messages, **kw: LLMResult(
+            text=f'{{"hint": "{messages[1]["content"]}"}}', tokens=10, model="gpt-4o"
+        )
+    )
+    profile_repo = AsyncMock()
+    profile_repo.get_by_user_id.return_value = None
+    service = ActivityAIService(
+        conversation_repo=AsyncMock(),
+        profile_repo=profile_repo,
+        progress_repo=AsyncMock(),
+        cache=redis,
+        llm=llm,
+        hint_prefetcher=HintPrefetcher(redis),
+    )
+    return service, llm
+
+
+class TestHintPrefetch:
+    @pytest.mark.asyncio
+    async def test_level_one_prefetches_higher_levels(self):
+        service, llm = _prefetching_activity_service()
+        student_id = uuid4()
+        problem = {"question": "3 + 4 = ?", "correct_answer": 7}
+
+        async def ask(attempt: int, answer: int):
+            return await service.provide_activity_hint(
+                student_id, "ch-1", "counting", problem,
+                {"answer": answer, "attempt_number": attempt}, {},
+            )
+
+        first = await ask(1, 6)
+        await drain_background_tasks()
+        assert first["hint"] == "İpucu ver: Deneme #1"
+        assert llm.complete.await_count == 3  # level 1 + prefetched 2 and 3
+        endpoints = [c.args[0] for c in llm.complete.await_args_list]
+        assert endpoints == ["activity_hint", "activity_hint_prefetch", "activity_hint_prefetch"]
+        prefetch = ENDPOINT_POLICIES["activity_hint_prefetch"]
+        assert prefetch.lane == BACKGROUND and not prefetch.hedge and prefetch.cache_ttl == 0
+
+        second = await ask(2, 8)
+        third = await ask(3, 5)
+        await drain_background_tasks()
+
+        assert second["hint"] == "İpucu ver: Deneme #2"
+        assert third["hint"] == "İpucu ver: Deneme #3"
+        assert llm.complete.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_take_returns_inflight_result_when_redis_is_down(self):
+        redis = AsyncMock()
+        redis.exists.return_value = False
+        redis.set.return_value = False
+        redis.get.return_value = None
+        prefetcher = HintPrefetcher(redis)
+        release = asyncio.Event()
+
+        async def generate():
+            await release.wait()
+            return {"hint": "Onları tek tek say."}
+
+        prefetcher.schedule("k", generate)
+        taking = asyncio.ensure_future(prefetcher.take("k"))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await taking == {"hint": "Onları tek tek say."}
+        redis.get.assert_not_awaited()
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOCAL ADAPTIVE-DIFFICULTY ENGINE
+# ═══════════════════════════════════════════════════════════════
+
+def _activities(*scores, hints=0, seconds=60):
+    return [
+        {"score": score, "hints_used": hints, "time_seconds": seconds, "errors": 0}
+        for score in scores
+    ]
+
+
+class TestDifficultyEngine:
+    def test_statistics(self):
+        assert trend([10, 20, 30]) == pytest.approx(10.0)
+        assert ewma([0, 100], alpha=0.5) == pytest.approx(50.0)
+
+    def test_high_streak_increases_one_step(self):
+        decision = decide(_activities(85, 90, 88, 92, 95), "dyslexia", current_level=2)
+
+        assert decision.action == "increase"
+        assert decision.next_difficulty == "medium"
+        assert decision.confidence >= 0.8
+
+    def test_low_streak_decreases(self):
+        decision = decide(_activities(70, 35, 30, 20), "dyscalculia", current_level=3)
+
+        assert decision.action == "decrease"
+        assert decision.next_difficulty == "easy"
+
+    def test_heavy_hint_use_decreases(self):
+        decision = decide(_activities(70, 75, 72, hints=5), "dysgraphia")
+
+        assert decision.action == "decrease"
+        assert decision.next_difficulty == "beginner"
+
+    def test_mixed_results_maintain(self):
+        decision = decide(_activities(60, 80, 55, 75), "dyslexia", current_level=3)
+
+        assert decision.action == "maintain"
+        assert decision.next_difficulty == "medium"
+
+    def test_no_data_maintains(self):
+        assert decide([], "dyslexia").action == "maintain"
+
+    @pytest.mark.asyncio
+    async def test_service_decides_without_llm(self):
+        service, llm = _prefetching_activity_service()
+
+        result = await service.adaptive_difficulty_suggestion(
+            uuid4(), _activities(85, 90, 88, 92, 95)
+        )
+
+        assert result["action"] == "increase"
+        llm.complete.assert_not_awaited()
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRACTICE-PROBLEM BANK
+# ═══════════════════════════════════════════════════════════════
+
+_BUCKET = PracticeBucket(LearningDifficulty.DYSCALCULIA, "place_value", "7-8")
+
+
+def _bank_problems(count: int):
+    return to_problems(_BUCKET, [
+        {"question": f"{n}4'te kaç onluk var?", "correct_answer": str(n), "difficulty": "easy"}
+        for n in range(1, count + 1)
+    ])
+
+
+def _practice_bank(stock):
+    seen = set()
+    redis = AsyncMock()
+    redis.smembers.side_effect = lambda key: set(seen)
+    redis.sadd.side_effect = lambda key, members, expire_seconds: seen.update(members)
+
+    repo = AsyncMock()
+    repo.sample.side_effect = lambda ld, skill, band, diffs, exclude, limit: [
+        p for p in stock if p.id not in set(exclude)
+    ][:limit]
+    repo.count.return_value = len(stock)
+    repo.add_many.side_effect = lambda problems: problems
+    generator = MagicMock()
+    generator.generate = AsyncMock(return_value=_bank_problems(3))
+    return PracticeBank(repo, redis, generator), repo, generator
+
+
+class TestPracticeBank:
+    def test_age_bands_and_question_dedup_key(self):
+        assert [age_band(a) for a in (5, 7, 8, 9, 12)] == ["5-6", "7-8", "7-8", "9-10", "11+"]
+        assert question_key("  KAÇ  onluk var? ") == question_key("kaç onluk var?")
+
+    @pytest.mark.asyncio
+    async def test_students_get_unseen_problems_first(self, monkeypatch):
+        monkeypatch.setattr(settings, "PRACTICE_BANK_MIN_BUCKET", 1)
+        bank, _, generator = _practice_bank(_bank_problems(6))
+        student = uuid4()
+
+        first = await bank.draw(student, _BUCKET, age=8, level=2, count=3)
+        second = await bank.draw(student, _BUCKET, age=8, level=2, count=3)
+
+        assert not {p["problem_id"] for p in first} & {p["problem_id"] for p in second}
+        generator.generate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_empty_bucket_is_filled_once_and_topped_up(self):
+        bank, repo, generator = _practice_bank([])
+
+        problems = await bank.draw(uuid4(), _BUCKET, age=8, level=2, count=3)
+
+        assert len(problems) == 3
+        generator.generate.assert_awaited_once()
+        repo.add_many.assert_awaited_once()
+        generator.schedule_top_up.assert_called_once()
+        assert generator.generate.await_args.kwargs["endpoint"] == "personalized_practice"
+
+    @pytest.mark.asyncio
+    async def test_first_fill_returns_only_persisted_problems(self):
+        stored_by_other_worker = _bank_problems(2)
+        bank, repo, generator = _practice_bank([])
+        repo.add_many.side_effect = lambda problems: []  # all lost the race
+        repo.sample.side_effect = [[], stored_by_other_worker]
+
+        problems = await bank.draw(uuid4(), _BUCKET, age=8, level=2, count=3)
+
+        assert [p["problem_id"] for p in problems] == [str(p.id) for p in stored_by_other_worker]
+
+    @pytest.mark.asyncio
+    async def test_add_many_skips_duplicates_per_age_band(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bank.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(PracticeProblemModel.__table__.create)
+        other_band = PracticeBucket(_BUCKET.learning_difficulty, _BUCKET.skill, "9-10")
+
+        async with AsyncSession(engine) as session:
+            repo = SQLAlchemyPracticeProblemRepository(session)
+            first = await repo.add_many(_bank_problems(2))
+            again = await repo.add_many(_bank_problems(3))
+            elsewhere = await repo.add_many(to_problems(other_band, [{"question": "14'te kaç onluk var?"}]))
+
+        await engine.dispose()
+        assert len(first) == 2
+        assert [p.question for p in again] == ["34'te kaç onluk var?"]
+        assert len(elsewhere) == 1
+
+
+# ═══════════════════════════════════════════════════════════════
+# STRUCTURED OUTPUT & INCREMENTAL JSON
+# ═══════════════════════════════════════════════════════════════
+
+_HINT_JSON = (
+    '{"hint": "Parmaklar\\u0131nla say \\ud83d\\udcaa", "hint_level": 2, '
+    '"visual_aid": "fingers", "meta": {"hint": "nested"}, '
+    '"encouragement": "Neredeyse \\"oldu\\"!"}'
+)
+
+
+def _student_profiles() -> AsyncMock:
+    profile_repo = AsyncMock()
+    profile_repo.get_by_user_id.return_value = None
+    return profile_repo
+
+
+class TestStructuredOutput:
+    def test_completions_are_validated_against_the_dto(self):
+        hint = parse_structured('```json\n{"hint": "Say"}\n```', ActivityHintResponse, {"hint_level": 1})
+        assert hint == {
+            "hint": "Say", "hint_level": 1, "should_show_answer": False,
+            "visual_aid": "none", "encouragement": "",
+        }
+        practice = parse_structured(
+            '[{"id": 1, "question": "2+2?", "correct_answer": "4"}]',
+            PersonalizedPracticeResponse,
+        )
+        assert practice["problems"][0]["question"] == "2+2?"
+
+        with pytest.raises(StructuredOutputError):
+            parse_structured("Tabii! İşte ipucu: parmakla say.", ActivityHintResponse)
+        with pytest.raises(StructuredOutputError):
+            parse_structured('{"hint": "Say", "hint_level": 7}', ActivityHintResponse)
+
+    def test_field_stream_emits_decoded_text_across_any_split(self):
+        for size in (1, 3, 7, len(_HINT_JSON)):
+            reader = JSONFieldStream(["hint", "encouragement"])
+            deltas = []
+            for i in range(0, len(_HINT_JSON), size):
+                deltas += reader.feed(_HINT_JSON[i:i + size])
+            assert reader.values == {"hint": "Parmaklarınla say 💪", "encouragement": 'Neredeyse "oldu"!'}
+            assert {d.field for d in deltas} == {"hint", "encouragement"}
+
+    @pytest.mark.asyncio
+    async def test_gateway_sends_schema_and_keys_cache_by_it(self):
+        client = _fake_openai_client('{"hint": "Say"}')
+        gateway = _gateway_with(client)
+        response_format = response_format_for(ActivityHintResponse)
+
+        await gateway.complete(
+            "activity_hint", [{"role": "user", "content": "x"}],
+            max_tokens=64, response_format=response_format,
+        )
+
+        assert client.chat.completions.create.call_args.kwargs["response_format"] == response_format
+        messages = [{"role": "user", "content": "x"}]
+        assert make_prompt_key("m", messages) != make_prompt_key("m", messages, True, response_format)
+
+    @pytest.mark.asyncio
+    async def test_hint_stream_yields_fields_before_the_validated_result(self):
+        chunks = [_HINT_JSON[i:i + 9] for i in range(0, len(_HINT_JSON), 9)]
+        service = ActivityAIService(
+            conversation_repo=AsyncMock(),
+            profile_repo=_student_profiles(),
+            progress_repo=AsyncMock(),
+            cache=AsyncMock(),
+            llm=_gateway_with(_fake_stream_client(chunks)),
+        )
+
+        items = [
+            item async for item in service.provide_activity_hint_stream(
+                uuid4(), "ch-1", "counting", {"question": "3 + 4 = ?"},
+                {"answer": 6, "attempt_number": 2}, {},
+            )
+        ]
+
+        assert all(isinstance(item, FieldDelta) for item in items[:-1])
+        assert "".join(d.text for d in items[:-1] if d.field == "hint") == "Parmaklarınla say 💪"
+        assert items[-1]["visual_aid"] == "fingers"
+        assert items[-1]["hint_level"] == 2
+
+    @pytest.mark.asyncio
+    async def test_prose_completion_uses_fallback_instead_of_raw_response(self):
+        service = DysgraphiaAIService(
+            AsyncMock(), _student_profiles(), AsyncMock(), AsyncMock(),
+            _gateway_with(_fake_openai_client("Bu kelimeyi hecele: ar-ka-daş")),
+        )
+
+        result = await service.spelling_help(uuid4(), "arkadaş")
+
+        assert "raw_response" not in result
+        assert result["strategy"] == "Ses Ses Yaz"
+
+    @pytest.mark.asyncio
+    async def test_off_schema_completion_is_not_cached(self):
+        client = _fake_openai_client("Bu kelimeyi hecele: ar-ka-daş")
+        good = _fake_openai_client('{"syllables": "ar-ka-daş", "strategy": "Hece Bölme"}')
+        client.chat.completions.create.side_effect = [
+            client.chat.completions.create.return_value,
+            good.chat.completions.create.return_value,
+        ]
+        service = DysgraphiaAIService(
+            AsyncMock(), _student_profiles(), AsyncMock(), AsyncMock(),
+            _gateway_with(client, response_cache=PromptResponseCache(_memory_redis())),
+        )
+
+        first = await service.spelling_help(uuid4(), "arkadaş")
+        second = await service.spelling_help(uuid4(), "arkadaş")
+
+        assert first["strategy"] == "Ses Ses Yaz"  # fallback
+        assert second["strategy"] == "Hece Bölme"
+        assert client.chat.completions.create.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_student_analysis_is_validated_not_sliced(self):
+        student_id = uuid4()
+        profiles = AsyncMock()
+        profiles.get_by_id.return_value = MagicMock(
+            user_id=uuid4(), learning_difficulty=LearningDifficulty.DYSLEXIA
+        )
+
+        progress = AsyncMock()
+        progress.get_analytics.return_value = {}
+
+        async def analyze(text):
+            client = _fake_openai_client(text)
+            service = AIService(
+                AsyncMock(), profiles, progress, AsyncMock(), _gateway_with(client)
+            )
+            return await service.analyze_student(student_id), client
+
+        valid, client = await analyze(
+            '{"analysis": "İyi", "strengths": ["Azim"], "areas_for_improvement": [], '
+            '"recommendations": [], "encouragement_message": "Bravo", "student_id": "x"}'
+        )
+        prose, _ = await analyze("Öğrenci iyi gidiyor {ama} dikkat dağınık.")
+
+        assert valid["strengths"] == ["Azim"]
+        assert valid["student_id"] == str(student_id)
+        assert "response_format" in client.chat.completions.create.call_args.kwargs
+        assert prose["analysis"] == "Analiz şu anda oluşturulamıyor."
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRIORITY SCHEDULER LANES
+# ═══════════════════════════════════════════════════════════════
+
+def _scheduler(total: int = 2, background: int = 2, queue: int = 4) -> LLMScheduler:
+    return LLMScheduler(total=total, lanes={
+        INTERACTIVE: LaneLimits(concurrency=total, max_queue=queue),
+        STANDARD: LaneLimits(concurrency=total, max_queue=queue),
+        BACKGROUND: LaneLimits(concurrency=background, max_queue=queue),
+    })
+
+
+class TestLLMScheduler:
+    @pytest.mark.asyncio
+    async def test_freed_slot_goes_to_interactive_before_older_background(self):
+        scheduler = _scheduler(total=1)
+        order = []
+        release = asyncio.Event()
+
+        async def run(lane: str, name: str, hold: bool = False):
+            async with scheduler.slot(lane):
+                order.append(name)
+                if hold:
+                    await release.wait()
+
+        holder = asyncio.ensure_future(run(BACKGROUND, "report-1", hold=True))
+        await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(run(BACKGROUND, "report-2"))]
+        await asyncio.sleep(0)
+        queued.append(asyncio.ensure_future(run(INTERACTIVE, "hint")))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(holder, *queued)
+        assert order == ["report-1", "hint", "report-2"]
+
+    @pytest.mark.asyncio
+    async def test_queues_are_bounded_and_waits_time_out(self):
+        scheduler = _scheduler(total=1, queue=1)
+
+        async def enter(lane: str):
+            async with scheduler.slot(lane):
+                pass
+
+        async with scheduler.slot(BACKGROUND):
+            queued = asyncio.ensure_future(enter(BACKGROUND))
+            await asyncio.sleep(0)
+            with pytest.raises(LaneSaturatedError):
+                await enter(BACKGROUND)  # queue of one is already taken
+            with pytest.raises(LaneSaturatedError):
+                async with scheduler.slot(INTERACTIVE, wait_timeout=0.01):
+                    pass
+        await queued
+
+        stats = scheduler.snapshot()
+        assert stats[BACKGROUND]["rejected"] == 1
+        assert stats[INTERACTIVE]["rejected"] == 1
+        assert all(lane["active"] == 0 and lane["queued"] == 0 for lane in stats.values())
+
+    @pytest.mark.asyncio
+    async def test_saturated_background_lane_leaves_room_for_hints(self):
+        started = asyncio.Event()
+        finish = asyncio.Event()
+        response = _fake_openai_client('{"hint": "Say"}').chat.completions.create.return_value
+
+        async def create(**request):
+            if request["max_tokens"] == 768:
+                started.set()
+                await finish.wait()
+            return response
+
+        client = _fake_openai_client()
+        client.chat.completions.create = AsyncMock(side_effect=create)
+        gateway = _gateway_with(client, scheduler=_scheduler(total=2, background=1))
+        messages = [{"role": "user", "content": "x"}]
+
+        report = asyncio.ensure_future(gateway.complete("session_analysis", messages, max_tokens=768))
+        await started.wait()
+        hint = await asyncio.wait_for(
+            gateway.complete("activity_hint", messages, max_tokens=256), timeout=1
+        )
+
+        assert hint.text == '{"hint": "Say"}'
+        assert gateway.lane_stats()[BACKGROUND]["active"] == 1
+        finish.set()
+        await report
+
+
+# ═══════════════════════════════════════════════════════════════
+# MODEL ROUTING
+# ═══════════════════════════════════════════════════════════════
+
+def _router(**kwargs) -> ModelRouter:
+    return ModelRouter(
+        tier_models={STANDARD_TIER: "big", FAST_TIER: "small"},
+        window_size=10,
+        min_calls=3,
+        **kwargs,
+    )
+
+
+class TestModelRouter:
+    def test_routes_by_tier_and_falls_back_when_slo_is_broken(self):
+        router = _router(recheck_seconds=60)
+        assert router.route("spelling_help", FAST_TIER) == "small"
+        assert router.route("evaluate_work", STANDARD_TIER) == "big"
+
+        for latency in (1.0, 9.0, 9.5):
+            router.record("big", "evaluate_work", STANDARD_TIER, 6.0, latency)
+
+        assert router.route("evaluate_work", STANDARD_TIER) == "small"
+        assert router.degraded_routes() == ["evaluate_work→fast"]
+        # Fallback latencies never re-degrade or touch the primary's window
+        router.record("small", "evaluate_work", STANDARD_TIER, 6.0, 20.0)
+        assert router.route("next_steps", STANDARD_TIER) == "big"
+
+    def test_fastest_tier_and_endpoints_without_slo_never_degrade(self):
+        router = _router()
+        for _ in range(5):
+            router.record("small", "activity_hint", FAST_TIER, 1.0, 5.0)
+            router.record("big", "analysis", STANDARD_TIER, 0.0, 40.0)
+
+        assert router.route("activity_hint", FAST_TIER) == "small"
+        assert router.route("analysis", STANDARD_TIER) == "big"
+        assert router.degraded_routes() == []
+
+    def test_primary_is_retried_with_fresh_window_after_recheck(self):
+        router = _router(recheck_seconds=0)
+        for _ in range(3):
+            router.record("big", "writing_coach", STANDARD_TIER, 8.0, 12.0)
+
+        assert router.route("writing_coach", STANDARD_TIER) == "big"
+        # Old slow samples were dropped; one fast call does not degrade again
+        router.record("big", "writing_coach", STANDARD_TIER, 8.0, 0.5)
+        assert router.route("writing_coach", STANDARD_TIER) == "big"
+        assert router.degraded_routes() == []
+
+    @pytest.mark.asyncio
+    async def test_gateway_caps_max_tokens_and_uses_tier_model(self):
+        client = _fake_openai_client()
+        gateway = _gateway_with(client, router=_router())
+
+        await gateway.complete("session_analysis", [{"role": "user", "content": "x"}], max_tokens=4096)
+        await gateway.complete("spelling_help", [{"role": "user", "content": "x"}], max_tokens=64)
+
+        first, second = client.chat.completions.create.call_args_list
+        assert first.kwargs["max_tokens"] == ENDPOINT_POLICIES["session_analysis"].max_tokens
+        assert first.kwargs["model"] == "big"
+        assert second.kwargs["max_tokens"] == 64
+        assert second.kwargs["model"] == "small"
+        assert ENDPOINT_POLICIES["chat"].cap_tokens(4096) == 4096
+
+
+# ═══════════════════════════════════════════════════════════════
+# FAKE OPENAI SERVER
+# ═══════════════════════════════════════════════════════════════
+
+def _fake_server_client(**config) -> openai.AsyncOpenAI:
+    """Real OpenAI SDK client talking to the in-process fake server."""
+    app = create_fake_openai_app(
+        FakeOpenAIConfig(latency="fixed:0", tokens_per_second=0, seed=7, **config)
+    )
+    return openai.AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+    )
+
+
+class TestFakeOpenAIServer:
+    @pytest.mark.asyncio
+    async def test_activity_hint_body_matches_prompt_and_schema(self):
+        gateway = _gateway_with(_fake_server_client())
+        prompt = prompt_registry.get("activity_hint:dyscalculia").render(
+            activity_type="counting", problem_description="5 + 3 = ?", correct_answer="8",
+            student_answer="7", attempt_number=2, error_type="arithmetic",
+            chapter_title="Toplama", hint_level=2,
+        )
+
+        result = await gateway.complete(
+            "activity_hint",
+            [{"role": "system", "content": prompt}, {"role": "user", "content": "ipucu"}],
+            max_tokens=256,
+            response_format=response_format_for(ActivityHintResponse),
+        )
+
+        hint = parse_structured(result.text, ActivityHintResponse)
+        assert hint["hint_level"] == 2
+        assert result.tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_streams_practice_array_wrapped_for_schema(self):
+        gateway = _gateway_with(_fake_server_client())
+        prompt = prompt_registry.get("personalized_practice").render(
+            learning_difficulty="dyscalculia", student_age=8, student_level=2,
+            weak_skill="toplama", count=4,
+        )
+        stream = gateway.stream(
+            "personalized_practice",
+            [{"role": "system", "content": prompt}, {"role": "user", "content": "oluştur"}],
+            max_tokens=1024,
+            response_format=response_format_for(PersonalizedPracticeResponse),
+        )
+        chunks = [delta async for delta in stream]
+
+        assert len(chunks) > 1
+        practice = parse_structured(stream.result.text, PersonalizedPracticeResponse)
+        assert len(practice["problems"]) == 4
+        assert stream.result.tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_injects_errors(self):
+        client = _fake_server_client(errors={"429": 1.0})
+
+        with pytest.raises(openai.RateLimitError):
+            await client.chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "x"}]
+            )
+
+
+# ═══════════════════════════════════════════════════════════════
+# TTS AUDIO CACHE
+# ═══════════════════════════════════════════════════════════════
+
+def _index_redis(scores=None) -> AsyncMock:
+    """RedisCache stand-in whose LRU index reports the given access times."""
+    scores = dict(scores or {})
+    redis = AsyncMock()
+    redis.is_connected = True
+    redis.zadd.side_effect = lambda key, mapping: scores.update(mapping)
+    redis.zmscore.side_effect = lambda key, members: [scores.get(m) for m in members]
+    return redis
+
+
+def _voice(tmp_path, audio: bytes = b"ID3-mp3") -> YuBuVoice:
+    voice = YuBuVoice(
+        cache=AudioCache(_disconnected_redis(), directory=str(tmp_path)),
+        flight=SingleFlight(_disconnected_redis()),
+    )
+    voice._synthesize = AsyncMock(return_value=audio)
+    return voice
+
+
+class TestAudioCache:
+    @pytest.mark.asyncio
+    async def test_repeated_phrase_is_served_from_disk(self, tmp_path):
+        voice = _voice(tmp_path)
+
+        first = await voice.speak("Harika  iş çıkardın!", emotion="happy")
+        second = await voice.speak("Harika iş çıkardın!", emotion="happy")
+        await voice.speak("Harika iş çıkardın!", emotion="gentle")
+
+        assert first == second == b"ID3-mp3"
+        assert voice._synthesize.await_count == 2  # the gentle variant is a new clip
+        assert len(list(tmp_path.glob("*/*.mp3"))) == 2
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_across_workers(self, tmp_path):
+        redis = _index_redis()
+        cache = AudioCache(redis, directory=str(tmp_path), max_bytes=250)
+        for name in ("tts:aa01", "tts:bb02"):
+            await cache.put(name, b"x" * 100)
+        # Another worker just played the older clip
+        await redis.zadd("tts:audio:lru", {"aa01.mp3": time.time() + 60})
+
+        await cache.put("tts:cc03", b"x" * 100)
+
+        assert await cache.get("tts:aa01") is not None
+        assert await cache.get("tts:bb02") is None
+        assert await cache.get("tts:cc03") is not None
+        assert cache.size_bytes == 200
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_mtime_without_redis(self, tmp_path):
+        cache = AudioCache(_disconnected_redis(), directory=str(tmp_path), max_bytes=250)
+        await cache.put("tts:aa01", b"x" * 100)
+        await cache.put("tts:bb02", b"x" * 100)
+        old = time.time() - 3600
+        os.utime(tmp_path / "aa" / "aa01.mp3", (old, old))
+
+        await cache.put("tts:cc03", b"x" * 100)
+
+        assert not (tmp_path / "aa" / "aa01.mp3").exists()
+        assert (tmp_path / "bb" / "bb02.mp3").exists()
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRERENDERED SCENARIO AUDIO
+# ═══════════════════════════════════════════════════════════════
+
+class TestScenarioPrerender:
+    @pytest.mark.asyncio
+    async def test_renders_every_scenario_once(self, tmp_path):
+        voice = _voice(tmp_path / "cache")
+        library = ScenarioAudioLibrary(str(tmp_path / "scenarios"))
+
+        first = await library.prerender(voice)
+        upstream_calls = voice._synthesize.await_count
+        second = await ScenarioAudioLibrary(str(tmp_path / "scenarios")).prerender(voice)
+
+        assert first["rendered"] == len(YUBU_SCENARIOS)
+        assert second == {"rendered": 0, "skipped": len(YUBU_SCENARIOS), "removed": 0}
+        assert voice._synthesize.await_count == upstream_calls
+        clip = library.current("welcome", voice)
+        assert clip.file.startswith("welcome.") and library.path(clip).read_bytes() == b"ID3-mp3"
+
+    @pytest.mark.asyncio
+    async def test_changed_text_invalidates_only_that_scenario(self, tmp_path, monkeypatch):
+        voice = _voice(tmp_path / "cache")
+        library = ScenarioAudioLibrary(str(tmp_path / "scenarios"))
+        await library.prerender(voice)
+        old = library.current("welcome", voice)
+
+        monkeypatch.setitem(
+            YUBU_SCENARIOS, "welcome", {**YUBU_SCENARIOS["welcome"], "text": "Selam! Ben YuBu!"}
+        )
+        assert library.current("welcome", voice) is None  # stale until re-rendered
+
+        counts = await library.prerender(voice)
+
+        assert counts == {"rendered": 1, "skipped": len(YUBU_SCENARIOS) - 1, "removed": 1}
+        new = library.current("welcome", voice)
+        assert new.file != old.file and not library.path(old).exists()
+
+
+# ═══════════════════════════════════════════════════════════════
+# STREAMING TTS
+# ═══════════════════════════════════════════════════════════════
+
+def _streaming_voice(tmp_path, chunks, fail_after=None) -> YuBuVoice:
+    voice = _voice(tmp_path)
+    calls = []
+
+    async def upstream(clean_text, emotion):
+        calls.append(clean_text)
+        for index, chunk in enumerate(chunks):
+            if index == fail_after:
+                raise httpx.ReadError("bağlantı koptu")
+            yield chunk
+
+    voice._synthesize_stream = upstream
+    voice.upstream_calls = calls
+    return voice
+
+
+class TestStreamingTTS:
+    @pytest.mark.asyncio
+    async def test_forwards_chunks_and_tees_into_cache(self, tmp_path):
+        voice = _streaming_voice(tmp_path, [b"ID3", b"-frame1", b"-frame2"])
+
+        streamed = [chunk async for chunk in voice.stream("Aferin sana!", emotion="happy")]
+        replay = [chunk async for chunk in voice.stream("Aferin sana!", emotion="happy")]
+
+        assert streamed == [b"ID3", b"-frame1", b"-frame2"]
+        assert b"".join(replay) == b"ID3-frame1-frame2"
+        assert len(voice.upstream_calls) == 1
+        assert await voice.speak("Aferin sana!", emotion="happy") == b"ID3-frame1-frame2"
+        voice._synthesize.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_empty_text_does_not_call_upstream(self, tmp_path):
+        voice = _streaming_voice(tmp_path, [b"ID3"])
+
+        streamed = [chunk async for chunk in voice.stream("[EMOTION: happy]  ")]
+
+        assert streamed == []
+        assert voice.upstream_calls == []
+
+    @pytest.mark.asyncio
+    async def test_broken_stream_leaves_no_partial_clip(self, tmp_path):
+        voice = _streaming_voice(tmp_path, [b"ID3", b"-frame1", b"-frame2"], fail_after=2)
+
+        with pytest.raises(httpx.ReadError):
+            async for _ in voice.stream("Aferin sana!"):
+                pass
+
+        assert not list(tmp_path.rglob("*.mp3"))
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_discards_partial_clip(self, tmp_path):
+        voice = _streaming_voice(tmp_path, [b"ID3", b"-frame1", b"-frame2"])
+
+        stream = voice.stream("Aferin sana!")
+        assert await stream.__anext__() == b"ID3"
+        await stream.aclose()
+
+        assert not list(tmp_path.rglob("*.mp3"))
+        assert not list(tmp_path.rglob("*.tmp"))
+
+
+# ═══════════════════════════════════════════════════════════════
+# SENTENCE-CHUNKED TTS
+# ═══════════════════════════════════════════════════════════════
+
+_LONG_TEXT = (
+    "Bugün toplama işlemini çok iyi öğrendin. Dr. Ayşe'nin 3. sorusunu da "
+    "doğru yaptın! Şimdi biraz daha zor sorulara geçelim mi? Her gün biraz "
+    "pratik yaparsan çok daha hızlı olacaksın. Seninle gurur duyuyorum."
+)
+
+
+def _chunking_voice(tmp_path, delays=None) -> YuBuVoice:
+    voice = _voice(tmp_path)
+    state = {"active": 0, "peak": 0}
+
+    async def synthesize(clean_text, emotion):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep((delays or {}).get(clean_text[:5], 0.01))
+        state["active"] -= 1
+        return b"ID3\x04\x00\x00\x00\x00\x00\x02xx" + clean_text[:5].encode()
+
+    voice._synthesize = AsyncMock(side_effect=synthesize)
+    voice.concurrency = state
+    return voice
+
+
+class TestSentenceChunkedTTS:
+    def test_splits_at_turkish_sentence_boundaries(self):
+        assert split_sentences(_LONG_TEXT) == [
+            "Bugün toplama işlemini çok iyi öğrendin.",
+            "Dr. Ayşe'nin 3. sorusunu da doğru yaptın!",
+            "Şimdi biraz daha zor sorulara geçelim mi?",
+            "Her gün biraz pratik yaparsan çok daha hızlı olacaksın.",
+            "Seninle gurur duyuyorum.",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_stitches_chunks_in_order_under_concurrency_limit(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "TTS_CHUNK_CONCURRENCY", 2)
+        # The first sentence is the slowest; order must still hold
+        voice = _chunking_voice(tmp_path, delays={"Bugün": 0.05})
+
+        audio = await voice.speak(_LONG_TEXT)
+
+        assert voice._synthesize.await_count == 5
+        assert voice.concurrency["peak"] == 2
+        # Only the first clip keeps its ID3 tag
+        assert audio == b"ID3\x04\x00\x00\x00\x00\x00\x02xx" + "BugünDr. AŞimdiHer gSenin".encode()
+
+    @pytest.mark.asyncio
+    async def test_first_sentence_streams_before_the_rest_finish(self, tmp_path):
+        voice = _chunking_voice(tmp_path, delays={"Senin": 0.3})
+
+        stream = voice.stream(_LONG_TEXT)
+        first = await asyncio.wait_for(stream.__anext__(), timeout=0.2)
+        await stream.aclose()
+        await asyncio.sleep(0.3)  # let the coalesced synthesis finish
+
+        assert first.endswith("Bugün".encode())
+
+    @pytest.mark.asyncio
+    async def test_shared_sentences_are_reused_across_texts(self, tmp_path):
+        voice = _chunking_voice(tmp_path)
+        await voice.speak(_LONG_TEXT)
+
+        await voice.speak(_LONG_TEXT.replace("Seninle gurur duyuyorum.", "Yarın görüşürüz."))
+
+        assert voice._synthesize.await_count == 6
+
+    def test_strip_id3_removes_only_the_tag(self):
+        assert strip_id3(b"ID3\x04\x00\x00\x00\x00\x00\x02xxFRAME") == b"FRAME"
+        assert strip_id3(b"\xff\xfbFRAME") == b"\xff\xfbFRAME"
+
+
+# ═══════════════════════════════════════════════════════════════
+# POOLED ELEVENLABS CLIENT
+# ═══════════════════════════════════════════════════════════════
+
+def _elevenlabs_transport(requests) -> httpx.MockTransport:
+    """ElevenLabs stand-in answering every synthesis with a small MP3."""
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=b"ID3-" + request.url.path.encode())
+
+    return httpx.MockTransport(handle)
+
+
+class TestPooledTTSClient:
+    @pytest.mark.asyncio
+    async def test_requests_share_one_pooled_client(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "ELEVENLABS_BASE_URL", "https://tts.test/v1")
+        requests = []
+        voice = YuBuVoice(
+            cache=AudioCache(_disconnected_redis(), directory=str(tmp_path)),
+            flight=SingleFlight(_disconnected_redis()),
+        )
+        await voice.connect()
+        client = voice._client
+        client._transport = _elevenlabs_transport(requests)
+
+        await voice.speak("Bir", emotion="happy")
+        chunks = [chunk async for chunk in voice.stream("İki")]
+        await voice.connect()  # idempotent
+
+        assert voice._client is client
+        assert [r.url.path for r in requests] == [
+            f"/v1/text-to-speech/{voice._voice_id}",
+            f"/v1/text-to-speech/{voice._voice_id}/stream",
+        ]
+        assert all(r.headers["accept"] == "audio/mpeg" for r in requests)
+        assert "xi-api-key" in requests[0].headers
+        assert b"".join(chunks).endswith(b"/stream")
+
+        await voice.disconnect()
+        assert client.is_closed and voice._client is None
+
+    @pytest.mark.asyncio
+    async def test_uses_an_injected_client(self, tmp_path):
+        requests = []
+        voice = YuBuVoice(
+            cache=AudioCache(_disconnected_redis(), directory=str(tmp_path)),
+            flight=SingleFlight(_disconnected_redis()),
+            http_client=httpx.AsyncClient(
+                base_url="https://tts.test/v1", transport=_elevenlabs_transport(requests)
+            ),
+        )
+
+        audio = await voice.speak("Merhaba")
+
+        assert audio.startswith(b"ID3-") and len(requests) == 1
+        await voice.disconnect()
+
+
+# ═══════════════════════════════════════════════════════════════
+# CHAT-TO-SPEECH PIPELINE
+# ═══════════════════════════════════════════════════════════════
+
+_SAVED = object()  # stands in for the saved AIConversation
+
+
+async def _completion(deltas, delay=0.0, final=_SAVED):
+    for delta in deltas:
+        await asyncio.sleep(delay)
+        yield delta
+    yield final
+
+
+class TestChatSpeechPipeline:
+    def test_sentence_buffer_waits_for_the_next_sentence(self):
+        buffer = SentenceBuffer()
+
+        assert buffer.feed("Yuu! Harika") == ["Yuu!"]
+        assert buffer.feed(" iş. Dr.") == ["Harika iş."]
+        assert buffer.feed(" Ayşe") == []  # "Dr." is not a sentence end
+        assert buffer.feed(" geldi. S") == ["Dr. Ayşe geldi."]
+        assert buffer.flush() == ["S"]
+
+    @pytest.mark.asyncio
+    async def test_first_sentence_is_voiced_while_text_still_streams(self, tmp_path):
+        voice = _voice(tmp_path)
+        voice._synthesize = AsyncMock(side_effect=lambda text, emotion: text.encode())
+        deltas = ["Yuu! ", "Çok ", "iyi ", "yaptın", ". Devam ", "edelim mi?", " [EMOTION: happy]"]
+
+        items = [
+            item async for item in
+            speak_while_generating(_completion(deltas, delay=0.01), voice, "happy")
+        ]
+
+        kinds = ["audio" if isinstance(i, SpeechChunk) else i for i in items]
+        # The first clip arrives before the completion has finished
+        assert kinds.index("audio") < kinds.index("edelim mi?")
+        chunks = [i for i in items if isinstance(i, SpeechChunk)]
+        assert [c.text for c in chunks] == ["Yuu!", "Çok iyi yaptın.", "Devam edelim mi? [EMOTION: happy]"]
+        assert [c.seq for c in chunks] == [0, 1, 2]
+        assert chunks[2].audio == "Devam edelim mi?".encode()
+        assert items[-1] is _SAVED
+        assert "".join(i for i in items if isinstance(i, str)) == "".join(deltas)
+
+    @pytest.mark.asyncio
+    async def test_clips_keep_sentence_order_and_tts_errors_skip_a_sentence(self, tmp_path):
+        voice = _voice(tmp_path)
+
+        async def synthesize(text, emotion):
+            if text.startswith("Bir"):
+                await asyncio.sleep(0.05)
+            if text.startswith("İki"):
+                raise httpx.ReadError("tts down")
+            return text.encode()
+
+        voice._synthesize = AsyncMock(side_effect=synthesize)
+
+        items = [
+            item async for item in
+            speak_while_generating(_completion(["Bir. İki. Üç."]), voice)
+        ]
+
+        chunks = [i for i in items if isinstance(i, SpeechChunk)]
+        assert [c.text for c in chunks] == ["Bir.", "Üç."]
+        assert items[-1] is _SAVED
+
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_the_completion_stream(self, tmp_path):
+        voice = _voice(tmp_path)
+        closed = asyncio.Event()
+
+        async def completion():
+            try:
+                yield "Merhaba"
+                await asyncio.sleep(10)
+                yield " dünya."
+            finally:
+                closed.set()
+
+        pipeline = speak_while_generating(completion(), voice)
+        assert await pipeline.__anext__() == "Merhaba"
+        await pipeline.aclose()  # client went away while the next delta is pending
+
+        assert closed.is_set()
+
+
+# ═══════════════════════════════════════════════════════════════
+# LOW-BITRATE AUDIO VARIANTS
+# ═══════════════════════════════════════════════════════════════
+
+def _fake_transcoder(available: bool = True) -> MagicMock:
+    transcoder = MagicMock()
+    transcoder.available = available
+    transcoder.transcode = AsyncMock(side_effect=lambda audio, variant: b"OggS-" + variant.encode())
+    return transcoder
+
+
+class TestAudioVariants:
+    def test_format_query_wins_over_accept(self):
+        assert choose_variant("audio/ogg, audio/mpeg;q=0.8", None) == "opus"
+        assert choose_variant("audio/ogg", "mp3_low") == "mp3_low"
+        assert choose_variant("audio/mpeg", None) is None
+        assert choose_variant(None, "flac") is None
+
+    @pytest.mark.asyncio
+    async def test_variant_is_transcoded_once_and_cached_beside_original(self, tmp_path):
+        voice = _voice(tmp_path)
+        voice._transcoder = _fake_transcoder()
+
+        first = await voice.speak_variant("Aferin!", emotion="happy", variant="opus")
+        second = await voice.speak_variant("Aferin!", emotion="happy", variant="opus")
+
+        assert first == second == (b"OggS-opus", "audio/ogg; codecs=opus")
+        voice._transcoder.transcode.assert_awaited_once_with(b"ID3-mp3", "opus")
+        assert voice._synthesize.await_count == 1
+        names = sorted(path.name.split(".", 1)[1] for path in tmp_path.glob("*/*"))
+        assert names == ["mp3", "opus.ogg"]
+
+    @pytest.mark.asyncio
+    async def test_variant_hit_skips_the_original_clip(self, tmp_path):
+        voice = _voice(tmp_path)
+        voice._transcoder = _fake_transcoder()
+        await voice.speak_variant("Aferin!", emotion="happy", variant="opus")
+        for path in tmp_path.glob("*/*.mp3"):
+            path.unlink()  # original evicted, variant still cached
+
+        audio, _ = await voice.speak_variant("Aferin!", emotion="happy", variant="opus")
+
+        assert audio == b"OggS-opus"
+        assert voice._synthesize.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_serves_original_without_ffmpeg(self, tmp_path):
+        voice = _voice(tmp_path)
+        voice._transcoder = _fake_transcoder(available=False)
+
+        audio, media_type = await voice.speak_variant("Aferin!", variant="opus")
+
+        assert (audio, media_type) == (b"ID3-mp3", "audio/mpeg")
+        voice._transcoder.transcode.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_transcodes_in_a_worker_process(self, tmp_path):
+        # Stand-in for ffmpeg that echoes its input
+        ffmpeg = tmp_path / "ffmpeg"
+        ffmpeg.write_text("#!/bin/sh\ncat\n")
+        ffmpeg.chmod(0o755)
+        transcoder = AudioTranscoder(ffmpeg=str(ffmpeg), workers=1)
+
+        try:
+            assert await transcoder.transcode(b"ID3-mp3", "mp3_low") == b"ID3-mp3"
+        finally:
+            transcoder.shutdown()
+
+
+# ═══════════════════════════════════════════════════════════════
+# PHRASE LIBRARY
+# ═══════════════════════════════════════════════════════════════
+
+def _phrase_voice(tmp_path) -> YuBuVoice:
+    voice = _voice(tmp_path)
+    voice._synthesize = AsyncMock(
+        side_effect=lambda text, emotion: b"ID3\x04\x00\x00\x00\x00\x00\x00" + text.encode()
+    )
+    return voice
+
+
+class TestPhraseLibrary:
+    def test_peels_whole_sentence_phrases_off_both_ends(self):
+        library = PhraseLibrary(["Yuu! Başardın!", "İnanılmaz!", "Çok iyi gidiyorsun! 🌟"])
+        prepare = lambda text, emotion: text
+
+        assert library.split(
+            "Yuu! Başardın! 5 elma kaldı. Çok iyi gidiyorsun! 🌟", "happy", prepare
+        ) == (["Yuu! Başardın!"], "5 elma kaldı.", ["Çok iyi gidiyorsun! 🌟"])
+        assert library.split("İnanılmaz!lar", "happy", prepare) == ([], "İnanılmaz!lar", [])
+        assert library.split("İnanılmaz! Yuu! Başardın! Bitti.", "happy", prepare) == (
+            ["İnanılmaz!", "Yuu! Başardın!"], "Bitti.", []
+        )
+
+    def test_phrase_inside_a_sentence_is_not_spliced(self):
+        library = PhraseLibrary(["Harika bir deneme!", "Sen çok güçlüsün!", "Birlikte"])
+        prepare = lambda text, emotion: text
+
+        text = "Bu gerçekten Harika bir deneme! Bence Sen çok güçlüsün!"
+        assert library.split(text, "happy", prepare) == ([], text, [])
+        assert library.split("Birlikte sayalım.", "happy", prepare) == (
+            [], "Birlikte sayalım.", []
+        )
+
+    @pytest.mark.asyncio
+    async def test_only_the_dynamic_remainder_is_synthesized(self, tmp_path):
+        voice = _phrase_voice(tmp_path)
+        await voice.prerender_phrases()
+        voice._synthesize.reset_mock()
+
+        audio = await voice.speak("Yuu! Başardın! 3 artı 5 sekiz eder. İnanılmaz!", emotion="happy")
+
+        voice._synthesize.assert_awaited_once_with("3 artı 5 sekiz eder.", "happy")
+        assert audio.count(b"ID3") == 1
+        assert audio.endswith("Yuu! Başardın!3 artı 5 sekiz eder.İnanılmaz!".encode())
+
+    @pytest.mark.asyncio
+    async def test_gentle_phrases_match_after_text_preparation(self, tmp_path):
+        voice = _phrase_voice(tmp_path)
+        await voice.prerender_phrases()
+        voice._synthesize.reset_mock()
+
+        await voice.speak("Birlikte yapabiliriz! Önce onlukları sayalım.", emotion="gentle")
+
+        voice._synthesize.assert_awaited_once_with("Önce onlukları sayalım.", "gentle")
+
+    @pytest.mark.asyncio
+    async def test_hint_encouragements_are_in_the_library(self, tmp_path):
+        voice = _phrase_voice(tmp_path)
+        await voice.prerender_phrases()
+        voice._synthesize.reset_mock()
+        encouragement = AIService._get_encouragement(None, LearningDifficulty.DYSCALCULIA)
+
+        await voice.speak(f"Onlukları ayrı topla. {encouragement}", emotion="encouraging")
+
+        voice._synthesize.assert_awaited_once_with("Onlukları ayrı topla.", "encouraging")